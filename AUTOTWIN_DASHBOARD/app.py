@@ -8,7 +8,9 @@ import time
 import os
 
 # ── Import Thevenin ECM backend ──────────────────────────────────────────────
-from thevenin_ecm import TheveninECM, NASA_Q_NOMINAL
+from thevenin_ecm import TheveninECM, NASA_Q_NOMINAL, make_ecm
+from ecm_result import ECMResult
+from ecm_predict import time_to_cutoff, state_of_power, model_from_result
 from lumped_thermal import LumpedThermalModel
 
 # ═══════════════════════════════════════════════════════════════
@@ -28,6 +30,7 @@ st.set_page_config(
 import json, os, hashlib
 
 RESULTS_FILE = "saved_results.json"
+ECM_CACHE_DIR = ".ecm_cache"   # identified ECM results, keyed by file content
 
 USERS = {
     "autotwin": {"password": hashlib.sha256("autotwin123".encode()).hexdigest(), "role": "technical"},
@@ -45,7 +48,7 @@ def save_results_to_disk():
         if isinstance(obj, np.ndarray): return obj.tolist()
         if isinstance(obj, np.integer): return int(obj)
         if isinstance(obj, np.floating): return float(obj)
-        if isinstance(obj, dict): return {k: _convert(v) for k, v in obj.items()}
+        if isinstance(obj, (dict, ECMResult)): return {k: _convert(v) for k, v in obj.items()}
         if isinstance(obj, list): return [_convert(i) for i in obj]
         return obj
 
@@ -1254,6 +1257,7 @@ defaults = {
     "ecm_results": None,        # Stores single/last ECM run output dict (used by other tabs)
     "ecm_filename": None,       # Name of last processed file
     "ecm_qnom": NASA_Q_NOMINAL,
+    "ecm_order": 1,             # Number of RC branches used for new ECM runs
     "ecm_batch_results": [],    # List of dicts, one per uploaded file — for batch/compare view
     "ecm_results_folder": "",   # Last used results folder path for auto-load
     "thermal_results": None,
@@ -1636,6 +1640,11 @@ with tab3:
                   Q_nom = <span style="color:#00c8ff;font-weight:700;">{q_nom:.1f} Ah</span>
                   &nbsp;|&nbsp; Fresh cell: 2.0 Ah &nbsp;|&nbsp; Adjust for aged batteries
                 </div>""", unsafe_allow_html=True)
+                st.session_state.ecm_order = st.selectbox(
+                    "RC branches", [1, 2, 3],
+                    index=[1, 2, 3].index(st.session_state.ecm_order),
+                    format_func=lambda n: f"{n}-RC Thevenin",
+                    help="Higher orders fit multi-time-constant relaxation at a higher identification cost")
 
         # ── MODE B: Auto-load from pre-computed results folder ───────────────────
         else:
@@ -1738,7 +1747,7 @@ with tab3:
                                         "C1_F":   float(_row["C1_F"].iloc[0]),
                                         "tau_s":  float(_row["tau_s"].iloc[0]),
                                     }
-                            _loaded.append(_res)
+                            _loaded.append(ECMResult.from_dict(_res).astype("float32"))
                         except Exception as _e:
                             st.warning(f"Could not load {selected_names[_fi]}: {_e}")
                         _prog.progress(int((_fi + 1) / len(_selected_paths) * 100))
@@ -1820,7 +1829,8 @@ with tab3:
                 try:
                     raw_df  = TheveninECM.load_uploaded(uf)
                     overall_prog.progress(pct_start + int((pct_end - pct_start) * 0.2))
-                    ecm     = TheveninECM()
+                    ecm     = make_ecm(st.session_state.ecm_order, cache=ECM_CACHE_DIR,
+                                       trace_dtype="float32")   # compact batch session
                     results = ecm.run(raw_df, Q_nominal_Ah=q_nom, verbose=False)
                     results["_filename"] = uf.name          # tag result with filename
                     batch_results.append(results)
@@ -4360,6 +4370,61 @@ with tab8:
 
         st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 
+        # ── Runtime vs Load ───────────────────────────────────────────────────
+        if _rp_ecm and "ocv_poly" in _rp_ecm:
+            _rt_model = model_from_result(_rp_ecm)
+            _rt_q     = _rt_model["Q_nominal_Ah"]
+            _rt_loads = np.linspace(0.05, 2.0, 120) * _rt_q          # 0.05C … 2C
+            _rt_min   = time_to_cutoff(-_rt_loads, **_rt_model,
+                                       soc0=float(np.asarray(_rp_ecm["soc"])[0])) / 60.0
+            _rt_cur   = np.asarray(_rp_ecm.get("current", []), dtype=float)
+            _rt_time  = np.asarray(_rp_ecm["time"], dtype=float)
+
+            st.markdown("""
+            <div class="glass-panel">
+              <h4 style="font-size:1.3rem;margin:0;">⏱️ RUNTIME VS LOAD</h4>
+              <p style="font-family:'Share Tech Mono',monospace;font-size:0.84rem;color:#5a7090;margin:4px 0 0;">
+                Minutes from the start of the test until the battery reaches 2.7 V, at a steady load
+              </p>
+            </div>""", unsafe_allow_html=True)
+
+            fig_rt = go.Figure()
+            fig_rt.add_trace(go.Scatter(x=_rt_loads, y=_rt_min, name="ECM prediction",
+                line=dict(color="#00c8ff", width=2.6)))
+            if _rt_cur.size:
+                fig_rt.add_trace(go.Scatter(
+                    x=[float(np.median(np.abs(_rt_cur)))],
+                    y=[(_rt_time[-1] - _rt_time[0]) / 60.0],
+                    name="This test", mode="markers",
+                    marker=dict(color="#ff8800", size=13, symbol="diamond")))
+            fig_rt.update_layout(**cyber_plotly_layout(340),
+                xaxis_title="Discharge current (A)", yaxis_title="Runtime to 2.7 V (min)")
+            st.plotly_chart(fig_rt, use_container_width=True)
+
+            # ── Peak Power (SOP) ──────────────────────────────────────────────
+            _sop_soc = np.linspace(_rt_model["soc_min"], 1.0, 60)
+            _sop     = state_of_power(**_rt_model, soc=_sop_soc)
+
+            st.markdown("""
+            <div class="glass-panel">
+              <h4 style="font-size:1.3rem;margin:0;">⚡ PEAK POWER (STATE OF POWER)</h4>
+              <p style="font-family:'Share Tech Mono',monospace;font-size:0.84rem;color:#5a7090;margin:4px 0 0;">
+                Power the battery can deliver or accept for 2 s, 10 s and 30 s without leaving 2.7–4.2 V or its current limits
+              </p>
+            </div>""", unsafe_allow_html=True)
+
+            fig_sop = go.Figure()
+            for j, (h, c) in enumerate(zip(_sop["horizons_s"], ["#00c8ff", "#00ff88", "#cc44ff"])):
+                fig_sop.add_trace(go.Scatter(x=_sop_soc * 100, y=_sop["P_discharge_W"][:, j],
+                    name=f"Discharge {h:g} s", line=dict(color=c, width=2.4)))
+                fig_sop.add_trace(go.Scatter(x=_sop_soc * 100, y=_sop["P_charge_W"][:, j],
+                    name=f"Charge {h:g} s", line=dict(color=c, width=2.0, dash="dash")))
+            fig_sop.update_layout(**cyber_plotly_layout(340),
+                xaxis_title="State of charge (%)", yaxis_title="Peak power (W)")
+            st.plotly_chart(fig_sop, use_container_width=True)
+
+            st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
+
         # ── Plain English Summary ─────────────────────────────────────────────
         st.markdown("""
         <div class="glass-panel">
@@ -1,7 +1,8 @@
 """
 batch_run.py  ─  AUTOTWIN Batch ECM Processor
 ══════════════════════════════════════════════
-Runs the Thevenin 1-RC ECM on every NASA discharge CSV in a folder.
+Runs the Thevenin n-RC ECM (1-RC by default) on every NASA discharge CSV
+in a folder.
 Saves one results CSV and one plot per file, plus a combined summary.
 
 Usage examples
@@ -15,6 +16,42 @@ Usage examples
   # Match only certain files by pattern
   python batch_run.py --folder data/ --pattern "*B0043*"
 
+  # Closed-form fast identification (DE only as fallback)
+  python batch_run.py --folder data/ --mode fast
+
+  # Identify on a uniform grid with flat stretches thinned to a 2 mV budget
+  python batch_run.py --folder data/B0043/ --resample auto --decimate 2
+
+  # Sobol multi-start least squares instead of Differential Evolution
+  python batch_run.py --folder data/B0043/ --strategy multistart --workers 4
+
+  # Identify only on current steps, relaxation tails and knees
+  python batch_run.py --folder data/B0043/ --segments
+
+  # Build (first run) or reuse a monotone per-battery OCV table
+  python batch_run.py --folder data/B0043/ --ocv-table data/B0043/ocv_table.npz
+
+  # Sequential mode: warm-start each cycle from the previous one
+  python batch_run.py --folder data/B0043/ --sequential
+
+  # Reuse results of files that have not changed since the last run
+  python batch_run.py --folder data/B0043/ --cache .ecm_cache
+
+  # 2RC model instead of the default 1RC
+  python batch_run.py --folder data/B0043/ --order 2
+
+  # R0/R1/C1 as lookup tables over 6 SOC breakpoints
+  python batch_run.py --folder data/B0043/ --soc-map 6
+
+  # Add one-state OCV hysteresis (for traces with charge and discharge)
+  python batch_run.py --folder data/ --pattern "*.csv" --hysteresis
+
+  # Bootstrap confidence intervals (default: Jacobian-based) on 4 cores
+  python batch_run.py --folder data/B0043/ --uncertainty bootstrap --workers 4
+
+  # One joint fit over all cycles: shared C1 + OCV curve, per-cycle R0/R1
+  python batch_run.py --folder data/B0043/ --joint
+
   # Save everything to a specific output directory
   python batch_run.py --folder data/ --outdir results/B0043/
 
@@ -25,6 +62,7 @@ Usage examples
 import argparse
 import fnmatch
 import os
+import re
 import sys
 import time
 
@@ -36,7 +74,8 @@ _this_dir = os.path.dirname(os.path.abspath(__file__))
 if _this_dir not in sys.path:
     sys.path.insert(0, _this_dir)
 try:
-    from thevenin_ecm import TheveninECM, NASA_Q_NOMINAL as NASA_Q_NOM_AH
+    from thevenin_ecm import (TheveninECM, SOCMapECM, MultiCycleECM, HysteresisECM,
+                              make_ecm, NASA_Q_NOMINAL as NASA_Q_NOM_AH)
 except ImportError:
     print("[ERROR] Cannot import thevenin_ecm.py — make sure it is in the same folder.")
     sys.exit(1)
@@ -83,11 +122,89 @@ def main():
                     help="Generate a 4-panel plot per file (default: on)")
     ap.add_argument("--no-plot", dest="plot", action="store_false",
                     help="Skip plot generation")
+    ap.add_argument("--mode",    default="full", choices=["full", "fast"],
+                    help="Identification mode: 'full' = DE + least squares, "
+                         "'fast' = closed-form fit with DE fallback (default: full)")
+    ap.add_argument("--strategy", default="de", choices=["de", "multistart"],
+                    help="Global stage: Differential Evolution or Sobol "
+                         "multi-start least squares (default: de)")
+    ap.add_argument("--resample", default=None, metavar="DT",
+                    help="Identify on a uniform time grid of DT seconds "
+                         "('auto' = median step); metrics use all samples")
+    ap.add_argument("--decimate", type=float, default=None, metavar="MV",
+                    help="Thin flat regions for identification within MV "
+                         "millivolts; metrics use all samples")
+    ap.add_argument("--segments", action="store_true",
+                    help="Identify on informative windows only (current steps, "
+                         "relaxation tails, knees) plus weighted anchors; "
+                         "metrics use all samples")
+    ap.add_argument("--ocv-table", default=None, metavar="PATH",
+                    help="Per-battery monotone OCV table (.npz); built from "
+                         "the matched files if PATH does not exist yet")
+    ap.add_argument("--order",   type=int, default=1,
+                    help="Number of RC branches in the Thevenin model (default: 1)")
+    ap.add_argument("--soc-map", type=int, default=0, metavar="N",
+                    help="Identify R0/R1/C1 as tables over N evenly spaced SOC "
+                         "breakpoints (1-RC only; default: scalar parameters)")
+    ap.add_argument("--hysteresis", action="store_true",
+                    help="Add a one-state + instantaneous OCV hysteresis term; "
+                         "keeps charge and rest samples (needs traces that "
+                         "charge and discharge)")
+    ap.add_argument("--joint",   action="store_true",
+                    help="Identify all files as one problem: C1 and the OCV "
+                         "curve shared, R0/R1 per file (1-RC only)")
+    ap.add_argument("--sequential", action="store_true",
+                    help="Seed each file (in filename order) from the previous "
+                         "file's parameters; DE only runs when that misses "
+                         "the RMSE target")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Worker processes per fit for the DE stage "
+                         "(-1 = all cores; default: 1 = batched single core)")
+    ap.add_argument("--uncertainty", default="jacobian",
+                    choices=["jacobian", "bootstrap", "none"],
+                    help="Parameter confidence intervals, added to the summary "
+                         "as *_lo / *_hi columns (default: jacobian)")
+    ap.add_argument("--n-boot",  type=int, default=200,
+                    help="Replicates for --uncertainty bootstrap (default: 200)")
+    ap.add_argument("--ci-level", type=float, default=0.95,
+                    help="Confidence level of the intervals (default: 0.95)")
+    ap.add_argument("--cache",   default=None,
+                    help="Result cache directory; unchanged files are served "
+                         "from it instead of being re-identified")
+    ap.add_argument("--clear-cache", action="store_true",
+                    help="Empty the --cache directory before running")
     ap.add_argument("--verbose", action="store_true",
                     help="Show optimiser progress for each file")
     args = ap.parse_args()
 
     # ── Validate inputs ────────────────────────────────────────────────────────
+    model_kw = {                      # model options shared by every file
+        "resample_dt":  (args.resample if args.resample in (None, "auto")
+                         else float(args.resample)),
+        "decimate_tol": None if args.decimate is None else args.decimate / 1000.0,
+        "segments":     args.segments,
+        "strategy":     args.strategy,
+        "uncertainty":  None if args.uncertainty == "none" else args.uncertainty,
+        "n_bootstrap":  args.n_boot,
+        "ci_level":     args.ci_level,
+    }
+    if args.soc_map and (args.soc_map < 2 or args.order != 1):
+        print("[ERROR] --soc-map needs N >= 2 and --order 1")
+        sys.exit(1)
+    if args.joint and (args.order != 1 or args.soc_map or args.sequential
+                       or args.hysteresis):
+        print("[ERROR] --joint cannot be combined with --order, --soc-map, "
+              "--hysteresis or --sequential")
+        sys.exit(1)
+    if args.hysteresis and args.soc_map:
+        print("[ERROR] --hysteresis cannot be combined with --soc-map")
+        sys.exit(1)
+    if args.segments and args.decimate is not None:
+        print("[ERROR] --segments cannot be combined with --decimate")
+        sys.exit(1)
+    if args.uncertainty == "bootstrap" and args.soc_map:
+        print("[ERROR] --soc-map supports --uncertainty jacobian or none only")
+        sys.exit(1)
     if not os.path.isdir(args.folder):
         print(f"[ERROR] Folder not found: {args.folder}")
         sys.exit(1)
@@ -100,18 +217,64 @@ def main():
     outdir = args.outdir or os.path.join(args.folder, "ecm_results")
     os.makedirs(outdir, exist_ok=True)
 
+    cache = None
+    if args.cache:
+        from ecm_cache import ECMResultCache
+        cache = ECMResultCache(args.cache)
+        n_dropped = cache.clear() if args.clear_cache else cache.invalidate()
+        if n_dropped:
+            print(f"[INFO] Dropped {n_dropped} stale cache entr{'y' if n_dropped == 1 else 'ies'}")
+
+    if args.ocv_table:
+        from ocv_table import OCVTable
+        existed = os.path.isfile(args.ocv_table)
+        model_kw["ocv_table"] = OCVTable.load_or_build(
+            args.ocv_table, lambda: [TheveninECM.load_csv(f) for f in csv_files],
+            Q_nominal_Ah=args.qnom)
+        print(f"[INFO] OCV table {'loaded from' if existed else 'built →'} {args.ocv_table}")
+
     # ── Header ─────────────────────────────────────────────────────────────────
     print_sep()
-    print(f"  AUTOTWIN — Thevenin 1-RC ECM  ·  Batch Mode")
+    print(f"  AUTOTWIN — Thevenin {args.order}-RC ECM  ·  Batch Mode")
     print(f"  Folder   : {os.path.abspath(args.folder)}")
     print(f"  Files    : {len(csv_files)} CSV(s) matched")
     print(f"  Q_nom    : {args.qnom} Ah")
+    print(f"  Mode     : {'joint' if args.joint else args.mode}"
+          f"{' (sequential warm start)' if args.sequential else ''}")
     print(f"  Output   : {os.path.abspath(outdir)}")
+    if args.cache:
+        print(f"  Cache    : {os.path.abspath(args.cache)}")
     print_sep()
 
     # ── Batch loop ─────────────────────────────────────────────────────────────
     summary_rows = []
     failed       = []
+    prev_params  = None      # --sequential: last successful cycle's params
+    joint        = None      # --joint: {filename: result or exception}
+
+    if args.joint:
+        joint, frames = {}, {}
+        for fpath in csv_files:
+            try:
+                frames[os.path.basename(fpath)] = TheveninECM.load_csv(fpath)
+            except Exception as e:
+                joint[os.path.basename(fpath)] = e    # reported in the loop below
+        t0 = time.time()
+        jres = MultiCycleECM().run(list(frames.values()), Q_nominal_Ah=args.qnom,
+                                   verbose=True)
+        for i, (fname, r) in enumerate(zip(frames, jres["cycles"])):
+            joint[fname] = r if r is not None else ValueError(jres["skipped"][i])
+        sh = jres["shared"]
+        print(f"[INFO] Joint fit: {len(jres['cycles']) - len(jres['skipped'])}"
+              f"/{len(csv_files)} files, "
+              f"C1={sh['C1_F']:.1f} F  [{time.time()-t0:.1f} s]")
+        shared_path = os.path.join(outdir, "batch_ecm_joint_shared.csv")
+        pd.DataFrame({
+            "SOC":    sh["soc_breakpoints"],
+            "OCV_V":  sh["ocv_table_V"],
+            "C1_F":   sh["C1_F"],
+        }).to_csv(shared_path, index=False)
+        print(f"[✓] Shared OCV / C1 → {shared_path}")
 
     for idx, fpath in enumerate(csv_files):
         fname = os.path.basename(fpath)
@@ -120,16 +283,38 @@ def main():
 
         t0 = time.time()
         try:
-            df  = TheveninECM.load_csv(fpath)
-            ecm = TheveninECM()
-            res = ecm.run(df, Q_nominal_Ah=args.qnom, verbose=args.verbose)
+            if joint is not None:
+                res = joint[fname]
+                if isinstance(res, Exception):
+                    raise res
+            else:
+                df = TheveninECM.load_csv(fpath)
+                if args.soc_map:
+                    ecm = SOCMapECM(np.linspace(0.0, 1.0, args.soc_map),
+                                    mode=args.mode, workers=args.workers, cache=cache,
+                                    **model_kw)
+                elif args.hysteresis:
+                    ecm = HysteresisECM(args.order, mode=args.mode, workers=args.workers,
+                                        cache=cache, **model_kw)
+                else:
+                    ecm = make_ecm(args.order, mode=args.mode, workers=args.workers,
+                                   cache=cache, **model_kw)
+                res = ecm.run(df, Q_nominal_Ah=args.qnom, verbose=args.verbose,
+                              warm_start=prev_params if args.sequential else None)
             elapsed = time.time() - t0
+            prev_params = res["params"]
 
             # Print quick summary
             p = res["params"]; m = res["metrics"]; s = res["soc"]
             print(f"    R0={p['R0_ohm']*1000:.2f} mΩ  "
                   f"R1={p['R1_ohm']*1000:.2f} mΩ  "
                   f"C1={p['C1_F']:.1f} F  τ={p['tau_s']:.2f} s")
+            if "R0_ohm_ci" in p:
+                lo, hi = p["R0_ohm_ci"]
+                print(f"    R0 {args.ci_level:.0%} CI [{lo*1000:.2f}, {hi*1000:.2f}] mΩ")
+            if res.get("uncertainty", {}).get("unidentified"):
+                print(f"    Not identified by this trace: "
+                      f"{', '.join(res['uncertainty']['unidentified'])}")
             print(f"    RMSE={m['RMSE_V']*1000:.2f} mV  "
                   f"MAE={m['MAE_V']*1000:.2f} mV  "
                   f"R²={m['R2']:.5f}  "
@@ -156,7 +341,7 @@ def main():
             if args.plot:
                 _save_plot(res, base, outdir)
 
-            summary_rows.append({
+            row = {
                 "File":          fname,
                 "R0_mOhm":       round(p["R0_ohm"]*1000, 3),
                 "R1_mOhm":       round(p["R1_ohm"]*1000, 3),
@@ -174,7 +359,29 @@ def main():
                 "n_samples":     len(res["time"]),
                 "elapsed_s":     round(elapsed, 1),
                 "Q_nom_Ah":      args.qnom,
-            })
+            }
+            for i in range(2, args.order + 1):          # extra RC branches
+                row[f"R{i}_mOhm"] = round(p[f"R{i}_ohm"]*1000, 3)
+                row[f"C{i}_F"]    = round(p[f"C{i}_F"],        2)
+                row[f"tau{i}_s"]  = round(p[f"tau{i}_s"],      3)
+            if args.soc_map:                              # SOC tables
+                for j, bp in enumerate(p["soc_breakpoints"]):
+                    tag = f"soc{bp*100:.0f}"
+                    row[f"R0_mOhm_{tag}"] = round(p["R0_map_ohm"][j]*1000, 3)
+                    row[f"R1_mOhm_{tag}"] = round(p["R1_map_ohm"][j]*1000, 3)
+                    row[f"C1_F_{tag}"]    = round(p["C1_map_F"][j],        2)
+            if args.hysteresis:                           # hysteresis terms
+                row["gamma"]   = p["gamma"]
+                row["M_mV"]    = round(p["M_hyst_V"]*1000,  3)
+                row["M0_mV"]   = round(p["M0_hyst_V"]*1000, 3)
+            for col, (key, scale, nd) in _ci_columns(args.order).items():
+                if f"{key}_ci" in p:                      # confidence intervals
+                    lo, hi = p[f"{key}_ci"]
+                    row[f"{col}_lo"] = round(lo*scale, nd)
+                    row[f"{col}_hi"] = round(hi*scale, nd)
+            if "uncertainty" in res:
+                row["Unidentified"] = " ".join(res["uncertainty"]["unidentified"])
+            summary_rows.append(row)
 
         except Exception as e:
             elapsed = time.time() - t0
@@ -215,6 +422,24 @@ def main():
     print()
 
 
+def _ci_columns(order: int) -> dict:
+    """Summary column -> (params key, unit scale, decimals) for the CI columns."""
+    cols = {"R0_mOhm": ("R0_ohm", 1000, 3), "R1_mOhm": ("R1_ohm", 1000, 3),
+            "C1_F": ("C1_F", 1, 2), "tau_s": ("tau_s", 1, 3)}
+    for i in range(2, order + 1):
+        cols[f"R{i}_mOhm"] = (f"R{i}_ohm", 1000, 3)
+        cols[f"C{i}_F"]    = (f"C{i}_F", 1, 2)
+        cols[f"tau{i}_s"]  = (f"tau{i}_s", 1, 3)
+    cols.update({"gamma": ("gamma", 1, 4), "M_mV": ("M_hyst_V", 1000, 3),
+                 "M0_mV": ("M0_hyst_V", 1000, 3)})
+    return cols
+
+
+def _n_rc(params: dict) -> int:
+    """Number of RC branches in a result's params (R1_ohm/C1_F, R2_ohm/C2_F, ...)."""
+    return sum(1 for k in params if re.fullmatch(r"C\d+_F", k))
+
+
 def _save_plot(res: dict, base: str, outdir: str) -> None:
     """Save a 4-panel plot for one file's ECM results."""
     try:
@@ -225,9 +450,10 @@ def _save_plot(res: dict, base: str, outdir: str) -> None:
         fig, axes = plt.subplots(4, 1, figsize=(13, 11), sharex=True)
         t = res["time"]; soc = res["soc"]
         p = res["params"]; m = res["metrics"]
+        n_rc = _n_rc(p)
 
         fig.suptitle(
-            f"AUTOTWIN — Thevenin 1-RC ECM │ {base}\n"
+            f"AUTOTWIN — Thevenin {n_rc}-RC ECM │ {base}\n"
             f"R₀={p['R0_ohm']*1000:.2f} mΩ  R₁={p['R1_ohm']*1000:.2f} mΩ  "
             f"C₁={p['C1_F']:.1f} F  τ={p['tau_s']:.2f} s  │  "
             f"RMSE={m['RMSE_V']*1000:.2f} mV  R²={m['R2']:.5f}",
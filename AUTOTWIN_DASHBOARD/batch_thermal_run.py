@@ -18,6 +18,9 @@ Usage:
     # Custom R value from ECM
     python batch_thermal_run.py --calib "Battery47/discharge" "Battery47/charge" --valid_split 0.2 --R_ohm 0.095
 
+    # Multi-start least squares instead of Differential Evolution
+    python batch_thermal_run.py --calib "Battery47/discharge" --strategy multistart
+
 Outputs saved to <first_calib_folder>/thermal_results/
     thermal_params.csv          — final median C_th, hA, T_amb
     batch_thermal_summary.csv   — per-file calibration metrics
@@ -45,6 +48,11 @@ parser.add_argument("--out",   default=None,
                     help="Output folder (default: <first_calib_folder>/thermal_results)")
 parser.add_argument("--seed",  type=int, default=42,
                     help="Random seed for train/valid split (default 42)")
+parser.add_argument("--workers", type=int, default=1,
+                    help="Worker processes per calibration fit (-1 = all cores)")
+parser.add_argument("--strategy", default="de", choices=["de", "multistart"],
+                    help="Global stage: Differential Evolution or Sobol "
+                         "multi-start least squares (default: de)")
 args = parser.parse_args()
 
 CALIB_FOLDERS = args.calib
@@ -91,7 +99,7 @@ if VALID_SPLIT > 0 and not VALID_FOLDERS:
     print(f"[INFO] Auto-split: {len(all_calib_files)} calibration, {len(auto_valid_files)} validation\n")
 
 # ── Run calibration ───────────────────────────────────────────────────────────
-model = LumpedThermalModel()
+model = LumpedThermalModel(workers=args.workers, strategy=args.strategy)
 calib_results = []
 cth_vals, ha_vals = [], []
 
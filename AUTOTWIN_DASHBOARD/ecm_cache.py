@@ -0,0 +1,229 @@
+"""
+ecm_cache.py  —  AUTOTWIN | On-disk cache of ECM identification results
+========================================================================
+Content-addressed store for TheveninECM.run() results, so unchanged files
+are not re-identified on every batch run or dashboard RUN click.
+
+Key    = SHA-256 of the input arrays + Q_nominal_Ah + model/optimiser
+         settings + model version
+Entry  = one <key>.npz file (arrays + JSON metadata), written atomically;
+         arrays inside dict values (e.g. uncertainty["cov"]) are stored as
+         "<key>.<name>" members so they come back as arrays too
+LRU    = file mtime is bumped on every hit; the oldest entries are evicted
+         once the directory exceeds max_entries / max_bytes
+
+Because all bookkeeping lives in the file system (no index file), several
+processes can share one cache directory safely.
+
+Usage
+-----
+    from ecm_cache import ECMResultCache
+    cache = ECMResultCache(".ecm_cache", max_entries=500)
+    ecm   = TheveninECM(cache=cache)
+    res   = ecm.run(df)          # identified and stored
+    res   = ecm.run(df)          # served from disk
+    cache.invalidate()           # drop entries from older model versions
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+
+_DEFAULT_DIR         = ".ecm_cache"
+_DEFAULT_MAX_ENTRIES = 1000
+_DEFAULT_MAX_BYTES   = 500 * 1024 ** 2     # 500 MB
+_ENTRY_SUFFIX        = ".npz"
+_NESTED_SEP          = "."          # npz member name of result[outer][inner]
+
+
+class ECMResultCache:
+    """
+    Persistent, size-bounded LRU cache of ECM result dicts.
+
+    Parameters
+    ----------
+    directory : str          Cache folder (created on demand)
+    max_entries : int        Evict least-recently-used entries above this
+    max_bytes : int          ... or above this total size on disk
+    model_version : str      Stored with every entry; entries written by
+                             another version never match and are purged
+                             by invalidate()
+    """
+
+    def __init__(self, directory=_DEFAULT_DIR,
+                 max_entries=_DEFAULT_MAX_ENTRIES,
+                 max_bytes=_DEFAULT_MAX_BYTES,
+                 model_version=None):
+        if model_version is None:
+            from thevenin_ecm import ECM_MODEL_VERSION as model_version
+        self.directory     = directory
+        self.max_entries   = max_entries
+        self.max_bytes     = max_bytes
+        self.model_version = str(model_version)
+
+    # ── Keys ──────────────────────────────────────────────────────────────────
+
+    def make_key(self, arrays, **settings):
+        """
+        Hash a mapping of name -> array plus keyword settings.
+
+        Arrays are hashed as contiguous float64 bytes (with their name and
+        shape), settings as sorted JSON, so equal inputs always give the
+        same key regardless of dict order or source dtype.
+        """
+        h = hashlib.sha256()
+        h.update(self.model_version.encode())
+        for name in sorted(arrays):
+            a = np.ascontiguousarray(arrays[name], dtype=np.float64)
+            h.update(name.encode())
+            h.update(str(a.shape).encode())
+            h.update(a.tobytes())
+        h.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return h.hexdigest()
+
+    # ── Get / put ─────────────────────────────────────────────────────────────
+
+    def get(self, key):
+        """
+        Return (result, state) for key, or None on a miss.
+
+        ``result`` is the run() dict; ``state`` holds whatever the model
+        stored to restore itself (e.g. full-precision params, OCV poly).
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                meta = json.loads(str(npz["__meta__"]))
+                if meta.get("model_version") != self.model_version:
+                    return None
+                result = dict(meta["result"])
+                for name in meta["arrays"]:
+                    outer, _, inner = name.partition(_NESTED_SEP)
+                    if inner:
+                        result[outer][inner] = npz[name]
+                    else:
+                        result[name] = npz[name]
+                state = {k: np.asarray(v) if isinstance(v, list) else v
+                         for k, v in meta["state"].items()}
+        except (OSError, KeyError, ValueError):
+            return None
+        try:
+            os.utime(path)               # LRU: mark as recently used
+        except OSError:
+            pass
+        return result, state
+
+    def put(self, key, result, state=None):
+        """Store a run() result (ndarrays, also inside dict values, become npz members)."""
+        os.makedirs(self.directory, exist_ok=True)
+        arrays, scalars = {}, {}
+        for k, v in result.items():
+            if isinstance(v, np.ndarray):
+                arrays[k] = v
+            elif isinstance(v, dict):
+                scalars[k] = {kk: vv for kk, vv in v.items()
+                              if not isinstance(vv, np.ndarray)}
+                arrays.update({f"{k}{_NESTED_SEP}{kk}": vv for kk, vv in v.items()
+                               if isinstance(vv, np.ndarray)})
+            else:
+                scalars[k] = v
+        meta = {
+            "model_version": self.model_version,
+            "arrays":        sorted(arrays),
+            "result":        scalars,
+            "state":         {k: (v.tolist() if isinstance(v, np.ndarray) else v)
+                              for k, v in (state or {}).items()},
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, __meta__=np.array(json.dumps(meta, default=_json_default)),
+                         **arrays)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._evict()
+
+    # ── Maintenance ───────────────────────────────────────────────────────────
+
+    def invalidate(self, all_versions=False):
+        """
+        Delete entries written by another model version (or every entry
+        when all_versions=True). Returns the number of entries removed.
+        """
+        removed = 0
+        for path, _, _ in self._entries():
+            stale = all_versions
+            if not stale:
+                try:
+                    with np.load(path, allow_pickle=False) as npz:
+                        meta  = json.loads(str(npz["__meta__"]))
+                        stale = meta.get("model_version") != self.model_version
+                except (OSError, KeyError, ValueError):
+                    stale = True
+            if stale and _remove(path):
+                removed += 1
+        return removed
+
+    def clear(self):
+        """Delete every entry."""
+        return self.invalidate(all_versions=True)
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __contains__(self, key):
+        return os.path.isfile(self._path(key))
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def _entries(self):
+        """[(path, mtime, size)] of all entries, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        out = []
+        for fn in os.listdir(self.directory):
+            if not fn.endswith(_ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.directory, fn)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            out.append((path, st.st_mtime, st.st_size))
+        return sorted(out, key=lambda e: e[1])
+
+    def _evict(self):
+        entries = self._entries()
+        total   = sum(size for _, _, size in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            path, _, size = entries.pop(0)
+            _remove(path)
+            total -= size
+
+
+def _json_default(obj):
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Not JSON serialisable: {type(obj).__name__}")
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
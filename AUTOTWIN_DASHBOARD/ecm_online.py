@@ -0,0 +1,602 @@
+"""
+ecm_online.py  —  AUTOTWIN | Streaming Thevenin ECM for live telemetry
+======================================================================
+TheveninECM.run() works on complete files. This module runs a fitted model
+sample by sample against streamed pack telemetry (10–100 Hz):
+
+ECMStepper  — stateful forward model; keeps SOC and the RC voltages
+              internally and advances one sample in O(1) without
+              allocating arrays. step() is the single-cell fast path,
+              step_many() advances a whole fleet of cells in one call.
+OnlineRLS   — recursive least squares with a forgetting factor; tracks
+              R0, R1 and tau sample by sample from streamed I and V.
+ECMKalmanFilter — extended Kalman filter for SOC and the RC voltages,
+              state held as (n_cells, ...) arrays so one update() call
+              corrects a whole fleet.
+DualSOCCapacityEstimator — the EKF with capacity as an extra slow state,
+              so effective capacity (and SOH) is tracked online instead
+              of being entered as Q_nominal by hand.
+
+Sign convention follows the NASA data: discharge current is negative, so
+SOC += I·dt / (3600·Q) and V = OCV(SOC) + R0·I + ΣV_RC.
+
+Usage
+-----
+    from thevenin_ecm import TheveninECM
+    from ecm_online import ECMStepper
+
+    ecm = TheveninECM(); ecm.run(df)
+    stepper = ECMStepper.from_ecm(ecm)
+    for I, dt in telemetry:               # dt = seconds since last sample
+        V_pred = stepper.step(I, dt)
+
+    fleet = ECMStepper.from_ecm(ecm, n_cells=500)
+    V_pred = fleet.step_many(I_cells, dt) # I_cells.shape == (500,)
+
+    rls = OnlineRLS.from_ecm(ecm, forgetting=0.999)
+    for I, V, dt in telemetry:
+        rls.update(I, V, dt)
+    rls.params()                          # current R0 / R1 / C1 / tau
+
+    ekf = ECMKalmanFilter.from_ecm(ecm, n_cells=500, soc0=0.8)
+    soc = ekf.update(I_cells, V_cells, dt)   # closed-loop SOC per cell
+
+    dual = DualSOCCapacityEstimator.from_ecm(ecm, n_cells=500)
+    dual.update(I_cells, V_cells, dt); dual.soh   # capacity / rated
+
+    sop = ekf.state_of_power(horizons=(2, 10, 30))
+    sop["P_discharge_W"]                  # (500, 3) W, peak power per cell
+
+Every stateful class also has state_of_power() (ecm_predict), so the
+2/10/30 s power limits follow the live state.
+"""
+
+import math
+
+import numpy as np
+
+from ecm_predict import state_of_power
+from thevenin_ecm import NASA_Q_NOMINAL
+
+
+_DT_MIN = 1e-6        # s — same clip as the offline ZOH kernels
+_RLS_FORGETTING = 0.999
+_RLS_P0         = 1e2     # initial covariance scale (weak prior)
+
+_EKF_SOC_STD0   = 0.1     # initial SOC uncertainty
+_EKF_Q_SOC      = 1e-10   # SOC process noise per second
+_EKF_Q_VRC      = 1e-8    # V_RC process noise per step [V²]
+_EKF_R_V        = 1e-4    # measurement noise [V²] (10 mV std)
+
+_CAP_STD0       = 0.2     # initial std of Q_rated/Q
+_CAP_Q          = 1e-12   # its process noise per second (capacity fades slowly)
+
+
+def _horner(coef, x, out, dout):
+    """
+    OCV and dOCV/dSOC for per-cell polynomials, in place.
+    ``coef`` is (deg+1, n_cells), highest power first.
+    """
+    out[:]  = coef[0]
+    dout[:] = 0.0
+    for c in coef[1:]:
+        dout *= x
+        dout += out
+        out  *= x
+        out  += c
+    return out, dout
+
+
+class ECMStepper:
+    """
+    Stateful ZOH stepper for an n-RC Thevenin model, optionally per cell.
+
+    Parameters
+    ----------
+    R0 : float or array (n_cells,)            Ohmic resistance [Ω]
+    branches : list of (R, C)                 RC pairs; R and C may be
+                                              float or array (n_cells,)
+    ocv_poly : array (deg+1,) or (n_cells, deg+1)
+                                              OCV(SOC) polynomial,
+                                              highest power first
+    Q_nominal_Ah : float or array (n_cells,)  Capacity used for SOC
+    soc0 : float or array (n_cells,)          Initial SOC
+    n_cells : int                             Number of cells stepped
+                                              together
+    """
+
+    def __init__(self, R0, branches, ocv_poly, Q_nominal_Ah=NASA_Q_NOMINAL,
+                 soc0=1.0, n_cells=1):
+        if n_cells < 1:
+            raise ValueError("n_cells must be >= 1.")
+        if not branches:
+            raise ValueError("At least one RC branch is required.")
+        n = int(n_cells)
+        vec = lambda v: np.array(np.broadcast_to(np.asarray(v, dtype=float), (n,)))
+
+        self.n_cells = n
+        self.R0   = vec(R0)
+        self.R    = np.array([vec(R) for R, _ in branches])          # (n_rc, n)
+        self.tau  = self.R * np.array([vec(C) for _, C in branches])
+        self.Q_As = vec(Q_nominal_Ah) * 3600.0
+        coef = np.asarray(ocv_poly, dtype=float)
+        self.ocv_coef = np.array(np.broadcast_to(coef, (n, coef.shape[-1])).T)
+
+        # State
+        self.soc    = np.empty(n)
+        self.v_rc   = np.empty_like(self.R)
+        self.i_prev = np.empty(n)
+
+        # Scratch buffers reused by step_many()
+        self._a   = np.empty_like(self.R)
+        self._b   = np.empty_like(self.R)
+        self._x   = np.empty(n)
+        self._v   = np.empty(n)
+        self.reset(soc0)
+
+    @classmethod
+    def from_ecm(cls, ecm, n_cells=1, Q_nominal_Ah=NASA_Q_NOMINAL, soc0=1.0):
+        """Stepper from a fitted TheveninECM (or subclass)."""
+        if not getattr(ecm, "_fitted", False) or ecm._ocv_poly is None:
+            raise ValueError("ECM has not been fitted — call run() first.")
+        return cls(ecm.R0, ecm.branches, ecm._ocv_poly,
+                   Q_nominal_Ah=Q_nominal_Ah, soc0=soc0, n_cells=n_cells)
+
+    def reset(self, soc0=1.0, v_rc0=0.0):
+        """Restore the initial state (relaxed cell, no previous current)."""
+        self.soc[:]    = soc0
+        self.v_rc[:]   = v_rc0
+        self.i_prev[:] = 0.0
+
+    # ── Stepping ──────────────────────────────────────────────────────────────
+
+    def step(self, current, dt):
+        """
+        Advance cell 0 by one sample and return its terminal voltage.
+
+        Plain float arithmetic — no numpy temporaries. ``dt`` is the time
+        since the previous sample (0 for the first one).
+        """
+        dt     = max(float(dt), _DT_MIN)
+        i_prev = self.i_prev[0]
+        soc    = self.soc[0] + 0.5 * (i_prev + current) * dt / self.Q_As[0]
+        soc    = 0.0 if soc < 0.0 else 1.0 if soc > 1.0 else soc
+        self.soc[0]    = soc
+        self.i_prev[0] = current
+
+        v = 0.0
+        for c in self.ocv_coef[:, 0]:
+            v = v * soc + c
+        v += self.R0[0] * current
+        for j in range(self.R.shape[0]):
+            alpha = math.exp(-dt / self.tau[j, 0])
+            v_rc  = alpha * self.v_rc[j, 0] + self.R[j, 0] * (1.0 - alpha) * i_prev
+            self.v_rc[j, 0] = v_rc
+            v += v_rc
+        return v
+
+    def step_chunk(self, current, dt, out=None):
+        """
+        Advance cell 0 through a short chunk of samples.
+
+        ``current`` and ``dt`` are 1-D arrays of equal length (``dt`` may be
+        a scalar); the predicted voltages are written to ``out`` if given.
+        """
+        current = np.asarray(current, dtype=float)
+        dt      = np.broadcast_to(np.asarray(dt, dtype=float), current.shape)
+        if out is None:
+            out = np.empty(current.shape)
+        for k in range(len(current)):
+            out[k] = self.step(current[k], dt[k])
+        return out
+
+    def step_many(self, current, dt, out=None):
+        """
+        Advance every cell by one sample.
+
+        Parameters
+        ----------
+        current : array (n_cells,)        Cell currents [A]
+        dt : float or array (n_cells,)    Time since the previous sample
+        out : array (n_cells,)            Optional output buffer
+
+        Returns
+        -------
+        Terminal voltages, shape (n_cells,). Without ``out`` the returned
+        array is an internal buffer overwritten by the next call.
+        """
+        x, a, b = self._x, self._a, self._b
+        dt = np.maximum(dt, _DT_MIN, out=self._v)
+
+        # SOC (trapezoidal coulomb count, clipped like the offline path)
+        np.add(self.i_prev, current, out=x)
+        x *= dt
+        x *= 0.5
+        x /= self.Q_As
+        self.soc += x
+        np.clip(self.soc, 0.0, 1.0, out=self.soc)
+
+        # RC branches: v_rc = α·v_rc + R·(1-α)·I_prev
+        np.divide(dt, self.tau, out=a)
+        np.negative(a, out=a)
+        np.exp(a, out=a)
+        np.subtract(1.0, a, out=b)
+        b *= self.R
+        b *= self.i_prev
+        self.v_rc *= a
+        self.v_rc += b
+        self.i_prev[:] = current
+
+        # V = OCV(SOC) + R0·I + Σ v_rc   (Horner in place)
+        v = self._v if out is None else out
+        v[:] = self.ocv_coef[0]
+        for c in self.ocv_coef[1:]:
+            v *= self.soc
+            v += c
+        np.multiply(self.R0, current, out=x)
+        v += x
+        for row in self.v_rc:
+            v += row
+        return v
+
+    def state_of_power(self, **kwargs):
+        """
+        Peak discharge / charge power of every cell from its current
+        state; see ecm_predict.state_of_power for the keyword arguments
+        (horizons, voltage / current / SOC limits) and the returned dict.
+        """
+        return state_of_power(self.R0, list(zip(self.R, self.tau / self.R)),
+                              self.ocv_coef.T, Q_nominal_Ah=self.Q_As / 3600.0,
+                              soc=self.soc, v_rc=self.v_rc, **kwargs)
+
+
+class OnlineRLS:
+    """
+    Recursive least-squares tracking of 1-RC parameters.
+
+    With y = V - OCV(SOC) the ZOH model is the ARX(1,1) recursion
+
+        y[k] = a·y[k-1] + b0·I[k] + b1·I[k-1]
+        a = exp(-dt/tau),  b0 = R0,  b1 = R1·(1-a) - a·R0
+
+    which RLS updates in O(1) per sample. The physical parameters are
+    recovered with the (exponentially weighted) mean sample interval, so
+    telemetry should be roughly uniformly sampled. Identifiability needs
+    current excitation: under constant current R0 and R1 are confounded
+    and the estimates simply hold their last value.
+
+    Parameters
+    ----------
+    ocv_poly : array           OCV(SOC) polynomial, highest power first
+    R0, R1, tau : float        Initial estimates [Ω, Ω, s]
+    Q_nominal_Ah : float       Capacity for the internal SOC count
+    soc0 : float               Initial SOC
+    forgetting : float         λ in (0, 1]; effective memory ≈ 1/(1-λ)
+                               samples
+    """
+
+    def __init__(self, ocv_poly, R0=0.08, R1=0.02, tau=20.0,
+                 Q_nominal_Ah=NASA_Q_NOMINAL, soc0=1.0,
+                 forgetting=_RLS_FORGETTING):
+        if not 0.0 < forgetting <= 1.0:
+            raise ValueError("forgetting must be in (0, 1].")
+        self.ocv_poly   = np.asarray(ocv_poly, dtype=float)
+        self.Q_As       = float(Q_nominal_Ah) * 3600.0
+        self.forgetting = float(forgetting)
+        self._init      = (float(R0), float(R1), float(tau), float(soc0))
+
+        self.theta = np.empty(3)       # [a, b0, b1]
+        self.P     = np.empty((3, 3))
+        self._phi  = np.empty(3)
+        self._Pphi = np.empty(3)
+        self._PP   = np.empty((3, 3))
+        self.reset()
+
+    @classmethod
+    def from_ecm(cls, ecm, Q_nominal_Ah=NASA_Q_NOMINAL, soc0=1.0,
+                 forgetting=_RLS_FORGETTING):
+        """Estimator seeded with a fitted TheveninECM's parameters and OCV."""
+        if not getattr(ecm, "_fitted", False) or ecm._ocv_poly is None:
+            raise ValueError("ECM has not been fitted — call run() first.")
+        return cls(ecm._ocv_poly, R0=ecm.R0, R1=ecm.R1, tau=ecm.tau,
+                   Q_nominal_Ah=Q_nominal_Ah, soc0=soc0, forgetting=forgetting)
+
+    def reset(self):
+        """Return to the initial estimates with a fresh covariance."""
+        R0, R1, tau, soc0 = self._init
+        self.R0, self.R1, self.tau = R0, R1, tau
+        self.soc     = soc0
+        self.dt_mean = None
+        self.n_updates = 0
+        self._y_prev = None
+        self._i_prev = 0.0
+        self.P[:]    = np.eye(3) * _RLS_P0
+        self.theta[:] = 0.0           # set from R0/R1/tau on the first update
+
+    @property
+    def C1(self):
+        return self.tau / self.R1 if self.R1 > 0 else float("nan")
+
+    def params(self):
+        """Current estimates in the TheveninECM params-dict layout."""
+        return {
+            "R0_ohm": round(self.R0, 6),
+            "R1_ohm": round(self.R1, 6),
+            "C1_F":   round(self.C1, 4),
+            "tau_s":  round(self.tau, 4),
+        }
+
+    def update(self, current, voltage, dt):
+        """
+        Fold one sample into the estimate.
+
+        ``dt`` is the time since the previous sample (ignored on the first
+        call). Returns the one-step-ahead voltage prediction error [V]
+        before the update.
+        """
+        dt  = max(float(dt), _DT_MIN)
+        soc = self.soc + 0.5 * (self._i_prev + current) * dt / self.Q_As
+        self.soc = min(max(soc, 0.0), 1.0)
+        y = voltage - np.polyval(self.ocv_poly, self.soc)
+
+        if self._y_prev is None:                 # first sample: no regressor
+            self._y_prev, self._i_prev = y, current
+            return 0.0
+
+        lam = self.forgetting
+        self.dt_mean = dt if self.dt_mean is None else lam * self.dt_mean + (1 - lam) * dt
+        if self.n_updates == 0:
+            a = math.exp(-self.dt_mean / self.tau)
+            self.theta[:] = (a, self.R0, self.R1 * (1.0 - a) - a * self.R0)
+
+        phi, Pphi, P = self._phi, self._Pphi, self.P
+        phi[:] = (self._y_prev, current, self._i_prev)
+        err = y - float(self.theta @ phi)
+
+        np.dot(P, phi, out=Pphi)
+        gain_den = lam + float(phi @ Pphi)
+        self.theta += Pphi * (err / gain_den)
+        P -= np.outer(Pphi, Pphi, out=self._PP) / gain_den
+        P /= lam
+
+        self._y_prev, self._i_prev = y, current
+        self.n_updates += 1
+        self._extract()
+        return err
+
+    def _extract(self):
+        """Map [a, b0, b1] back to R0, R1, tau (kept if not physical)."""
+        a, b0, b1 = self.theta
+        if not 0.0 < a < 1.0 or b0 <= 0.0:
+            return
+        R1 = (b1 + a * b0) / (1.0 - a)
+        if R1 <= 0.0:
+            return
+        self.R0, self.R1, self.tau = float(b0), float(R1), -self.dt_mean / math.log(a)
+
+
+class ECMKalmanFilter:
+    """
+    Extended Kalman filter for SOC and V_RC across a fleet of cells.
+
+    State per cell: x = [SOC, V_RC1, ..., V_RCn]  → array (n_cells, 1+n_rc)
+    Covariance:     P                              → array (n_cells, 1+n_rc, 1+n_rc)
+
+    Predict uses the same ZOH transition as ECMStepper (trapezoidal
+    coulomb count, exact RC decay); the update linearises the calibrated
+    OCV polynomial, H = [dOCV/dSOC, 1, ..., 1]. Since the measurement is
+    scalar per cell, the gain needs no matrix inverse and every step is a
+    handful of broadcast operations over the cell axis.
+
+    Parameters
+    ----------
+    R0, branches, ocv_poly, Q_nominal_Ah, n_cells
+                            As for ECMStepper
+    soc0 : float or array   Initial SOC guess
+    soc_std0 : float        Initial SOC standard deviation
+    q_soc : float           SOC process noise variance per second
+    q_vrc : float           V_RC process noise variance per step [V²]
+    r_v : float             Voltage measurement noise variance [V²]
+    """
+
+    _n_extra = 0            # states appended after the RC voltages
+
+    def __init__(self, R0, branches, ocv_poly, Q_nominal_Ah=NASA_Q_NOMINAL,
+                 soc0=1.0, n_cells=1, soc_std0=_EKF_SOC_STD0,
+                 q_soc=_EKF_Q_SOC, q_vrc=_EKF_Q_VRC, r_v=_EKF_R_V):
+        model = ECMStepper(R0, branches, ocv_poly, Q_nominal_Ah=Q_nominal_Ah,
+                           n_cells=n_cells)
+        self.n_cells  = model.n_cells
+        self.R0       = model.R0
+        self.R        = model.R.T.copy()                     # (n, n_rc)
+        self.tau      = model.tau.T.copy()
+        self.Q_As     = model.Q_As
+        self.ocv_coef = model.ocv_coef
+        self.q_soc, self.q_vrc, self.r_v = float(q_soc), float(q_vrc), float(r_v)
+        self._init    = (soc0, float(soc_std0))
+
+        n_rc = self.R.shape[1]
+        n, m = self.n_cells, 1 + n_rc + self._n_extra
+        self._rc    = slice(1, 1 + n_rc)
+        self._diag  = np.arange(m)
+        self.x      = np.empty((n, m))
+        self.P      = np.empty((n, m, m))
+        self.i_prev = np.empty(n)
+        self._ocv   = np.empty(n)
+        self._docv  = np.empty(n)
+        self.reset()
+
+    @classmethod
+    def from_ecm(cls, ecm, n_cells=1, Q_nominal_Ah=NASA_Q_NOMINAL, soc0=1.0,
+                 **kwargs):
+        """Filter built on a fitted TheveninECM's parameters and OCV."""
+        if not getattr(ecm, "_fitted", False) or ecm._ocv_poly is None:
+            raise ValueError("ECM has not been fitted — call run() first.")
+        return cls(ecm.R0, ecm.branches, ecm._ocv_poly, Q_nominal_Ah=Q_nominal_Ah,
+                   soc0=soc0, n_cells=n_cells, **kwargs)
+
+    def reset(self):
+        soc0, soc_std0 = self._init
+        self.x[:]       = 0.0
+        self.x[:, 0]    = soc0
+        self.P[:]       = 0.0
+        self.P[:, 0, 0] = soc_std0 ** 2
+        rc = self._diag[self._rc]
+        self.P[:, rc, rc] = self.r_v
+        self.i_prev[:] = 0.0
+
+    @property
+    def soc(self):
+        return self.x[:, 0]
+
+    @property
+    def soc_std(self):
+        return np.sqrt(self.P[:, 0, 0])
+
+    @property
+    def v_rc(self):
+        return self.x[:, self._rc]
+
+    def predict(self, current, dt):
+        """Time update over ``dt`` seconds ending at current ``current``."""
+        current = np.broadcast_to(np.asarray(current, dtype=float), self.i_prev.shape)
+        dt      = np.broadcast_to(np.maximum(np.asarray(dt, dtype=float), _DT_MIN),
+                                  self.i_prev.shape)
+        charge  = 0.5 * (self.i_prev + current) * dt                 # As
+
+        alpha = np.exp(-dt[:, None] / self.tau)                      # (n, n_rc)
+        self.x[:, 0]      += charge / self.Q_As
+        self.x[:, self._rc] = (alpha * self.x[:, self._rc]
+                               + self.R * (1.0 - alpha) * self.i_prev[:, None])
+        np.clip(self.x[:, 0], 0.0, 1.0, out=self.x[:, 0])
+        self.i_prev[:] = current
+
+        # P = F P F' + Q
+        F = self._transition(alpha, charge)
+        self.P = F @ self.P @ F.transpose(0, 2, 1)
+        rc = self._diag[self._rc]
+        self.P[:, 0, 0]   += self.q_soc * dt
+        self.P[:, rc, rc] += self.q_vrc
+
+    def _transition(self, alpha, charge):
+        """State Jacobian F, shape (n_cells, m, m)."""
+        F = np.zeros_like(self.P)
+        d = self._diag
+        F[:, d, d] = 1.0
+        F[:, d[self._rc], d[self._rc]] = alpha
+        return F
+
+    def correct(self, voltage):
+        """Measurement update with terminal voltages (n_cells,). Returns the innovations."""
+        ocv, docv = _horner(self.ocv_coef, self.x[:, 0], self._ocv, self._docv)
+        v_pred = ocv + self.R0 * self.i_prev + self.x[:, self._rc].sum(axis=1)
+        innov  = np.asarray(voltage, dtype=float) - v_pred
+
+        H = np.zeros_like(self.x)
+        H[:, 0] = docv
+        H[:, self._rc] = 1.0
+        PH = np.einsum("nij,nj->ni", self.P, H)
+        S  = np.einsum("ni,ni->n", H, PH) + self.r_v
+        K  = PH / S[:, None]
+        self.x += K * innov[:, None]
+        # (I - K H) P written as P - K S K' to keep P symmetric
+        self.P -= S[:, None, None] * K[:, :, None] * K[:, None, :]
+        np.clip(self.x[:, 0], 0.0, 1.0, out=self.x[:, 0])
+        return innov
+
+    def update(self, current, voltage, dt):
+        """
+        One predict + correct step for every cell.
+
+        Parameters
+        ----------
+        current : array (n_cells,)        Cell currents [A]
+        voltage : array (n_cells,)        Measured terminal voltages [V]
+        dt : float or array (n_cells,)    Time since the previous sample
+
+        Returns
+        -------
+        SOC estimates, shape (n_cells,) (a view of the filter state).
+        """
+        self.predict(current, dt)
+        self.correct(voltage)
+        return self.soc
+
+    def state_of_power(self, **kwargs):
+        """
+        Peak discharge / charge power of every cell from the filtered
+        state (and, for DualSOCCapacityEstimator, the estimated capacity);
+        see ecm_predict.state_of_power.
+        """
+        return state_of_power(self.R0, list(zip(self.R.T, (self.tau / self.R).T)),
+                              self.ocv_coef.T, Q_nominal_Ah=self.Q_As / 3600.0,
+                              soc=self.soc, v_rc=self.v_rc.T, **kwargs)
+
+
+class DualSOCCapacityEstimator(ECMKalmanFilter):
+    """
+    SOC and effective capacity estimated together, per cell.
+
+    The EKF state is augmented with z = Q_rated / Q (≈ 1/SOH), a slow
+    random walk that scales the coulomb count:
+
+        SOC[k] = SOC[k-1] + z · ∫I dt / Q_rated,   ∂SOC/∂z = ∫I dt / Q_rated
+
+    The cross term in F lets every voltage innovation that moves SOC also
+    move capacity, weighted by their accumulated covariance, so capacity
+    is learned whenever the current excites the OCV curve and is simply
+    held otherwise. Estimating z rather than Q keeps the transition linear
+    in the new state.
+
+    Parameters
+    ----------
+    Q_nominal_Ah : float or array   Rated capacity; initial capacity guess
+                                    and the SOH reference
+    cap_std0 : float                Initial std of z (≈ relative capacity)
+    q_cap : float                   Process noise variance of z per second
+    **kwargs                        Passed to ECMKalmanFilter
+    """
+
+    _n_extra = 1
+
+    def __init__(self, R0, branches, ocv_poly, Q_nominal_Ah=NASA_Q_NOMINAL,
+                 cap_std0=_CAP_STD0, q_cap=_CAP_Q, **kwargs):
+        self.cap_std0 = float(cap_std0)
+        self.q_cap    = float(q_cap)
+        super().__init__(R0, branches, ocv_poly, Q_nominal_Ah=Q_nominal_Ah, **kwargs)
+        self.Q_rated_As = self.Q_As.copy()
+
+    def reset(self):
+        super().reset()
+        self.x[:, -1]     = 1.0
+        self.P[:, -1, -1] = self.cap_std0 ** 2
+        if hasattr(self, "Q_rated_As"):
+            self.Q_As[:] = self.Q_rated_As
+
+    @property
+    def capacity_Ah(self):
+        return self.Q_As / 3600.0
+
+    @property
+    def capacity_std_Ah(self):
+        return np.sqrt(self.P[:, -1, -1]) * self.Q_As / self.x[:, -1] / 3600.0
+
+    @property
+    def soh(self):
+        """Effective capacity / rated capacity, per cell."""
+        return 1.0 / self.x[:, -1]
+
+    def predict(self, current, dt):
+        super().predict(current, dt)
+        self.P[:, -1, -1] += self.q_cap * np.maximum(dt, _DT_MIN)
+
+    def _transition(self, alpha, charge):
+        F = super()._transition(alpha, charge)
+        F[:, 0, -1] = charge / self.Q_rated_As
+        return F
+
+    def correct(self, voltage):
+        innov = super().correct(voltage)
+        np.maximum(self.x[:, -1], 0.1, out=self.x[:, -1])
+        self.Q_As[:] = self.Q_rated_As / self.x[:, -1]
+        return innov
@@ -0,0 +1,364 @@
+"""
+ecm_predict.py  —  AUTOTWIN | Forward predictions from a fitted Thevenin ECM
+===========================================================================
+Answers "how long until cutoff at this load?" from identified parameters
+and a known cell state, for many loads at once:
+
+time_to_cutoff  — seconds until the terminal voltage first reaches
+                  V_cutoff. Constant loads use the closed-form step
+                  response (coarse vectorized scan + bisection on every
+                  load simultaneously); load profiles are simulated in
+                  blocks with the same ZOH recurrence as TheveninECM and
+                  stop as soon as every profile has crossed.
+state_of_power  — peak discharge / charge power (SOP) that can be held
+                  for each horizon (default 2, 10 and 30 s) without
+                  leaving the voltage, current and SOC limits, for every
+                  cell and horizon in one (cells, horizons) solve.
+model_from_result — R0 / branches / OCV polynomial / capacity from a
+                  run() result dict (e.g. one reloaded by the dashboard).
+
+The streaming classes in ecm_online expose state_of_power() on their
+current state.
+
+Sign convention follows the NASA data: discharge current is negative, so
+SOC += I·dt / (3600·Q) and V = OCV(SOC) + R0·I + ΣV_RC.
+
+Usage
+-----
+    from thevenin_ecm import TheveninECM
+    from ecm_predict import time_to_cutoff, model_from_result
+
+    res = TheveninECM().run(df)
+    loads = -np.linspace(0.25, 4.0, 200)               # A, discharge
+    t_cut = time_to_cutoff(loads, **model_from_result(res))   # (200,) s
+
+    # from a live state (ECMKalmanFilter, v_rc is (n_cells, n_rc))
+    t_cut = time_to_cutoff(loads, **model_from_result(res),
+                           soc0=ekf.soc, v_rc0=ekf.v_rc.T)
+
+    # repeating duty cycles, sampled every 1 s
+    t_cut = time_to_cutoff(profiles, **model_from_result(res), dt=1.0)
+
+    sop = state_of_power(**model_from_result(res), soc=[0.9, 0.5, 0.3])
+    sop["P_discharge_W"]                   # (3 cells, 3 horizons) W
+"""
+
+import numpy as np
+from scipy.signal import lfilter
+
+from thevenin_ecm import NASA_Q_NOMINAL
+
+
+NASA_V_CUTOFF = 2.7      # V — discharge cutoff of the NASA B00xx tests
+NASA_V_MAX    = 4.2      # V — charge voltage limit (CC-CV charging)
+
+_TTC_T_MAX  = 24 * 3600.0   # s — loads not at cutoff by then return inf
+_TTC_GRID   = 512           # coarse scan points per constant load
+_TTC_TOL    = 1e-3          # s — bisection bracket width
+_TTC_BLOCK  = 4096          # samples per block of a profile simulation
+
+_SOP_HORIZONS  = (2.0, 10.0, 30.0)   # s
+_SOP_I_DIS_MAX = 4.0                 # A — 2C for the 2 Ah NASA cells
+_SOP_I_CHG_MAX = 1.5                 # A — NASA constant-current charge
+_SOP_NEWTON    = 4                   # Newton steps on the OCV nonlinearity
+
+
+def time_to_cutoff(load, R0, branches, ocv_poly, Q_nominal_Ah=NASA_Q_NOMINAL,
+                   soc0=1.0, v_rc0=None, V_cutoff=NASA_V_CUTOFF, dt=None,
+                   t_max=_TTC_T_MAX, soc_min=0.0):
+    """
+    Time [s] until V_terminal first falls to ``V_cutoff`` for each load.
+
+    The run also ends when SOC reaches ``soc_min``: the cell counts as
+    empty there, so a load that gets there above cutoff returns the time
+    to empty. A per-file OCV polynomial is only valid over the SOC range
+    it was fitted on, which is why model_from_result sets soc_min to the
+    lowest SOC of the identified trace. Loads that reach neither within
+    ``t_max`` (e.g. rest or charge) return inf; a state already at cutoff
+    returns 0.
+
+    Parameters
+    ----------
+    load : array (L,) or (L, T)   Constant currents [A], or current
+                                  profiles sampled every ``dt`` seconds and
+                                  repeated until cutoff
+    R0 : float                    Series resistance [Ω]
+    branches : list of (R, C)     RC branches
+    ocv_poly : array (deg+1,)     OCV(SOC) polynomial, highest power first
+    Q_nominal_Ah : float          Capacity used for SOC
+    soc0 : float or array (L,)    Initial SOC
+    v_rc0 : array (n_rc,) or (n_rc, L)
+                                  Initial RC voltages (default: relaxed)
+    V_cutoff : float              Cutoff voltage [V]
+    dt : float                    Profile sample step [s] (profiles only)
+    t_max : float                 Prediction horizon [s]
+    soc_min : float               SOC at which the cell counts as empty
+
+    Returns
+    -------
+    array (L,) of times in seconds
+    """
+    load = np.asarray(load, dtype=float)
+    if load.ndim not in (1, 2):
+        raise ValueError("load must be (L,) constant currents or (L, T) profiles.")
+    if not branches:
+        raise ValueError("At least one RC branch is required.")
+    L    = load.shape[0]
+    coef = np.asarray(ocv_poly, dtype=float)
+    soc0 = np.broadcast_to(np.asarray(soc0, dtype=float), (L,))
+    v0   = np.zeros((len(branches), L)) if v_rc0 is None else \
+        np.broadcast_to(np.asarray(v_rc0, dtype=float).reshape(len(branches), -1),
+                        (len(branches), L))
+    Q_As = float(Q_nominal_Ah) * 3600.0
+
+    if load.ndim == 1:
+        return _cutoff_constant(load, float(R0), branches, coef, Q_As, soc0, v0,
+                                float(V_cutoff), float(t_max), float(soc_min))
+    if dt is None or dt <= 0:
+        raise ValueError("Profiles need a positive sample step dt.")
+    return _cutoff_profile(load, float(R0), branches, coef, Q_As, soc0, v0,
+                           float(V_cutoff), float(dt), float(t_max), float(soc_min))
+
+
+def state_of_power(R0, branches, ocv_poly, Q_nominal_Ah=NASA_Q_NOMINAL,
+                   soc=1.0, v_rc=None, horizons=_SOP_HORIZONS,
+                   V_min=NASA_V_CUTOFF, V_max=NASA_V_MAX,
+                   I_discharge_max=_SOP_I_DIS_MAX, I_charge_max=_SOP_I_CHG_MAX,
+                   soc_min=0.0, soc_max=1.0):
+    """
+    Peak discharge and charge power over several horizons, per cell.
+
+    For a constant current I held for dt seconds from the state
+    (SOC, V_RC) the terminal voltage at the end of the pulse is
+
+        V(I) = OCV(SOC + I dt/Q) + I (R0 + Σ R (1 - e^(-dt/τ))) + Σ V_RC e^(-dt/τ)
+
+    which is monotone in I. The voltage-limited current solves
+    V(I) = V_min (discharge) or V_max (charge) by Newton's method, started
+    from the solution with OCV linearised at the current SOC; it is then
+    clipped by the current limits and by the charge left before soc_min /
+    soc_max. Power is |I| times V(I) at the end of the pulse (the lowest
+    voltage during a discharge pulse). All cells and horizons are solved
+    together as (n_cells, n_horizons) arrays.
+
+    Parameters
+    ----------
+    R0 : float or array (n_cells,)           Series resistance [Ω]
+    branches : list of (R, C)                RC pairs; float or (n_cells,)
+    ocv_poly : array (deg+1,) or (n_cells, deg+1)
+                                             OCV(SOC) polynomial
+    Q_nominal_Ah : float or array (n_cells,) Capacity used for SOC
+    soc : float or array (n_cells,)          Present SOC
+    v_rc : array (n_rc,) or (n_rc, n_cells)  Present RC voltages
+                                             (default: relaxed)
+    horizons : sequence of float             Pulse lengths [s]
+    V_min, V_max : float                     Voltage limits [V]
+    I_discharge_max, I_charge_max : float    Current magnitude limits [A]
+    soc_min, soc_max : float                 SOC window
+
+    Returns
+    -------
+    dict with "horizons_s" (H,) and (n_cells, H) arrays "P_discharge_W",
+    "P_charge_W" (both >= 0), "I_discharge_A" (<= 0), "I_charge_A" (>= 0),
+    "V_discharge_V", "V_charge_V"
+    """
+    if not branches:
+        raise ValueError("At least one RC branch is required.")
+    horizons = np.asarray(horizons, dtype=float).ravel()
+    if horizons.size == 0 or np.any(horizons <= 0):
+        raise ValueError("horizons must be positive pulse lengths in seconds.")
+    soc = np.atleast_1d(np.asarray(soc, dtype=float))
+    n   = np.broadcast_shapes(soc.shape, np.shape(R0), np.shape(Q_nominal_Ah),
+                              np.shape(ocv_poly)[:-1],
+                              *(np.shape(R) for R, _ in branches))
+    n   = n[0] if n else 1
+    per_cell = lambda v: np.broadcast_to(np.asarray(v, dtype=float), (n,))[:, None]
+
+    soc  = per_cell(soc)
+    Q_As = per_cell(Q_nominal_Ah) * 3600.0
+    coef = np.asarray(ocv_poly, dtype=float)
+    coef = np.broadcast_to(coef, (n, coef.shape[-1]))
+    v_rc = np.zeros((len(branches), n)) if v_rc is None else \
+        np.broadcast_to(np.asarray(v_rc, dtype=float).reshape(len(branches), -1),
+                        (len(branches), n))
+
+    dt     = horizons[None, :]
+    R_dyn  = per_cell(R0) + 0.0 * dt
+    v_free = 0.0 * R_dyn
+    for (R, C), v in zip(branches, v_rc):
+        decay  = np.exp(-dt / (per_cell(R) * per_cell(C)))
+        R_dyn  = R_dyn + per_cell(R) * (1.0 - decay)
+        v_free = v_free + v[:, None] * decay
+
+    def voltage(I):
+        """V(I) and dV/dI at the end of each pulse."""
+        x = np.clip(soc + I * dt / Q_As, 0.0, 1.0)
+        ocv, docv = _ocv_and_slope(coef, x)
+        return ocv + R_dyn * I + v_free, docv * dt / Q_As + R_dyn
+
+    def limit_current(V_lim, lo, hi):
+        ocv, docv = _ocv_and_slope(coef, soc + 0.0 * dt)
+        I = np.clip((V_lim - ocv - v_free) / (R_dyn + docv * dt / Q_As), lo, hi)
+        for _ in range(_SOP_NEWTON):
+            V, dV = voltage(I)
+            I = np.clip(I - (V - V_lim) / np.maximum(dV, 1e-9), lo, hi)
+        return I
+
+    I_dis = limit_current(
+        V_min, -np.minimum(I_discharge_max, np.maximum(soc - soc_min, 0.0) * Q_As / dt), 0.0)
+    I_chg = limit_current(
+        V_max, 0.0, np.minimum(I_charge_max, np.maximum(soc_max - soc, 0.0) * Q_As / dt))
+    V_dis, _ = voltage(I_dis)
+    V_chg, _ = voltage(I_chg)
+    return {
+        "horizons_s":    horizons,
+        "P_discharge_W": -I_dis * V_dis,
+        "P_charge_W":    I_chg * V_chg,
+        "I_discharge_A": I_dis,
+        "I_charge_A":    I_chg,
+        "V_discharge_V": V_dis,
+        "V_charge_V":    V_chg,
+    }
+
+
+def model_from_result(result):
+    """
+    Keyword arguments (R0, branches, ocv_poly, Q_nominal_Ah, soc_min) for
+    time_to_cutoff / state_of_power from a TheveninECM / NRCTheveninECM
+    run() result.
+    """
+    if "ocv_poly" not in result:
+        raise ValueError("Result has no 'ocv_poly' — re-run the ECM identification.")
+    params = result["params"]
+    branches, i = [], 1
+    while f"R{i}_ohm" in params:
+        branches.append((float(params[f"R{i}_ohm"]), float(params[f"C{i}_F"])))
+        i += 1
+    return {
+        "R0":           float(params["R0_ohm"]),
+        "branches":     branches,
+        "ocv_poly":     np.asarray(result["ocv_poly"], dtype=float),
+        "Q_nominal_Ah": float(result.get("Q_nominal_Ah", NASA_Q_NOMINAL)),
+        "soc_min":      float(np.min(result["soc"])),
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  CUTOFF SEARCH
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _cutoff_constant(I, R0, branches, coef, Q_As, soc0, v0, V_cut, t_max, soc_min):
+    """
+    Constant loads: V(t) is known in closed form (_step_voltage), so every
+    load is scanned on its own coarse grid in one (L, G) array and the
+    first bracketing interval is bisected for all loads at once.
+    """
+    with np.errstate(divide="ignore"):
+        t_empty = np.where(I < 0.0, np.maximum(soc0 - soc_min, 0.0) * Q_As / -I, np.inf)
+    t_end = np.minimum(t_empty, t_max)
+    out   = np.where(t_empty <= t_max, t_empty, np.inf)
+
+    t_grid = np.where(np.isfinite(t_end), t_end, t_max)[:, None] \
+        * np.linspace(0.0, 1.0, _TTC_GRID)
+    below  = _step_voltage(t_grid, I[:, None], R0, branches, coef, Q_As,
+                           soc0[:, None], v0[:, :, None]) <= V_cut
+    k = np.argmax(below, axis=1)
+    crossed = below[np.arange(len(I)), k]
+    out[crossed & (k == 0)] = 0.0
+
+    rows = np.flatnonzero(crossed & (k > 0))
+    if rows.size:
+        lo, hi = t_grid[rows, k[rows] - 1], t_grid[rows, k[rows]]
+        n_iter = int(np.ceil(np.log2(max(float(np.max(hi - lo)), _TTC_TOL) / _TTC_TOL)))
+        for _ in range(n_iter):
+            mid = 0.5 * (lo + hi)
+            hit = _step_voltage(mid, I[rows], R0, branches, coef, Q_As,
+                                soc0[rows], v0[:, rows]) <= V_cut
+            lo, hi = np.where(hit, lo, mid), np.where(hit, mid, hi)
+        out[rows] = hi
+    return out
+
+
+def _step_voltage(t, I, R0, branches, coef, Q_As, soc0, v0):
+    """
+    Terminal voltage t seconds into a constant load I from (soc0, v0):
+
+        V(t) = OCV(soc0 + I t/Q) + R0 I + Σ [v0 e^(-t/τ) + R I (1 - e^(-t/τ))]
+    """
+    V = np.polyval(coef, np.clip(soc0 + I * t / Q_As, 0.0, 1.0)) + R0 * I
+    for (R, C), v in zip(branches, v0):
+        decay = np.exp(-t / (R * C))
+        V = V + v * decay + R * I * (1.0 - decay)
+    return V
+
+
+def _cutoff_profile(I, R0, branches, coef, Q_As, soc0, v0, V_cut, dt, t_max,
+                    soc_min):
+    """
+    Profiles: simulate blocks of the repeated profile with the ZOH
+    recurrence (one IIR filter per RC branch over the (L, block) array),
+    carrying SOC and RC state between blocks, and stop once every load
+    has crossed. The crossing is interpolated linearly within its step.
+    """
+    L, T  = I.shape
+    block = np.tile(I, (1, max(1, _TTC_BLOCK // T)))
+    n     = block.shape[1]
+    alpha = [np.exp(-dt / (R * C)) for R, C in branches]
+
+    out    = np.full(L, np.inf)
+    active = np.ones(L, dtype=bool)
+    soc    = soc0.copy()                         # SOC at the last sample
+    v_next = np.array(v0, dtype=float)           # V_RC at the next sample
+    i_last = np.zeros(L)
+    v_last = np.full(L, np.inf)                  # V at the previous sample
+    first  = True
+    t0     = 0.0
+    while active.any() and t0 <= t_max:
+        Ib  = block[active]
+        inc = 0.5 * (np.concatenate([i_last[active, None], Ib[:, :-1]], axis=1) + Ib)
+        if first:
+            inc[:, 0] = 0.0
+        s = np.clip(soc[active, None] + np.cumsum(inc, axis=1) * dt / Q_As, 0.0, 1.0)
+        V = np.polyval(coef, s) + R0 * Ib
+        for j, ((R, C), a) in enumerate(zip(branches, alpha)):
+            x = R * (1.0 - a) * np.concatenate([Ib[:, -1:], Ib[:, :-1]], axis=1)
+            x[:, 0] = v_next[j, active]
+            v_rc = lfilter([1.0], [1.0, -a], x, axis=1)
+            V += v_rc
+            v_next[j, active] = a * v_rc[:, -1] + R * (1.0 - a) * Ib[:, -1]
+
+        hit = (V <= V_cut) | (s <= soc_min)
+        k   = np.argmax(hit, axis=1)
+        done = hit[np.arange(len(k)), k]
+        rows = np.flatnonzero(active)[done]
+        if rows.size:
+            kd = k[done]
+            V1 = V[done, kd]
+            V0 = np.where(kd > 0, V[done, np.maximum(kd - 1, 0)], v_last[rows])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                f = np.where((V1 <= V_cut) & np.isfinite(V0) & (V0 > V1),
+                             (V0 - V_cut) / (V0 - V1), 1.0)
+            t_hit = t0 + (kd - 1 + np.clip(f, 0.0, 1.0)) * dt
+            out[rows] = np.maximum(t_hit, 0.0)
+
+        soc[active]    = s[:, -1]
+        i_last[active] = Ib[:, -1]
+        v_last[active] = V[:, -1]
+        active[rows] = False
+        out[out > t_max] = np.inf
+        first = False
+        t0   += n * dt
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  POWER LIMITS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _ocv_and_slope(coef, x):
+    """OCV and dOCV/dSOC for per-cell polynomials ``coef`` (n, deg+1), x (n, H)."""
+    ocv, docv = coef[:, :1] + 0.0 * x, 0.0 * x
+    for j in range(1, coef.shape[1]):
+        docv = docv * x + ocv
+        ocv  = ocv * x + coef[:, j:j + 1]
+    return ocv, docv
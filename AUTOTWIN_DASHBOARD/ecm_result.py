@@ -0,0 +1,164 @@
+"""
+ecm_result.py  —  AUTOTWIN | Compact result of one ECM identification
+======================================================================
+ECMResult is what TheveninECM.run() returns: a slotted record of the
+identified params and the per-sample traces of one fitted cycle.
+
+- traces (time, V_measured, V_simulated, soc, current, temperature) can
+  be held as float32 — half the memory of the float64 arrays, ~1 µV
+  resolution on a 4 V trace — while params, ocv_poly and uncertainty
+  stay at full precision
+- metrics are computed on first access (in float64) and kept
+- the mapping interface (res["params"], res.get("temperature"),
+  "uncertainty" in res, res["_filename"] = ..., dict(res)) matches the
+  result dict of earlier versions; keys outside the record go to
+  ``extras``
+
+Usage
+-----
+    res = TheveninECM(trace_dtype="float32").run(df)
+    res["metrics"]["RMSE_V"]           # computed now, cached from here on
+    res.nbytes                         # bytes held by the traces
+    json.dump(res.to_dict(), f, default=...)
+    res = ECMResult.from_dict(old_result_dict).astype("float32")
+"""
+
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+_TRACES   = ("time", "V_measured", "V_simulated", "soc", "current", "temperature")
+_OPTIONAL = ("ocv_poly", "temperature", "uncertainty")   # keys absent while None
+_KEYS     = ("params", "metrics", "time", "V_measured", "V_simulated", "soc",
+             "current", "Q_nominal_Ah", "ocv_poly", "temperature", "uncertainty")
+
+
+@dataclass(slots=True, eq=False, repr=False)
+class ECMResult(MutableMapping):
+    """
+    Identified params plus the traces of one fitted cycle.
+
+    Parameters
+    ----------
+    params : dict               Identified parameters (and ``<name>_ci``)
+    time, V_measured, V_simulated, soc, current : np.ndarray
+                                Per-sample traces
+    Q_nominal_Ah : float        Capacity used for coulomb counting
+    ocv_poly : np.ndarray or None
+                                OCV(SOC) polynomial coefficients
+    temperature : np.ndarray or None
+                                Measured temperature trace, if any
+    uncertainty : dict or None  run() uncertainty summary
+    extras : dict               Any other keys set through the mapping
+                                interface (e.g. ``_filename``)
+    """
+
+    params:       dict
+    time:         np.ndarray
+    V_measured:   np.ndarray
+    V_simulated:  np.ndarray
+    soc:          np.ndarray
+    current:      np.ndarray
+    Q_nominal_Ah: float
+    ocv_poly:     np.ndarray = None
+    temperature:  np.ndarray = None
+    uncertainty:  dict = None
+    extras:       dict = field(default_factory=dict)
+    _metrics:     dict = field(default=None, init=False)
+
+    @classmethod
+    def from_dict(cls, result):
+        """Build from a run() result mapping; a stored "metrics" is reused."""
+        result = dict(result)
+        metrics = result.pop("metrics", None)
+        kwargs  = {k: result.pop(k) for k in _KEYS if k in result}
+        out = cls(**kwargs, extras=result)
+        out._metrics = metrics
+        return out
+
+    # ── Precision / size ──────────────────────────────────────────────────────
+
+    def astype(self, dtype):
+        """
+        Copy with every trace cast to ``dtype`` (e.g. "float32"); metrics
+        already computed are carried over rather than recomputed.
+        """
+        out = ECMResult(
+            self.params,
+            *(np.asarray(getattr(self, k), dtype=dtype) for k in _TRACES[:-1]),
+            self.Q_nominal_Ah, self.ocv_poly,
+            None if self.temperature is None
+            else np.asarray(self.temperature, dtype=dtype),
+            self.uncertainty, dict(self.extras),
+        )
+        out._metrics = self._metrics
+        return out
+
+    @property
+    def nbytes(self):
+        """Bytes held by the trace arrays."""
+        return sum(getattr(self, k).nbytes for k in _TRACES
+                   if getattr(self, k) is not None)
+
+    @property
+    def metrics(self):
+        if self._metrics is None:
+            from thevenin_ecm import TheveninECM
+            self._metrics = TheveninECM._compute_metrics(
+                np.asarray(self.V_measured, dtype=float),
+                np.asarray(self.V_simulated, dtype=float))
+        return self._metrics
+
+    def to_dict(self):
+        """Plain dict (the traces are shared, not copied)."""
+        return dict(self)
+
+    # Mapping.__eq__ would compare dict(self) == dict(other) and raise on the
+    # trace arrays; results compare by identity instead
+    __eq__ = object.__eq__
+
+    # ── Mapping interface ─────────────────────────────────────────────────────
+
+    def __getitem__(self, key):
+        if key in _KEYS:
+            value = getattr(self, key)
+            if value is None and key in _OPTIONAL:
+                raise KeyError(key)
+            return value
+        return self.extras[key]
+
+    def __setitem__(self, key, value):
+        if key == "metrics":
+            self._metrics = value
+        elif key in _KEYS:
+            setattr(self, key, value)
+        else:
+            self.extras[key] = value
+
+    def __delitem__(self, key):
+        if key in _OPTIONAL and getattr(self, key) is not None:
+            setattr(self, key, None)
+        elif key in _KEYS:
+            raise KeyError(f"{key!r} is a required ECMResult field.")
+        else:
+            del self.extras[key]
+
+    def __contains__(self, key):
+        if key in _KEYS:
+            return key not in _OPTIONAL or getattr(self, key) is not None
+        return key in self.extras
+
+    def __iter__(self):
+        for k in _KEYS:
+            if k not in _OPTIONAL or getattr(self, k) is not None:
+                yield k
+        yield from self.extras
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return (f"ECMResult(n_samples={len(self.time)}, "
+                f"dtype={np.asarray(self.V_simulated).dtype}, params={self.params})")
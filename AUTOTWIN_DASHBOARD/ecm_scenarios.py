@@ -0,0 +1,363 @@
+"""
+ecm_scenarios.py  —  AUTOTWIN | Load-profile library and batch scenario runner
+==============================================================================
+Evaluates fitted cells against synthetic load profiles instead of the
+recorded NASA CSVs:
+
+Scenario          — one load profile: current [A] or power [W] sampled
+                    every dt seconds (discharge negative, as in the NASA
+                    data)
+constant_current / constant_power / pulse_train / urban_cycle /
+highway_cycle     — profile generators; the drive cycles are synthetic
+                    speed traces pushed through a simple road-load model
+                    and scaled to one cell
+standard_library  — a default set of the above
+run_scenarios     — every scenario x every fitted parameter set through
+                    the vectorized simulators (thevenin_ecm.simulate_fleet
+                    and lumped_thermal.simulate_thermal_fleet), returning
+                    one compact DataFrame row per combination
+
+Power profiles are turned into current by a fixed-point iteration,
+I = P / V(I), on the whole batch at once. Each run stops at the voltage
+cutoff (or when SOC reaches the lowest SOC the fitted OCV covers); the
+summary columns describe the run up to that point.
+
+Usage
+-----
+    from ecm_scenarios import standard_library, urban_cycle, run_scenarios, save_table
+
+    scenarios = standard_library() + [urban_cycle(3600, seed=3)]
+    table = run_scenarios(scenarios, ecm_results, thermal_results)
+    save_table(table, "scenarios.npz")     # or .parquet with pyarrow
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ecm_predict import NASA_V_CUTOFF, model_from_result
+from lumped_thermal import simulate_thermal_fleet
+from thevenin_ecm import NASA_Q_NOMINAL, simulate_fleet
+
+
+_KINDS = ("current", "power")
+
+_POWER_ITERATIONS = 6            # fixed-point steps for power profiles
+_V_NOMINAL        = 3.7          # V — first guess for power -> current
+_RUN_MAX_BYTES    = 256 * 1024 ** 2
+_RUN_TEMPORARIES  = 16           # (runs x samples) arrays alive per block
+
+# Road-load model for the synthetic drive cycles (compact passenger car)
+_VEHICLE_MASS   = 1500.0         # kg
+_ROLLING_COEF   = 0.010
+_DRAG_AREA      = 0.70           # C_d * A  [m²]
+_AIR_DENSITY    = 1.2            # kg/m³
+_REGEN_FRACTION = 0.6            # share of braking power recovered
+_DEFAULT_PEAK_W = 8.0            # W per cell at the cycle's power peak
+
+
+class Scenario:
+    """
+    A load profile on a uniform time grid.
+
+    Parameters
+    ----------
+    name : str          Label used in the result table
+    values : array (T,) Current [A] or power [W]; discharge negative
+    dt : float          Sample step [s]
+    kind : str          "current" or "power"
+    """
+
+    __slots__ = ("name", "values", "dt", "kind")
+
+    def __init__(self, name, values, dt=1.0, kind="current"):
+        if kind not in _KINDS:
+            raise ValueError(f"kind must be one of {_KINDS}, got {kind!r}")
+        if dt <= 0:
+            raise ValueError("dt must be positive.")
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size < 2 or not np.all(np.isfinite(values)):
+            raise ValueError("A scenario needs at least two finite samples.")
+        self.name   = str(name)
+        self.values = values
+        self.dt     = float(dt)
+        self.kind   = kind
+
+    @property
+    def duration(self):
+        return (len(self.values) - 1) * self.dt
+
+    @property
+    def time(self):
+        return np.arange(len(self.values)) * self.dt
+
+    def __repr__(self):
+        return (f"Scenario({self.name!r}, kind={self.kind!r}, "
+                f"n={len(self.values)}, dt={self.dt:g})")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  GENERATORS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def constant_current(current_A, duration_s, dt=1.0, name=None):
+    """Constant current [A] (negative = discharge)."""
+    n = int(round(duration_s / dt)) + 1
+    return Scenario(name or f"CC {current_A:g} A", np.full(n, float(current_A)), dt)
+
+
+def constant_power(power_W, duration_s, dt=1.0, name=None):
+    """Constant power [W] (negative = discharge)."""
+    n = int(round(duration_s / dt)) + 1
+    return Scenario(name or f"CP {power_W:g} W", np.full(n, float(power_W)), dt,
+                    kind="power")
+
+
+def pulse_train(pulse, on_s, off_s, duration_s, rest=0.0, dt=1.0,
+                kind="current", name=None):
+    """``pulse`` for on_s seconds, then ``rest`` for off_s seconds, repeated."""
+    t = np.arange(int(round(duration_s / dt)) + 1) * dt
+    values = np.where(np.mod(t, on_s + off_s) < on_s, float(pulse), float(rest))
+    unit = "A" if kind == "current" else "W"
+    return Scenario(name or f"Pulse {pulse:g} {unit} {on_s:g}/{off_s:g} s",
+                    values, dt, kind=kind)
+
+
+def urban_cycle(duration_s=1800.0, peak_power_W=_DEFAULT_PEAK_W, dt=1.0, seed=0,
+                name=None):
+    """
+    Synthetic stop-and-go city driving as a per-cell power profile.
+
+    Micro-trips: idle, accelerate to 30-50 km/h, cruise, brake to a stop.
+    Braking power is partly recovered (positive, charging).
+    """
+    rng = np.random.default_rng(seed)
+    v, speeds = 0.0, []
+    while len(speeds) * dt <= duration_s:
+        speeds += [0.0] * int(rng.uniform(8.0, 30.0) / dt)
+        v_top = rng.uniform(30.0, 50.0) / 3.6
+        accel = rng.uniform(0.8, 1.5)
+        while v < v_top:
+            v = min(v + accel * dt, v_top)
+            speeds.append(v)
+        for _ in range(int(rng.uniform(10.0, 45.0) / dt)):
+            v = max(v + rng.normal(0.0, 0.15) * dt, 0.5 * v_top)
+            speeds.append(v)
+        decel = rng.uniform(1.0, 2.0)
+        while v > 0.0:
+            v = max(v - decel * dt, 0.0)
+            speeds.append(v)
+    speeds = np.array(speeds[:int(round(duration_s / dt)) + 1])
+    return Scenario(name or f"Urban (seed {seed})",
+                    _cell_power(speeds, dt, peak_power_W), dt, kind="power")
+
+
+def highway_cycle(duration_s=1800.0, peak_power_W=_DEFAULT_PEAK_W, dt=1.0, seed=0,
+                  name=None):
+    """
+    Synthetic motorway driving as a per-cell power profile.
+
+    Accelerate to ~110 km/h, then a mean-reverting random speed with
+    occasional overtaking manoeuvres.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(round(duration_s / dt)) + 1
+    target = 110.0 / 3.6
+    speeds, v, boost = np.empty(n), 0.0, 0.0
+    for k in range(n):
+        if v < 0.8 * target and k * dt < 60.0:
+            v = min(v + 1.2 * dt, target)                 # on-ramp
+        else:
+            if boost <= 0.0 and rng.random() < 0.004 * dt:
+                boost = rng.uniform(8.0, 15.0)            # overtake, s
+            pull = 0.6 if boost > 0.0 else 0.0
+            v += (0.02 * (target - v) + pull) * dt + rng.normal(0.0, 0.1) * np.sqrt(dt)
+            boost -= dt
+        speeds[k] = max(v, 0.0)
+    return Scenario(name or f"Highway (seed {seed})",
+                    _cell_power(speeds, dt, peak_power_W), dt, kind="power")
+
+
+def standard_library(dt=1.0, Q_nominal_Ah=NASA_Q_NOMINAL):
+    """
+    Default scenario set for one cell: 0.5C / 1C / 2C constant current,
+    constant power, a 2C pulse train, and one urban and one highway cycle.
+    """
+    C = float(Q_nominal_Ah)
+    hours = lambda c_rate: 3600.0 / c_rate * 1.2          # past the end of charge
+    return [
+        constant_current(-0.5 * C, hours(0.5), dt),
+        constant_current(-1.0 * C, hours(1.0), dt),
+        constant_current(-2.0 * C, hours(2.0), dt),
+        constant_power(-3.7 * C, hours(1.0), dt),
+        pulse_train(-2.0 * C, 10.0, 30.0, hours(0.5), rest=-0.25 * C, dt=dt),
+        urban_cycle(hours(0.5), dt=dt),
+        highway_cycle(hours(1.0), dt=dt),
+    ]
+
+
+def _cell_power(speed, dt, peak_power_W):
+    """Road-load power for a speed trace, scaled to one cell (discharge < 0)."""
+    accel = np.gradient(speed, dt)
+    force = (_VEHICLE_MASS * accel
+             + _ROLLING_COEF * _VEHICLE_MASS * 9.81 * (speed > 0)
+             + 0.5 * _AIR_DENSITY * _DRAG_AREA * speed ** 2)
+    power = force * speed
+    power = np.where(power < 0.0, _REGEN_FRACTION * power, power)
+    peak  = power.max()
+    return -power * (abs(peak_power_W) / peak) if peak > 0 else np.zeros_like(power)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  RUNNER
+# ─────────────────────────────────────────────────────────────────────────────
+
+def run_scenarios(scenarios, ecm_results, thermal_results=None, soc0=1.0,
+                  V_cutoff=NASA_V_CUTOFF, max_bytes=_RUN_MAX_BYTES):
+    """
+    Simulate every scenario against every fitted parameter set.
+
+    Parameters
+    ----------
+    scenarios : list of Scenario
+    ecm_results : list of dict       TheveninECM / NRCTheveninECM run()
+                                     results (same number of RC branches)
+    thermal_results : list of dict   LumpedThermalModel calibrate() results,
+                                     one per ECM result (optional); the heat
+                                     source uses the ECM's R0
+    soc0 : float or array (n_sets,)  Initial SOC
+    V_cutoff : float                 Discharge cutoff [V]
+    max_bytes : int                  Working-memory budget per block of runs
+
+    Returns
+    -------
+    pd.DataFrame, one row per (scenario, set): scenario, kind, set,
+    cutoff_reached, runtime_s, energy_Wh, charge_Ah, V_min_V, soc_end,
+    T_max_C, T_end_C (NaN without thermal parameters); categorical labels
+    and float32 values.
+    """
+    if not scenarios or not ecm_results:
+        raise ValueError("Need at least one scenario and one parameter set.")
+    if thermal_results is not None and len(thermal_results) != len(ecm_results):
+        raise ValueError("thermal_results must pair one-to-one with ecm_results.")
+
+    models = [model_from_result(r) for r in ecm_results]
+    n_rc = {len(m["branches"]) for m in models}
+    if len(n_rc) != 1:
+        raise ValueError("All ECM parameter sets need the same number of RC branches.")
+    n_sets = len(models)
+    sets = {
+        "R0":      np.array([m["R0"] for m in models]),
+        "R":       np.array([[R for R, _ in m["branches"]] for m in models]).T,
+        "C":       np.array([[C for _, C in m["branches"]] for m in models]).T,
+        "ocv":     np.array([m["ocv_poly"] for m in models]),
+        "Q":       np.array([m["Q_nominal_Ah"] for m in models]),
+        "soc_min": np.array([m["soc_min"] for m in models]),
+        "soc0":    np.broadcast_to(np.asarray(soc0, dtype=float), (n_sets,)),
+    }
+    if thermal_results is not None:
+        sets["C_th"]  = np.array([float(t["C_th"]) for t in thermal_results])
+        sets["hA"]    = np.array([float(t["hA"]) for t in thermal_results])
+        sets["T_amb"] = np.array([float(t["T_amb"]) for t in thermal_results])
+
+    labels = [str(r.get("_filename", i)) for i, r in enumerate(ecm_results)]
+    blocks = []
+    for sc in scenarios:
+        T    = len(sc.values)
+        rows = max(1, int(max_bytes // (_RUN_TEMPORARIES * 8 * T)))
+        for start in range(0, n_sets, rows):
+            idx = np.arange(start, min(start + rows, n_sets))
+            blocks.append(_run_block(sc, idx, [labels[i] for i in idx], sets, V_cutoff))
+
+    table = pd.concat([pd.DataFrame(b) for b in blocks], ignore_index=True)
+    for col in ("scenario", "kind", "set"):
+        table[col] = table[col].astype("category")
+    floats = table.select_dtypes("float64").columns
+    table[floats] = table[floats].astype(np.float32)
+    return table
+
+
+def save_table(table, path):
+    """
+    Write a run_scenarios() table: .parquet through pandas (needs pyarrow
+    or fastparquet), otherwise one compressed .npz member per column,
+    written atomically.
+    """
+    if path.endswith(".parquet"):
+        table.to_parquet(path, index=False)
+        return
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **{
+                c: (table[c].to_numpy(dtype=str) if table[c].dtype.name == "category"
+                    else table[c].to_numpy()) for c in table.columns})
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_table(path):
+    """Read a table written by save_table()."""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    with np.load(path, allow_pickle=False) as npz:
+        table = pd.DataFrame({c: npz[c] for c in npz.files})
+    for col in ("scenario", "kind", "set"):
+        if col in table:
+            table[col] = table[col].astype("category")
+    return table
+
+
+def _run_block(sc, idx, labels, sets, V_cutoff):
+    """One scenario against the parameter sets ``idx`` as one batch."""
+    n, T = len(idx), len(sc.values)
+    t    = sc.time
+    prof = np.broadcast_to(sc.values, (n, T))
+    branches = [(R[idx], C[idx]) for R, C in zip(sets["R"], sets["C"])]
+    sim  = lambda I: simulate_fleet(I, t, sets["R0"][idx], branches, sets["ocv"][idx],
+                                    Q_nominal_Ah=sets["Q"][idx], soc0=sets["soc0"][idx],
+                                    return_soc=True)
+
+    if sc.kind == "current":
+        I = np.array(prof)
+        V, soc = sim(I)
+    else:
+        I = prof / _V_NOMINAL
+        for _ in range(_POWER_ITERATIONS):
+            V, soc = sim(I)
+            I = prof / np.maximum(V, 0.5 * V_cutoff)
+        V, soc = sim(I)
+
+    stop = (V <= V_cutoff) | (soc <= sets["soc_min"][idx, None])
+    reached = stop.any(axis=1)
+    k_end   = np.where(reached, np.argmax(stop, axis=1), T - 1)
+    live    = np.arange(T) <= k_end[:, None]
+    I_live  = np.where(live, I, 0.0)
+
+    row = np.arange(n)
+    out = {
+        "scenario":       [sc.name] * n,
+        "kind":           [sc.kind] * n,
+        "set":            labels,
+        "cutoff_reached": reached,
+        "runtime_s":      t[k_end],
+        "energy_Wh":      -np.sum(V * I_live, axis=1) * sc.dt / 3600.0,
+        "charge_Ah":      -np.sum(I_live, axis=1) * sc.dt / 3600.0,
+        "V_min_V":        np.min(np.where(live, V, np.inf), axis=1),
+        "soc_end":        soc[row, k_end],
+        "T_max_C":        np.full(n, np.nan),
+        "T_end_C":        np.full(n, np.nan),
+    }
+    if "C_th" in sets:
+        temp = simulate_thermal_fleet(I_live, sc.dt, sets["C_th"][idx], sets["hA"][idx],
+                                      sets["R0"][idx], sets["T_amb"][idx])
+        out["T_max_C"] = np.max(np.where(live, temp, -np.inf), axis=1)
+        out["T_end_C"] = temp[row, k_end]
+    return out
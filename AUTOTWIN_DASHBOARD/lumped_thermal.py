@@ -17,20 +17,27 @@ Where:
 Parameter Identification:
     Two-stage: Differential Evolution (global) → L-BFGS-B (local refinement)
     Objective: minimise RMSE(T_predicted, T_measured) on calibration data.
+    strategy="multistart" instead refines Sobol starting points by least
+    squares (multistart.py), stopping once a few starts agree.
 
 Usage
 -----
 from lumped_thermal import LumpedThermalModel
 
-model = LumpedThermalModel()
+model = LumpedThermalModel()          # or LumpedThermalModel(strategy="multistart")
 calib = model.calibrate(df_charge, R_ohm=0.08)
 valid = model.validate(df_valid, calib["C_th"], calib["hA"], R_ohm=0.08)
 """
 
+from functools import partial
+
 import numpy as np
 import pandas as pd
-from scipy.optimize import differential_evolution, minimize
+from scipy.optimize import differential_evolution, least_squares, minimize
 from scipy.integrate import cumulative_trapezoid
+from scipy.signal import lfilter
+
+from multistart import multistart, resolve_workers, worker_map
 
 # ─────────────────────────────────────────────────────────────────────────────
 # CONSTANTS / DEFAULT BOUNDS
@@ -44,6 +51,9 @@ _DEFAULT_R    = 0.08                  # Ω    — fallback internal resistance
 # This is a physical constant — does NOT change with aging
 _C_TH_FIXED   = 62.1               # J/K  — fixed thermal capacitance for NASA 18650
 
+_STRATEGIES   = ("de", "multistart")
+_N_STARTS     = 8                  # Sobol starts of strategy="multistart"
+
 _REQUIRED_THERMAL_COLS = {"Time", "Current_measured", "Temperature_measured"}
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -61,7 +71,12 @@ class LumpedThermalModel:
     3.  simulate(df, C_th, hA, R)  → returns T_predicted array
     """
 
-    def __init__(self):
+    def __init__(self, workers=1, strategy="de", n_starts=_N_STARTS):
+        if strategy not in _STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}; choose from {_STRATEGIES}")
+        self.workers  = resolve_workers(workers)   # int, executor or map-like
+        self.strategy = strategy    # global stage: "de" or "multistart"
+        self.n_starts = n_starts
         self.C_th   = None
         self.hA     = None
         self._fitted = False
@@ -102,20 +117,29 @@ class LumpedThermalModel:
         # Only optimise hA — C_th is fixed to physical value
         bounds_ha = [_C_TH_BOUNDS, _HA_BOUNDS]
 
-        def cost(x):
-            T_pred = self._simulate_core(time, current, T_meas[0],
-                                         x[0], x[1], R_ohm, T_amb)
-            return _rmse(T_meas, T_pred)
+        cost = _ThermalCost(time, current, T_meas, R_ohm, T_amb)
+
+        if self.strategy == "multistart":
+            if verbose:
+                print(f"[Thermal] Multi-start least squares (≤ {self.n_starts} starts) ...")
+            x, rmse, n_run = multistart(partial(_refine_thermal, cost, bounds_ha),
+                                        bounds_ha, self.n_starts, workers=self.workers)
+            if verbose:
+                print(f"[Thermal] Multi-start RMSE = {rmse:.5f} °C ({n_run} starts run)")
+            return self._calibration_result(x, time, current, T_meas, R_ohm, T_amb)
 
         if verbose:
             print("[Thermal] Stage 1 — Differential Evolution (optimising hA) ...")
 
-        de = differential_evolution(
-            cost, bounds_ha,
-            seed=42, maxiter=500, tol=1e-6,
-            popsize=15, mutation=(0.5, 1.5), recombination=0.8,
-            workers=1, polish=False,
-        )
+        parallel = self.workers != 1
+        with worker_map(self.workers) as mapper:
+            de = differential_evolution(
+                cost, bounds_ha,
+                seed=42, maxiter=500, tol=1e-6,
+                popsize=15, mutation=(0.5, 1.5), recombination=0.8,
+                workers=mapper if parallel else 1, polish=False,
+                updating="deferred" if parallel else "immediate",
+            )
 
         if verbose:
             print(f"[Thermal] Stage 1 RMSE = {de.fun:.5f} °C")
@@ -129,23 +153,7 @@ class LumpedThermalModel:
         if verbose:
             print(f"[Thermal] Stage 2 RMSE = {local.fun:.5f} °C")
 
-        self.C_th = float(local.x[0])
-        self.hA   = float(local.x[1])
-        self._fitted = True
-
-        T_pred = self._simulate_core(time, current, T_meas[0],
-                                     self.C_th, self.hA, R_ohm, T_amb)
-
-        return {
-            "C_th":       round(self.C_th, 4),
-            "hA":         round(self.hA,   6),
-            "T_amb":      round(T_amb,     3),
-            "R_ohm":      round(R_ohm,     6),
-            "metrics":    _compute_metrics(T_meas, T_pred),
-            "time":       time,
-            "T_measured": T_meas,
-            "T_predicted":T_pred,
-        }
+        return self._calibration_result(local.x, time, current, T_meas, R_ohm, T_amb)
 
     def validate(self, df: pd.DataFrame,
                  C_th: float, hA: float,
@@ -215,6 +223,26 @@ class LumpedThermalModel:
 
     # ── Internals ───────────────────────────────────────────────────────────
 
+    def _calibration_result(self, x, time, current, T_meas, R_ohm, T_amb) -> dict:
+        """Store fitted (C_th, hA) and build the calibrate() result dict."""
+        self.C_th = float(x[0])
+        self.hA   = float(x[1])
+        self._fitted = True
+
+        T_pred = self._simulate_core(time, current, T_meas[0],
+                                     self.C_th, self.hA, R_ohm, T_amb)
+
+        return {
+            "C_th":       round(self.C_th, 4),
+            "hA":         round(self.hA,   6),
+            "T_amb":      round(T_amb,     3),
+            "R_ohm":      round(R_ohm,     6),
+            "metrics":    _compute_metrics(T_meas, T_pred),
+            "time":       time,
+            "T_measured": T_meas,
+            "T_predicted":T_pred,
+        }
+
     @staticmethod
     def _preprocess(df: pd.DataFrame) -> pd.DataFrame:
         missing = _REQUIRED_THERMAL_COLS - set(df.columns)
@@ -279,6 +307,44 @@ class LumpedThermalModel:
 # UTILITY FUNCTIONS
 # ─────────────────────────────────────────────────────────────────────────────
 
+class _ThermalCost:
+    """
+    Picklable RMSE objective over x = (C_th, hA).
+
+    A module-level callable (rather than a closure) so Differential
+    Evolution can ship it to worker processes when workers != 1.
+    """
+
+    def __init__(self, time, current, T_meas, R_ohm, T_amb):
+        self.time    = time
+        self.current = current
+        self.T_meas  = T_meas
+        self.R_ohm   = R_ohm
+        self.T_amb   = T_amb
+
+    def __call__(self, x):
+        return _rmse(self.T_meas, self.predict(x))
+
+    def predict(self, x):
+        return LumpedThermalModel._simulate_core(
+            self.time, self.current, self.T_meas[0],
+            x[0], x[1], self.R_ohm, self.T_amb)
+
+
+def _refine_thermal(cost: _ThermalCost, bounds, x0) -> tuple:
+    """
+    Least-squares refinement of (C_th, hA) from x0 for multistart();
+    residuals are scaled by 1/sqrt(n) so the returned cost is the RMSE.
+    """
+    scale = 1.0 / np.sqrt(len(cost.time))
+    lo, hi = np.array(bounds, dtype=float).T
+    sol = least_squares(lambda x: (cost.predict(x) - cost.T_meas) * scale,
+                        np.clip(x0, lo, hi), bounds=(lo, hi), method="trf",
+                        x_scale="jac", ftol=1e-12, xtol=1e-12, gtol=1e-12,
+                        max_nfev=200)
+    return sol.x, float(np.sqrt(2.0 * sol.cost))
+
+
 def _rmse(a: np.ndarray, b: np.ndarray) -> float:
     return float(np.sqrt(np.mean((a - b) ** 2)))
 
@@ -302,6 +368,54 @@ def _compute_metrics(T_meas: np.ndarray, T_pred: np.ndarray) -> dict:
     }
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# FLEET SIMULATION
+# ─────────────────────────────────────────────────────────────────────────────
+
+def simulate_thermal_fleet(current: np.ndarray, dt: float,
+                           C_th, hA, R_ohm, T_amb, T0=None) -> np.ndarray:
+    """
+    Forward-simulate many cells on a uniform time step at once.
+
+    Same forward-Euler step as _simulate_core, written for the rise
+    above ambient u = T - T_amb as a linear filter
+
+        u[k] = a*u[k-1] + (dt*R/C_th) * I[k-1]^2,   a = 1 - dt*hA/C_th
+
+    and solved by scipy's lfilter over all cells sharing the same ``a``.
+    The per-sample runaway guards of _simulate_core are left out; they
+    only act for non-physical parameter sets.
+
+    Parameters
+    ----------
+    current : array (n_cells, T)     Current profiles [A]
+    dt      : float                  Sample step [s] (clipped to [1e-6, 600])
+    C_th, hA, R_ohm, T_amb : float or array (n_cells,)
+    T0      : float or array (n_cells,) — initial temperature (default T_amb)
+
+    Returns
+    -------
+    array (n_cells, T) of temperatures [°C]
+    """
+    I = np.atleast_2d(np.asarray(current, dtype=float))
+    n = I.shape[0]
+    per_cell = lambda v: np.broadcast_to(np.asarray(v, dtype=float), (n,))
+    dt    = float(np.clip(dt, 1e-6, 600.0))
+    C_th  = np.maximum(per_cell(C_th), 1e-6)
+    T_amb = per_cell(T_amb)
+    T0    = T_amb if T0 is None else per_cell(T0)
+
+    a = 1.0 - dt * per_cell(hA) / C_th
+    x = np.empty_like(I)
+    x[:, 0]  = T0 - T_amb
+    x[:, 1:] = (dt * per_cell(R_ohm) / C_th)[:, None] * I[:, :-1] ** 2
+    u = np.empty_like(I)
+    for a_g in np.unique(a):
+        rows = a == a_g
+        u[rows] = lfilter([1.0], [1.0, -a_g], x[rows], axis=1)
+    return u + T_amb[:, None]
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # BATCH HELPER  (mirrors batch_run.py style)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -353,9 +467,14 @@ if __name__ == "__main__":
                         help="Validation CSV file(s)")
     parser.add_argument("--R",      type=float, default=_DEFAULT_R,
                         help=f"Internal resistance Ω (default {_DEFAULT_R})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="DE worker processes (-1 = all cores)")
+    parser.add_argument("--strategy", default="de", choices=_STRATEGIES,
+                        help="Global stage: Differential Evolution or Sobol "
+                             "multi-start least squares (default: de)")
     args = parser.parse_args()
 
-    model = LumpedThermalModel()
+    model = LumpedThermalModel(workers=args.workers, strategy=args.strategy)
 
     print("\n" + "=" * 55)
     print(" AUTOTWIN — Lumped Thermal Model | Calibration")
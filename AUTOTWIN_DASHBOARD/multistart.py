@@ -0,0 +1,203 @@
+"""
+multistart.py  —  AUTOTWIN | Parallel multi-start local optimisation
+=====================================================================
+Global search for smooth, low-dimensional fits (ECM and thermal
+parameters) as an alternative to Differential Evolution:
+
+1. quasi-random starting points — a scrambled Sobol sequence over the
+   bounds, log-scaled along dimensions that span a decade or more
+   (resistances, capacitances)
+2. each start refined by the caller's local solver
+3. starts run in order, serially or in a process pool with one start in
+   flight per worker; the remaining starts are dropped once ``n_agree``
+   finished starts reach the best cost and parameter vector found so far
+
+The local solver is any picklable ``refine(x0) -> (x, cost)``, e.g. a
+functools.partial of a least-squares refinement.
+
+resolve_workers / worker_map define the one ``workers`` contract shared
+by the ECM and thermal fits (DE, multi-start, bootstrap): an int (1 =
+serial, -1 = all cores, n = n processes), a concurrent.futures executor,
+or a map-like callable such as ``multiprocessing.Pool(4).map``.
+
+Usage
+-----
+    from multistart import multistart
+    x, cost, n_run = multistart(refine, bounds, n_starts=16, workers=-1)
+
+    with worker_map(workers) as mapper:     # map callable for any form
+        out = list(mapper(task, chunks))
+"""
+
+import itertools
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+
+import numpy as np
+from scipy.stats import qmc
+
+
+_N_STARTS  = 16        # Sobol points (rounded up to a power of two internally)
+_N_AGREE   = 3         # finished starts that must agree before stopping
+_COST_RTOL = 1e-3      # relative cost tolerance for agreement
+_X_TOL     = 1e-2      # distance tolerance in the unit (search) cube
+_SEED      = 42
+_LOG_SPAN  = 10.0      # hi/lo ratio above which a dimension is log-scaled
+
+
+def multistart(refine, bounds, n_starts=_N_STARTS, workers=1, n_agree=_N_AGREE,
+               cost_rtol=_COST_RTOL, x_tol=_X_TOL, seed=_SEED):
+    """
+    Best local optimum over Sobol starts.
+
+    Parameters
+    ----------
+    refine : callable          refine(x0) -> (x, cost); picklable when
+                               workers != 1
+    bounds : list of (lo, hi)  Search box
+    n_starts : int             Maximum number of starts
+    workers : int, executor or map-like
+                               See resolve_workers(); a map-like callable
+                               runs the starts in rounds of one per core
+    n_agree : int              Stop once this many starts (the best one
+                               included) lie within cost_rtol / x_tol of
+                               the best
+    cost_rtol, x_tol : float   Agreement tolerances (x_tol in the unit cube)
+    seed : int                 Sobol scrambling seed
+
+    Returns
+    -------
+    (x_best, cost_best, n_run) — n_run is the number of starts finished
+    """
+    if n_starts < 1 or n_agree < 1:
+        raise ValueError("n_starts and n_agree must be at least 1.")
+    space  = _SearchSpace(bounds)
+    sobol  = qmc.Sobol(len(space.lo), scramble=True, seed=seed)
+    starts = space.to_x(sobol.random_base2(math.ceil(math.log2(n_starts)))[:n_starts])
+    done   = _Agreement(space, n_agree, cost_rtol, x_tol)
+
+    workers = resolve_workers(workers)
+    if workers == 1:
+        for x0 in starts:
+            if done.add(*refine(x0)):
+                break
+        return done.result()
+
+    if not hasattr(workers, "submit") and callable(workers):    # map-like
+        queue = iter(starts)
+        while batch := list(itertools.islice(queue, os.cpu_count() or 1)):
+            if any([done.add(*r) for r in workers(refine, batch)]):
+                break
+        return done.result()
+
+    own = isinstance(workers, int)
+    if own:
+        width, pool = workers, ProcessPoolExecutor(workers)
+    else:                                   # caller's executor schedules
+        width, pool = len(starts), workers
+    queue   = iter(starts)
+    pending = {pool.submit(refine, x0) for x0 in itertools.islice(queue, width)}
+    try:
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            agreed = [done.add(*f.result()) for f in finished]
+            if any(agreed):
+                break
+            pending |= {pool.submit(refine, x0)
+                        for x0 in itertools.islice(queue, len(finished))}
+    finally:
+        for f in pending:
+            f.cancel()
+        if own:
+            pool.shutdown(wait=True, cancel_futures=True)
+    return done.result()
+
+
+def resolve_workers(workers):
+    """
+    Normalise a ``workers`` argument.
+
+    Returns an int (1 = serial, n > 1 processes; -1 becomes the core
+    count), the executor itself (anything with ``submit``) or the map-like
+    callable itself (``f(func, iterable)``, e.g. ``Pool.map``).
+    """
+    if hasattr(workers, "submit") or callable(workers):
+        return workers
+    try:
+        n = int(workers)
+    except (TypeError, ValueError):
+        raise ValueError("workers must be an int, an executor or a "
+                         f"map-like callable, not {workers!r}.") from None
+    if n == -1:
+        n = os.cpu_count() or 1
+    if n < 1:
+        raise ValueError("workers must be positive or -1 (all cores).")
+    return n
+
+
+@contextmanager
+def worker_map(workers):
+    """
+    Map callable for any ``workers`` form: the builtin map when serial,
+    the executor's or caller's map, or the map of a process pool owned
+    for the duration of the block.
+    """
+    workers = resolve_workers(workers)
+    if hasattr(workers, "submit"):
+        yield workers.map
+    elif callable(workers):
+        yield workers
+    elif workers == 1:
+        yield map
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            yield pool.map
+
+
+class _SearchSpace:
+    """Maps the unit cube onto the bounds (log-scaled where the span is wide)."""
+
+    def __init__(self, bounds):
+        lo, hi = np.array(bounds, dtype=float).T
+        if np.any(~np.isfinite(lo) | ~np.isfinite(hi) | (hi <= lo)):
+            raise ValueError("bounds must be finite (lo, hi) pairs with lo < hi.")
+        self.log = (lo > 0) & (hi / np.where(lo > 0, lo, 1.0) >= _LOG_SPAN)
+        self.lo  = np.where(self.log, np.log(np.where(self.log, lo, 1.0)), lo)
+        self.hi  = np.where(self.log, np.log(np.where(self.log, hi, 1.0)), hi)
+
+    def to_x(self, u):
+        z = self.lo + u * (self.hi - self.lo)
+        return np.where(self.log, np.exp(z), z)
+
+    def to_unit(self, x):
+        z = np.where(self.log, np.log(np.maximum(x, 1e-300)), x)
+        return (z - self.lo) / (self.hi - self.lo)
+
+
+class _Agreement:
+    """Tracks finished starts and decides when enough agree with the best."""
+
+    def __init__(self, space, n_agree, cost_rtol, x_tol):
+        self.space, self.n_agree = space, n_agree
+        self.cost_rtol, self.x_tol = cost_rtol, x_tol
+        self.xs, self.costs = [], []
+
+    def add(self, x, cost):
+        """Record one start; True once n_agree of them agree."""
+        self.xs.append(np.asarray(x, dtype=float))
+        self.costs.append(float(cost) if np.isfinite(cost) else np.inf)
+        best  = int(np.argmin(self.costs))
+        if not np.isfinite(self.costs[best]):
+            return False
+        costs = np.array(self.costs)
+        dist  = np.abs(self.space.to_unit(np.array(self.xs))
+                       - self.space.to_unit(self.xs[best])).max(axis=1)
+        close = ((costs <= self.costs[best] * (1.0 + self.cost_rtol) + 1e-15)
+                 & (dist <= self.x_tol))
+        return int(close.sum()) >= self.n_agree
+
+    def result(self):
+        best = int(np.argmin(self.costs))
+        return self.xs[best], self.costs[best], len(self.costs)
@@ -0,0 +1,212 @@
+"""
+ocv_table.py  —  AUTOTWIN | Per-battery monotone OCV-SOC lookup table
+=====================================================================
+TheveninECM normally refits a degree-8 OCV polynomial on every file; the
+fit can be non-monotone and is discarded after each run. OCVTable builds
+the curve once per battery instead:
+
+  1. take the lowest-rate discharge cycles of the battery
+  2. IR-correct them (OCV ≈ V - I·R0_coarse) and bin by coulomb-count SOC
+  3. enforce monotonicity (pool-adjacent-violators on the bin medians)
+  4. interpolate with a shape-preserving PCHIP and tabulate it on a dense
+     uniform SOC grid (the generic LUT shape extends it past the data)
+
+By default each cycle's SOC is normalised by the charge that cycle
+delivered, so aged cycles line up on one curve (a table over
+nominal-capacity SOC cannot follow capacity fade). TheveninECM then
+applies the same normalisation to each file when looking the table up;
+this assumes files discharge to cutoff, as the NASA cycles do.
+
+Unlike the per-file polynomial, a fixed low-rate curve does not absorb
+rate-dependent polarisation into "OCV", so files discharged well above
+the table's rate fit a 1RC model more loosely (consider n_rc >= 2).
+
+Evaluation is then an O(1) index + linear blend per sample. Tables are
+stored as small .npz files (written atomically) so later runs and worker
+processes load the same curve instead of rebuilding it.
+
+Usage
+-----
+    from ocv_table import OCVTable
+    table = OCVTable.load_or_build("B0043_ocv.npz", dfs)   # dfs: cycles
+    ecm   = TheveninECM(ocv_table=table)                  # or the path
+"""
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+from scipy.integrate import cumulative_trapezoid
+from scipy.interpolate import PchipInterpolator
+
+
+_TABLE_POINTS = 1001     # dense uniform SOC grid
+_SOC_BINS     = 101      # bins for the IR-corrected samples
+_LOW_RATE_TOL = 0.10     # cycles within 10% of the lowest median |I| are used
+
+
+class OCVTable:
+    """
+    Monotone OCV(SOC) curve tabulated on a uniform SOC grid.
+
+    Parameters
+    ----------
+    ocv : array (n,)     OCV [V] at SOC = linspace(0, 1, n); must be
+                         non-decreasing
+    normalized : bool    SOC axis is per-cycle delivered charge (True) or
+                         nominal capacity (False)
+    """
+
+    def __init__(self, ocv, normalized=True):
+        ocv = np.asarray(ocv, dtype=float)
+        if ocv.ndim != 1 or len(ocv) < 2:
+            raise ValueError("ocv must be a 1-D array with at least two points.")
+        if np.any(np.diff(ocv) < 0):
+            raise ValueError("OCV table must be non-decreasing in SOC.")
+        self.ocv    = ocv
+        self.normalized = bool(normalized)
+        self._scale = len(ocv) - 1
+        self._slope = np.append(np.diff(ocv), 0.0)
+
+    def __call__(self, soc):
+        """OCV [V] for SOC (any shape), clipped to [0, 1]."""
+        x = np.clip(soc, 0.0, 1.0) * self._scale
+        i = np.minimum(x.astype(np.intp), self._scale)
+        return self.ocv[i] + (x - i) * self._slope[i]
+
+    def derivative(self, soc):
+        """dOCV/dSOC [V per unit SOC] (piecewise constant)."""
+        x = np.clip(soc, 0.0, 1.0) * self._scale
+        i = np.minimum(x.astype(np.intp), self._scale - 1)
+        return self._slope[i] * self._scale
+
+    @property
+    def soc(self):
+        return np.linspace(0.0, 1.0, len(self.ocv))
+
+    @property
+    def digest(self):
+        """Short content hash (used in result-cache keys)."""
+        h = hashlib.sha256(self.ocv.tobytes())
+        h.update(b"n" if self.normalized else b"q")
+        return h.hexdigest()[:16]
+
+    def polyfit(self, degree=8):
+        """Least-squares polynomial of the curve (for polynomial consumers)."""
+        return np.polyfit(self.soc, self.ocv, degree)
+
+    # ── Build ─────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def build(cls, dfs, Q_nominal_Ah=2.0, normalize_soc=True,
+              n_points=_TABLE_POINTS, low_rate_tol=_LOW_RATE_TOL):
+        """
+        Build the table from a battery's discharge cycles.
+
+        Parameters
+        ----------
+        dfs : list of pd.DataFrame    Raw NASA discharge CSVs
+        Q_nominal_Ah : float          Capacity for the coulomb-count SOC
+                                      when normalize_soc is False
+        normalize_soc : bool          SOC per cycle from its own delivered
+                                      charge
+        n_points : int                Size of the dense table
+        low_rate_tol : float          Keep cycles whose median |I| is within
+                                      this fraction of the lowest one
+        """
+        from thevenin_ecm import TheveninECM, _coarse_r0, _SOC_LUT, _OCV_LUT
+
+        helper, cycles = TheveninECM(), []
+        for raw in dfs:
+            try:
+                df = helper._preprocess(raw)
+            except ValueError:
+                continue
+            if df is None or len(df) < 10:
+                continue
+            cycles.append(df)
+        if not cycles:
+            raise ValueError("No usable discharge cycles to build an OCV table from.")
+
+        rate  = np.array([np.median(np.abs(df["Current_measured"].values)) for df in cycles])
+        keep  = rate <= rate.min() * (1.0 + low_rate_tol)
+        soc_s, ocv_s = [], []
+        for df in (c for c, k in zip(cycles, keep) if k):
+            I = df["Current_measured"].values
+            V = df["Voltage_measured"].values
+            t = df["Time"].values
+            out = cumulative_trapezoid(np.abs(I), t, initial=0)
+            Q_As = out[-1] if normalize_soc else Q_nominal_Ah * 3600.0
+            soc = np.clip(1.0 - out / Q_As, 0.0, 1.0)
+            soc_s.append(soc)
+            ocv_s.append(V - I * _coarse_r0(I, V))
+        soc_s, ocv_s = np.concatenate(soc_s), np.concatenate(ocv_s)
+
+        edges = np.linspace(0.0, 1.0, _SOC_BINS + 1)
+        which = np.clip(np.digitize(soc_s, edges) - 1, 0, _SOC_BINS - 1)
+        x, y, w = [], [], []
+        for b in np.unique(which):
+            sel = which == b
+            x.append(np.median(soc_s[sel]))
+            y.append(np.median(ocv_s[sel]))
+            w.append(sel.sum())
+        x, y = np.array(x), _isotonic(np.array(y), np.array(w, dtype=float))
+        if len(x) < 2:
+            raise ValueError("Cycles cover too little SOC for an OCV table.")
+
+        grid  = np.linspace(0.0, 1.0, n_points)
+        table = PchipInterpolator(x, y, extrapolate=False)(grid)
+        lut   = lambda q: np.interp(q, _SOC_LUT, _OCV_LUT)
+        below, above = grid < x[0], grid > x[-1]
+        table[below] = y[0]  + lut(grid[below]) - lut(x[0])
+        table[above] = y[-1] + lut(grid[above]) - lut(x[-1])
+        return cls(np.maximum.accumulate(table), normalized=normalize_soc)
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def save(self, path):
+        """Write the table to ``path`` (.npz) atomically."""
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, ocv=self.ocv, normalized=self.normalized)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as npz:
+            return cls(npz["ocv"], normalized=bool(npz["normalized"]))
+
+    @classmethod
+    def load_or_build(cls, path, dfs, **build_kwargs):
+        """
+        Load ``path`` if it exists, else build from ``dfs`` (a list, or a
+        callable returning one, so files are only read when needed) and
+        save it there.
+        """
+        if os.path.isfile(path):
+            return cls.load(path)
+        table = cls.build(dfs() if callable(dfs) else dfs, **build_kwargs)
+        table.save(path)
+        return table
+
+
+def _isotonic(y, w):
+    """Weighted non-decreasing fit to y (pool adjacent violators)."""
+    vals, wts, counts = [], [], []
+    for v, wt in zip(y, w):
+        vals.append(v); wts.append(wt); counts.append(1)
+        while len(vals) > 1 and vals[-2] > vals[-1]:
+            wt2 = wts[-2] + wts[-1]
+            v2  = (vals[-2] * wts[-2] + vals[-1] * wts[-1]) / wt2
+            c2  = counts[-2] + counts[-1]
+            del vals[-1], wts[-1], counts[-1]
+            vals[-1], wts[-1], counts[-1] = v2, wt2, c2
+    return np.repeat(vals, counts)
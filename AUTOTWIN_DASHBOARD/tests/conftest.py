@@ -0,0 +1,35 @@
+"""
+Shared fixtures for the AUTOTWIN dashboard backend tests.
+
+The backend modules import each other as top-level modules (they are run
+from AUTOTWIN_DASHBOARD/), so that folder is put on sys.path here.
+
+    cd AUTOTWIN_DASHBOARD && python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from thevenin_ecm import TheveninECM  # noqa: E402
+
+
+def _load(name):
+    return TheveninECM.load_csv(os.path.join(ROOT, "Battery43", name))
+
+
+@pytest.fixture(scope="session")
+def discharge_df():
+    """One NASA B0043 discharge cycle."""
+    return _load("00739.csv")
+
+
+@pytest.fixture(scope="session")
+def next_discharge_df():
+    """The B0043 discharge cycle following discharge_df."""
+    return _load("00741.csv")
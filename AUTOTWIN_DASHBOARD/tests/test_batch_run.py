@@ -0,0 +1,18 @@
+"""batch_run.py helpers."""
+
+import numpy as np
+
+from batch_run import _n_rc
+from thevenin_ecm import NRCTheveninECM, SOCMapECM
+
+
+def test_n_rc_ignores_soc_map_keys(discharge_df):
+    res = SOCMapECM(np.linspace(0.0, 1.0, 4), mode="fast",
+                    uncertainty=None).run(discharge_df)
+    assert "C1_map_F" in res["params"]
+    assert _n_rc(res["params"]) == 1
+
+
+def test_n_rc_counts_branches(discharge_df):
+    res = NRCTheveninECM(n_rc=2, mode="fast", uncertainty=None).run(discharge_df)
+    assert _n_rc(res["params"]) == 2
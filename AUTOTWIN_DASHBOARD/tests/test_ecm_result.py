@@ -0,0 +1,75 @@
+"""ECMResult mapping semantics, float32 traces and cache round-trips."""
+
+import pickle
+
+import numpy as np
+import pytest
+
+from ecm_result import ECMResult
+from thevenin_ecm import TheveninECM
+
+
+def _types(obj):
+    """Nested structure of value types (arrays with their dtype)."""
+    if isinstance(obj, np.ndarray):
+        return ("ndarray", obj.dtype.name)
+    if hasattr(obj, "items"):
+        return {k: _types(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_types(v) for v in obj]
+    return type(obj).__name__
+
+
+@pytest.fixture(scope="module")
+def result(discharge_df):
+    return TheveninECM(mode="fast", trace_dtype="float32").run(discharge_df)
+
+
+@pytest.mark.parametrize("kw", [
+    {},
+    {"trace_dtype": "float32"},
+    {"uncertainty": "bootstrap", "n_bootstrap": 20},
+], ids=["float64", "float32", "bootstrap"])
+def test_cache_round_trip_preserves_types(kw, discharge_df, tmp_path):
+    fresh  = TheveninECM(mode="fast", cache=str(tmp_path), **kw).run(discharge_df)
+    cached = TheveninECM(mode="fast", cache=str(tmp_path), **kw).run(discharge_df)
+    assert len(TheveninECM(cache=str(tmp_path)).cache) == 1
+    assert _types(cached) == _types(fresh)
+    np.testing.assert_array_equal(cached["uncertainty"]["cov"], fresh["uncertainty"]["cov"])
+    assert cached["metrics"] == fresh["metrics"]
+
+
+def test_float32_halves_trace_memory(result, discharge_df):
+    full = TheveninECM(mode="fast").run(discharge_df)
+    assert result.nbytes * 2 == full.nbytes
+    assert result["metrics"] == full["metrics"]
+    assert result["V_simulated"].dtype == np.float32
+    assert result["ocv_poly"].dtype == np.float64
+
+
+def test_mapping_semantics(result):
+    res = ECMResult.from_dict(result)
+    assert list(res)[:3] == ["params", "metrics", "time"]
+    assert "temperature" in res and "nope" not in res
+    res["_filename"] = "x.csv"
+    assert res.get("_filename") == "x.csv" and res.extras == {"_filename": "x.csv"}
+    del res["temperature"]
+    assert "temperature" not in res and res.get("temperature") is None
+    with pytest.raises(KeyError):
+        del res["params"]
+    assert dict(res).keys() == set(res)
+    assert not hasattr(res, "__dict__")
+
+
+def test_pickle_round_trip(result):
+    res = pickle.loads(pickle.dumps(result))
+    assert res["metrics"] == result["metrics"]
+    np.testing.assert_array_equal(res["time"], result["time"])
+
+
+def test_equality_is_identity(result):
+    copy = ECMResult.from_dict(result)
+    assert result == result and not result != result
+    assert copy != result and not copy == result        # no elementwise array compare
+    assert result != dict(result)
+    assert result in [copy, result] and [result].index(result) == 0
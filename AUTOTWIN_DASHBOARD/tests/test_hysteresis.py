@@ -0,0 +1,41 @@
+"""HysteresisECM on a synthetic charge / discharge trace with known parameters."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.integrate import cumulative_trapezoid
+
+from thevenin_ecm import (_OCV_LUT, _SOC_LUT, HysteresisECM, _hysteresis_voltage,
+                          _zoh_vectorized)
+
+TRUTH = dict(R0_ohm=0.08, R1_ohm=0.02, C1_F=1000.0, gamma=30.0, M_hyst_V=0.03,
+             M0_hyst_V=0.01)
+
+
+@pytest.fixture(scope="module")
+def trace():
+    """Two rounds of 2 A discharge pulses then 1.5 A charge pulses (0.5 Hz)."""
+    dt, Q_As = 2.0, 7200.0
+    discharge = np.r_[np.full(30, -2.0), np.zeros(30)]
+    charge    = np.r_[np.full(30, 1.5), np.zeros(30)]
+    I = np.concatenate([np.zeros(20)] + 2 * ([discharge] * 24 + [charge] * 24))
+    t = np.arange(len(I)) * dt
+    q = cumulative_trapezoid(I, t, initial=0)
+    soc = 1.0 + (q - q.max()) / Q_As
+    V = (_zoh_vectorized(t, I, np.interp(soc, _SOC_LUT, _OCV_LUT), TRUTH["R0_ohm"],
+                         TRUTH["R1_ohm"], TRUTH["C1_F"])
+         + _hysteresis_voltage(t, I, Q_As, TRUTH["gamma"], TRUTH["M_hyst_V"],
+                               TRUTH["M0_hyst_V"]))
+    V += np.random.default_rng(5).normal(0.0, 1e-3, len(t))
+    return pd.DataFrame({"Time": t, "Current_measured": I, "Voltage_measured": V})
+
+
+def test_recovers_known_parameters(trace):
+    res = HysteresisECM(mode="fast", uncertainty=None).run(trace)
+    p = res["params"]
+    np.testing.assert_allclose(p["R0_ohm"], TRUTH["R0_ohm"], rtol=0.02)
+    np.testing.assert_allclose(p["R1_ohm"], TRUTH["R1_ohm"], rtol=0.05)
+    np.testing.assert_allclose(p["M_hyst_V"], TRUTH["M_hyst_V"], atol=2e-3)
+    np.testing.assert_allclose(p["M0_hyst_V"], TRUTH["M0_hyst_V"], atol=2e-3)
+    np.testing.assert_allclose(p["gamma"], TRUTH["gamma"], rtol=0.2)
+    assert res["metrics"]["RMSE_V"] < 2e-3
@@ -0,0 +1,119 @@
+"""Simulation kernels: prefix scan / IIR filter, vectorized vs loop backend, fleet."""
+
+import numpy as np
+import pytest
+
+from scipy.integrate import cumulative_trapezoid
+
+from thevenin_ecm import (_OCV_LUT, _SOC_LUT, TheveninECM, NRCTheveninECM,
+                          _first_order, _linear_recurrence, _zoh_loop,
+                          _zoh_vectorized, simulate_fleet)
+
+
+def _reference_recurrence(a, b):
+    x, out = 0.0, np.empty(len(b))
+    for k in range(len(b)):
+        x = a[k] * x + b[k]
+        out[k] = x
+    return out
+
+
+def test_linear_recurrence_matches_loop():
+    rng = np.random.default_rng(0)
+    a, b = rng.uniform(0.0, 1.0, 1000), rng.normal(size=1000)
+    np.testing.assert_allclose(_linear_recurrence(a, b), _reference_recurrence(a, b),
+                               rtol=1e-12, atol=1e-12)
+
+
+def test_iir_filter_matches_prefix_scan():
+    rng = np.random.default_rng(1)
+    b = rng.normal(size=(3, 500))
+    alpha = np.array([[0.5], [0.9], [0.999]])
+    scan = _first_order(np.broadcast_to(alpha, (3, 499)), b)
+    np.testing.assert_allclose(_first_order(alpha, b), scan, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(_first_order(0.9, b[1]), scan[1], rtol=1e-10, atol=1e-12)
+
+
+@pytest.mark.parametrize("branches", [(0.02, 900.0), (0.02, 900.0, 0.01, 20000.0)],
+                         ids=["1rc", "2rc"])
+@pytest.mark.parametrize("uniform", [False, True], ids=["measured_dt", "uniform_dt"])
+def test_vectorized_matches_loop(branches, uniform, discharge_df):
+    time    = discharge_df["Time"].values.astype(float)
+    current = discharge_df["Current_measured"].values.astype(float)
+    if uniform:
+        time = np.arange(len(time)) * 10.0
+    ocv_v = np.linspace(4.2, 3.2, len(time))
+    np.testing.assert_allclose(_zoh_vectorized(time, current, ocv_v, 0.08, *branches),
+                               _zoh_loop(time, current, ocv_v, 0.08, *branches),
+                               rtol=0, atol=1e-10)
+
+
+@pytest.mark.parametrize("factory", [TheveninECM, lambda **kw: NRCTheveninECM(n_rc=2, **kw)],
+                         ids=["1rc", "2rc"])
+def test_backends_give_the_same_run(factory, discharge_df):
+    vec  = factory(mode="fast", uncertainty=None).run(discharge_df)
+    loop = factory(mode="fast", uncertainty=None, backend="loop").run(discharge_df)
+    assert vec["params"] == loop["params"]
+    np.testing.assert_allclose(vec["V_simulated"], loop["V_simulated"], atol=1e-9)
+
+
+# ── Fleet simulation ──────────────────────────────────────────────────────────
+
+OCV_POLY = np.polyfit(_SOC_LUT, _OCV_LUT, 8)
+
+
+@pytest.fixture(scope="module")
+def fleet():
+    """Five cells with their own params and ragged pulsed profiles."""
+    rng = np.random.default_rng(2)
+    n = 5
+    lengths = rng.integers(200, 600, n)
+    current = [np.repeat(-rng.uniform(0.5, 3.0, L // 20 + 1), 20)[:L] for L in lengths]
+    time    = [np.cumsum(rng.uniform(0.5, 2.0, L)) for L in lengths]
+    params  = dict(R0=rng.uniform(0.05, 0.1, n),
+                   branches=[(rng.uniform(0.01, 0.03, n), rng.uniform(500, 2000, n)),
+                             (rng.uniform(0.01, 0.02, n), rng.uniform(1e4, 3e4, n))],
+                   Q_nominal_Ah=rng.uniform(1.6, 2.0, n), soc0=rng.uniform(0.8, 1.0, n))
+    return current, time, params
+
+
+def _single_cell(current, time, params, i):
+    """Reference: the single-cell ZOH kernel on one cell of the fleet."""
+    soc = np.clip(params["soc0"][i] + cumulative_trapezoid(current, time, initial=0)
+                  / (3600.0 * params["Q_nominal_Ah"][i]), 0.0, 1.0)
+    rc = [v for R, C in params["branches"] for v in (R[i], C[i])]
+    return _zoh_vectorized(time, current, np.polyval(OCV_POLY, soc),
+                           params["R0"][i], *rc)
+
+
+def test_fleet_matches_single_cell_ragged(fleet):
+    current, time, params = fleet
+    V = simulate_fleet(current, time, ocv_poly=OCV_POLY, **params)
+    assert [len(v) for v in V] == [len(c) for c in current]
+    for i in range(len(current)):
+        np.testing.assert_allclose(V[i], _single_cell(current[i], time[i], params, i),
+                                   atol=1e-10)
+
+
+def test_fleet_matches_single_cell_padded(fleet):
+    current, time, params = fleet
+    lengths = np.array([len(c) for c in current])
+    T = lengths.max()
+    I = np.zeros((len(current), T))
+    for i, c in enumerate(current):
+        I[i, :len(c)] = c
+    V = simulate_fleet(I, np.arange(T) * 1.0, ocv_poly=OCV_POLY, lengths=lengths, **params)
+    assert V.shape == I.shape
+    for i, L in enumerate(lengths):
+        np.testing.assert_allclose(V[i, :L], _single_cell(I[i, :L], np.arange(L) * 1.0,
+                                                          params, i), atol=1e-10)
+        assert np.all(np.isnan(V[i, L:]))
+
+
+def test_fleet_chunking_does_not_change_the_result(fleet):
+    current, time, params = fleet
+    whole   = simulate_fleet(current, time, ocv_poly=OCV_POLY, return_soc=True, **params)
+    chunked = simulate_fleet(current, time, ocv_poly=OCV_POLY, return_soc=True,
+                             max_bytes=1, **params)
+    for a, b in zip(whole[0] + whole[1], chunked[0] + chunked[1]):
+        np.testing.assert_allclose(a, b, rtol=0, atol=1e-12)
@@ -0,0 +1,68 @@
+"""Joint multi-cycle identification on synthetic cycles with known parameters."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from thevenin_ecm import _OCV_LUT, _SOC_LUT, MultiCycleECM, _zoh_vectorized
+
+C1 = 1000.0
+DT = 10.0
+
+
+def _cycle(R0, R1, I, Q_Ah, rng, stop_soc=0.0):
+    """Raw NASA-style discharge: two rest samples, then constant current."""
+    n = int(round((1.0 - stop_soc) * Q_Ah * 3600.0 / abs(I) / DT))
+    t = np.arange(n + 1) * DT
+    Q_As = abs(I) * t[-1] if stop_soc == 0.0 else Q_Ah * 3600.0
+    soc = 1.0 - abs(I) * t / Q_As
+    I_k = np.full(len(t), I)
+    V = _zoh_vectorized(t, I_k, np.interp(soc, _SOC_LUT, _OCV_LUT), R0, R1, C1)
+    rest = np.interp(1.0, _SOC_LUT, _OCV_LUT)
+    return pd.DataFrame({
+        "Time": np.r_[0.0, DT, 2 * DT + t],
+        "Current_measured": np.r_[0.0, 0.0, I_k],
+        "Voltage_measured": np.r_[rest, rest, V] + rng.normal(0.0, 1e-3, len(t) + 2),
+    })
+
+
+@pytest.fixture(scope="module")
+def cycles():
+    rng = np.random.default_rng(4)
+    N  = 8
+    R0 = np.linspace(0.07, 0.09, N)
+    R1 = np.linspace(0.02, 0.03, N)
+    I  = np.where(np.arange(N) % 2, -1.0, -2.0)
+    Q  = np.linspace(2.0, 1.8, N)
+    dfs = [_cycle(R0[c], R1[c], I[c], Q[c], rng) for c in range(N)]
+    dfs[3] = _cycle(R0[3], R1[3], I[3], Q[2], rng, stop_soc=0.4)   # stopped early
+    return dfs, R0, R1
+
+
+def test_recovers_known_parameters(cycles):
+    dfs, R0, R1 = cycles
+    ecm = MultiCycleECM()
+    res = ecm.run(dfs)
+    np.testing.assert_allclose(ecm.R0, R0, rtol=0.02)
+    np.testing.assert_allclose(ecm.R1, R1, rtol=0.05)
+    np.testing.assert_allclose(ecm.C1, C1, rtol=0.05)
+    assert res["metrics"]["RMSE_V"] < 2e-3
+
+
+def test_solution_does_not_depend_on_solver_tolerance(cycles):
+    dfs, _, _ = cycles
+    loose, tight = MultiCycleECM(tol=1e-6), MultiCycleECM(tol=1e-10)
+    loose.run(dfs)
+    tight.run(dfs)
+    np.testing.assert_allclose(loose.R0, tight.R0, rtol=0.01)
+    np.testing.assert_allclose(loose.ocv_table, tight.ocv_table, atol=2e-3)
+
+
+def test_unusable_cycles_are_skipped_with_a_reason(cycles):
+    dfs, _, _ = cycles
+    charge = dfs[0].assign(Current_measured=1.5)
+    res = MultiCycleECM().run([dfs[0], dfs[0].drop(columns="Current_measured"), charge])
+    assert res["cycles"][0] is not None
+    assert res["cycles"][1] is None and res["cycles"][2] is None
+    assert "missing required columns" in res["skipped"][1]
+    assert "Too few discharge samples" in res["skipped"][2]
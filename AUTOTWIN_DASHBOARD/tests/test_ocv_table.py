@@ -0,0 +1,30 @@
+"""OCVTable: monotone fit, and the ocv_poly exported by runs that use it."""
+
+import numpy as np
+import pytest
+
+from ecm_online import ECMStepper
+from ecm_predict import model_from_result
+from ocv_table import OCVTable
+from thevenin_ecm import TheveninECM
+
+
+@pytest.fixture(scope="module")
+def table(discharge_df, next_discharge_df):
+    return OCVTable.build([discharge_df, next_discharge_df])
+
+
+def test_table_is_monotone(table):
+    assert np.all(np.diff(table.ocv) >= 0)
+
+
+def test_exported_poly_matches_fitted_curve(table, next_discharge_df):
+    ecm = TheveninECM(mode="fast", uncertainty=None, ocv_table=table)
+    res = ecm.run(next_discharge_df)
+    soc = res["soc"]
+    assert res["soc"].min() > 0.05            # rescaling actually in effect
+    err = np.polyval(res["ocv_poly"], soc) - ecm.ocv(soc)
+    assert np.sqrt(np.mean(err ** 2)) < 0.015    # degree-8 fit of the knee
+    np.testing.assert_array_equal(model_from_result(res)["ocv_poly"], res["ocv_poly"])
+    np.testing.assert_array_equal(ECMStepper.from_ecm(ecm).ocv_coef[:, 0],
+                                  res["ocv_poly"])
@@ -0,0 +1,76 @@
+"""Streaming estimators on synthetic telemetry from the same ZOH model."""
+
+import numpy as np
+import pytest
+
+from ecm_online import (DualSOCCapacityEstimator, ECMKalmanFilter, ECMStepper,
+                        OnlineRLS)
+from thevenin_ecm import _OCV_LUT, _SOC_LUT, _zoh_vectorized
+
+OCV_POLY = np.polyfit(_SOC_LUT, _OCV_LUT, 8)
+R0, R1, C1 = 0.08, 0.02, 1000.0
+DT = 1.0
+
+
+@pytest.fixture(scope="module")
+def telemetry():
+    """Pulsed discharge (1 Hz): current, true voltage and true SOC."""
+    rng = np.random.default_rng(0)
+    current = np.repeat(-rng.uniform(0.0, 3.0, 100), 30)       # 30 s pulses
+    stepper = ECMStepper(R0, [(R1, C1)], OCV_POLY, soc0=0.95)
+    V, soc = np.empty(len(current)), np.empty(len(current))
+    for k, I in enumerate(current):
+        V[k]   = stepper.step(I, DT)
+        soc[k] = stepper.soc[0]
+    return current, V, soc
+
+
+def test_stepper_matches_batch_kernel(telemetry):
+    current, V, soc = telemetry
+    time = np.arange(len(current)) * DT
+    np.testing.assert_allclose(
+        _zoh_vectorized(time, current, np.polyval(OCV_POLY, soc), R0, R1, C1),
+        V, atol=1e-10)
+
+
+def test_fleet_step_matches_single_cell(telemetry):
+    current, V, _ = telemetry
+    fleet = ECMStepper(R0, [(R1, C1)], OCV_POLY, soc0=0.95, n_cells=3)
+    out = np.array([fleet.step_many(np.full(3, I), DT).copy() for I in current])
+    np.testing.assert_allclose(out, np.repeat(V[:, None], 3, axis=1), atol=1e-12)
+
+
+def test_rls_recovers_parameters(telemetry):
+    current, V, _ = telemetry
+    rls = OnlineRLS(OCV_POLY, R0=0.05, R1=0.05, tau=5.0, soc0=0.95)
+    for I, v in zip(current, V):
+        rls.update(I, v, DT)
+    np.testing.assert_allclose([rls.R0, rls.R1, rls.tau], [R0, R1, R1 * C1], rtol=0.02)
+
+
+def test_ekf_converges_from_wrong_soc(telemetry):
+    current, V, soc = telemetry
+    ekf = ECMKalmanFilter(R0, [(R1, C1)], OCV_POLY, soc0=[0.6, 0.95, 1.0], n_cells=3)
+    for I, v in zip(current, V):
+        ekf.update(np.full(3, I), np.full(3, v), DT)
+    np.testing.assert_allclose(ekf.soc, soc[-1], atol=0.01)
+    assert np.all(ekf.soc_std < 0.05)
+
+
+def test_dual_estimator_recovers_capacity():
+    """Cell at 80 % SOH, filter started from the rated capacity."""
+    rng = np.random.default_rng(1)
+    current = np.repeat(-rng.uniform(0.5, 3.0, 120), 40)
+    cell = ECMStepper(R0, [(R1, C1)], OCV_POLY, Q_nominal_Ah=1.6, soc0=0.95)
+    V = np.array([cell.step(I, DT) for I in current])
+
+    dual = DualSOCCapacityEstimator(R0, [(R1, C1)], OCV_POLY, Q_nominal_Ah=2.0,
+                                    soc0=0.95, n_cells=2)
+    z = np.empty((len(current), 2))
+    for k, (I, v) in enumerate(zip(current, V)):
+        dual.update(np.full(2, I), np.full(2, v), DT)
+        z[k] = dual.x[:, -1]
+    np.testing.assert_allclose(dual.capacity_Ah, 1.6, rtol=0.01)
+    np.testing.assert_allclose(dual.soh, 0.8, rtol=0.01)
+    assert np.all(dual.capacity_std_Ah < 0.05)
+    assert np.all(z > 0.5) and np.all(z < 2.0)        # z = Q_rated / Q
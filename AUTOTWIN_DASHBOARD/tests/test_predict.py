@@ -0,0 +1,46 @@
+"""ecm_predict against brute-force ZOH simulation of the same model."""
+
+import numpy as np
+import pytest
+
+from ecm_predict import state_of_power, time_to_cutoff
+from thevenin_ecm import _OCV_LUT, _SOC_LUT, _zoh_vectorized
+
+OCV_POLY = np.polyfit(_SOC_LUT, _OCV_LUT, 8)
+MODEL    = dict(R0=0.08, branches=[(0.02, 900.0)], ocv_poly=OCV_POLY, Q_nominal_Ah=2.0)
+DT       = 0.5
+
+
+def _simulate(current, soc0=1.0):
+    """Terminal voltage of a sampled current trace (same ZOH model)."""
+    time = np.arange(len(current)) * DT
+    soc  = soc0 + np.concatenate([[0.0], np.cumsum(current[:-1]) * DT]) / 7200.0
+    (R, C), = MODEL["branches"]
+    return _zoh_vectorized(time, current, np.polyval(OCV_POLY, np.clip(soc, 0, 1)),
+                           MODEL["R0"], R, C)
+
+
+@pytest.mark.parametrize("load", [-1.0, -2.0, -4.0])
+def test_constant_load_matches_simulation(load):
+    t_cut = time_to_cutoff([load], **MODEL)[0]
+    V = _simulate(np.full(int(2 * 3600 / DT / abs(load)) + 10, load))
+    t_sim = np.argmax(V <= 2.7) * DT
+    assert abs(t_cut - t_sim) <= DT
+
+
+def test_profile_matches_constant_load():
+    loads = np.array([-1.0, -3.0])
+    t_const = time_to_cutoff(loads, **MODEL)
+    t_prof  = time_to_cutoff(np.repeat(loads[:, None], 4, axis=1), **MODEL, dt=DT)
+    np.testing.assert_allclose(t_prof, t_const, atol=DT)
+
+
+def test_sop_discharge_pulse_ends_at_limits():
+    sop = state_of_power(**MODEL, soc=[0.9, 0.5, 0.2], horizons=[2.0, 10.0])
+    for c, soc0 in enumerate([0.9, 0.5, 0.2]):
+        for h, horizon in enumerate(sop["horizons_s"]):
+            I = sop["I_discharge_A"][c, h]
+            V = _simulate(np.full(int(horizon / DT) + 1, I), soc0)
+            assert V[-1] >= 2.7 - 1e-3
+            assert -4.0 - 1e-9 <= I <= 0.0
+            np.testing.assert_allclose(V[-1], sop["V_discharge_V"][c, h], atol=5e-3)
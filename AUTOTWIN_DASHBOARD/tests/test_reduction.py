@@ -0,0 +1,41 @@
+"""Identification on a reduced trace (resample_dt / decimate_tol)."""
+
+import numpy as np
+import pytest
+
+from thevenin_ecm import TheveninECM
+
+
+def _reduced_size(ecm, df):
+    df  = ecm._preprocess(df)
+    soc = ecm._coulomb_count(df, 2.0)
+    ecm._calibrate_ocv(df, soc)
+    return len(df), len(ecm._identification_samples(df, soc)[0])
+
+
+@pytest.fixture(scope="module")
+def full_fit(discharge_df):
+    return TheveninECM(uncertainty=None).run(discharge_df)
+
+
+@pytest.mark.parametrize("kwargs", [dict(resample_dt=20.0), dict(decimate_tol=0.002)],
+                         ids=["resample", "decimate"])
+def test_reduced_fit_matches_full_fit(kwargs, full_fit, discharge_df):
+    ecm = TheveninECM(uncertainty=None, **kwargs)
+    n_full, n_id = _reduced_size(ecm, discharge_df)
+    assert n_id < n_full / 2
+
+    res = ecm.run(discharge_df)
+    for name in ("R0_ohm", "R1_ohm", "C1_F"):
+        np.testing.assert_allclose(res["params"][name], full_fit["params"][name], rtol=0.2)
+    # Traces and metrics always refer to the full original trace
+    assert len(res["V_simulated"]) == len(full_fit["V_simulated"]) == n_full
+    np.testing.assert_array_equal(res["time"], full_fit["time"])
+    assert res["metrics"]["RMSE_V"] < 1.05 * full_fit["metrics"]["RMSE_V"]
+
+
+@pytest.mark.parametrize("kwargs", [dict(resample_dt=0.0), dict(resample_dt=-1.0),
+                                    dict(resample_dt="median"), dict(decimate_tol=0.0)])
+def test_invalid_reduction_settings_raise(kwargs):
+    with pytest.raises(ValueError):
+        TheveninECM(**kwargs)
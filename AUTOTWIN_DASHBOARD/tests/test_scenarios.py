@@ -0,0 +1,64 @@
+"""Scenario runner: fleet thermal kernel and the compact result table."""
+
+import numpy as np
+import pytest
+
+from ecm_scenarios import (constant_current, load_table, pulse_train, run_scenarios,
+                           save_table, urban_cycle)
+from lumped_thermal import LumpedThermalModel, simulate_thermal_fleet
+from thevenin_ecm import _OCV_LUT, _SOC_LUT
+
+OCV_POLY = np.polyfit(_SOC_LUT, _OCV_LUT, 8)
+
+
+def test_thermal_fleet_matches_single_cell():
+    rng = np.random.default_rng(3)
+    n, T, dt = 4, 500, 2.0
+    current = rng.uniform(-4.0, 0.0, (n, T))
+    C_th, hA = rng.uniform(50, 200, n), rng.uniform(0.05, 0.5, n)
+    R, T_amb, T0 = rng.uniform(0.05, 0.1, n), rng.uniform(20, 30, n), rng.uniform(25, 35, n)
+    temp = simulate_thermal_fleet(current, dt, C_th, hA, R, T_amb, T0)
+    time = np.arange(T) * dt
+    for i in range(n):
+        np.testing.assert_allclose(
+            temp[i], LumpedThermalModel._simulate_core(time, current[i], T0[i], C_th[i],
+                                                       hA[i], R[i], T_amb[i]),
+            rtol=1e-10, atol=1e-10)
+
+
+@pytest.fixture(scope="module")
+def table():
+    ecm = [{"params": {"R0_ohm": R0, "R1_ohm": 0.02, "C1_F": 900.0},
+            "ocv_poly": OCV_POLY, "soc": np.array([0.0, 1.0]), "Q_nominal_Ah": 2.0,
+            "_filename": name} for name, R0 in (("a.csv", 0.06), ("b.csv", 0.1))]
+    thermal = [{"C_th": 100.0, "hA": 0.2, "T_amb": 24.0}] * 2
+    scenarios = [constant_current(-2.0, 5000.0, dt=2.0),
+                 pulse_train(-4.0, 10.0, 30.0, 3000.0, rest=-0.5, dt=2.0),
+                 urban_cycle(1800.0, dt=2.0)]
+    return run_scenarios(scenarios, ecm, thermal, max_bytes=1), scenarios
+
+
+def test_one_row_per_scenario_and_set(table):
+    table, scenarios = table
+    assert len(table) == len(scenarios) * 2
+    assert set(zip(table["scenario"], table["set"])) == {
+        (sc.name, s) for sc in scenarios for s in ("a.csv", "b.csv")}
+    for col in ("scenario", "kind", "set"):
+        assert table[col].dtype.name == "category"
+    floats = table.drop(columns=["scenario", "kind", "set", "cutoff_reached"])
+    assert all(dt == np.float32 for dt in floats.dtypes)
+    assert table["T_max_C"].notna().all()
+    # Higher R0 reaches the cutoff no later on every scenario
+    runtime = table.pivot(index="scenario", columns="set", values="runtime_s")
+    assert np.all(runtime["b.csv"] <= runtime["a.csv"])
+
+
+def test_table_round_trip(table, tmp_path):
+    table, _ = table
+    path = str(tmp_path / "scenarios.npz")
+    save_table(table, path)
+    back = load_table(path)
+    assert list(back.columns) == list(table.columns)
+    for col in table.columns:
+        assert back[col].dtype == table[col].dtype, col
+        np.testing.assert_array_equal(back[col].to_numpy(), table[col].to_numpy())
@@ -0,0 +1,46 @@
+"""Informative-segment selection (segments=True)."""
+
+import numpy as np
+import pytest
+
+from thevenin_ecm import (_SEG_ANCHOR_S, _SEG_PRE_S, _SEG_WINDOW_S, TheveninECM,
+                          _informative_samples)
+
+
+def test_constant_current_fit_matches_full_fit(discharge_df):
+    """The NASA discharge is one constant-current segment: same fit either way."""
+    full = TheveninECM(uncertainty=None).run(discharge_df)
+    seg  = TheveninECM(uncertainty=None, segments=True).run(discharge_df)
+    for name in ("R0_ohm", "R1_ohm", "C1_F"):
+        np.testing.assert_allclose(seg["params"][name], full["params"][name], rtol=0.05)
+    assert len(seg["V_simulated"]) == len(full["V_simulated"])
+    assert seg["metrics"]["RMSE_V"] < 1.01 * full["metrics"]["RMSE_V"]
+
+
+@pytest.mark.parametrize("step_at", [0, 100, 1998, 1999], ids=["first", "middle",
+                                                                "penultimate", "last"])
+def test_step_windows_and_boundaries(step_at):
+    time    = np.arange(2000) * 2.0
+    current = np.where(np.arange(2000) >= step_at, -2.0, -0.5)
+    voltage = 4.0 - 1e-4 * time
+    idx, weight = _informative_samples(time, voltage, current)
+
+    assert idx[0] == 0 and idx[-1] == len(time) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert len(weight) == len(idx)
+    np.testing.assert_allclose(weight.mean(), 1.0)
+    # A weighted mean over the kept samples tracks the full-trace mean
+    sq_err = (1e-3 * np.sin(time / 500.0)) ** 2
+    np.testing.assert_allclose(np.mean(weight * sq_err[idx]), np.mean(sq_err), rtol=0.05)
+    window = np.flatnonzero((time >= time[step_at] - _SEG_PRE_S)
+                            & (time <= time[step_at] + _SEG_WINDOW_S))
+    assert np.isin(window, idx).all()
+    assert np.diff(time[idx]).max() <= _SEG_ANCHOR_S + 2.0
+    assert len(idx) < len(time) / 3
+
+
+def test_short_trace_is_kept_whole():
+    time = np.arange(50) * 1.0
+    idx, weight = _informative_samples(time, np.linspace(4.0, 3.9, 50), np.full(50, -2.0))
+    np.testing.assert_array_equal(idx, np.arange(50))
+    np.testing.assert_allclose(weight, 1.0)
@@ -0,0 +1,47 @@
+"""Confidence intervals: inside the bounds, finite, unidentified entries flagged."""
+
+import json
+
+import numpy as np
+import pytest
+
+from thevenin_ecm import HysteresisECM, NRCTheveninECM, SOCMapECM, TheveninECM
+
+
+@pytest.mark.parametrize("factory", [
+    lambda: TheveninECM(mode="fast"),
+    lambda: NRCTheveninECM(n_rc=2, mode="fast"),
+    lambda: HysteresisECM(mode="fast"),
+    lambda: SOCMapECM(np.linspace(0.0, 1.0, 4), mode="fast"),
+    lambda: TheveninECM(mode="fast", uncertainty="bootstrap", n_bootstrap=20),
+], ids=["jacobian", "2rc", "hysteresis", "soc_map", "bootstrap"])
+def test_intervals_are_bounded_and_flagged(factory, discharge_df):
+    ecm = factory()
+    res = ecm.run(discharge_df)
+    unc = res["uncertainty"]
+    limits = ecm._derived_params(np.array(ecm._vector_bounds(), dtype=float).T)
+    for name in unc["names"]:
+        flagged = [u for u in unc["unidentified"] if u.split("[")[0] == name]
+        ci = res["params"].get(f"{name}_ci")
+        if ci is None:
+            assert flagged == [name]
+            continue
+        pairs = np.array(ci, dtype=float).reshape(-1, 2)
+        value = np.ravel(res["params"][name])
+        known = ~np.isnan(pairs[:, 0])
+        assert len(flagged) == int((~known).sum())
+        assert np.all(pairs[known, 0] > 0)
+        assert np.all(pairs[known, 0] <= pairs[known, 1])
+        assert np.all(pairs[known, 0] >= limits[name].min(axis=0).ravel()[known] - 1e-9)
+        assert np.all(pairs[known, 1] <= limits[name].max(axis=0).ravel()[known] + 1e-9)
+        assert np.all((pairs[known, 0] <= value[known] + 1e-6)
+                      & (value[known] <= pairs[known, 1] + 1e-6))
+    json.dumps(res["params"], allow_nan=False)
+
+
+def test_r0_identified_on_discharge(discharge_df):
+    for method in ("jacobian", "bootstrap"):
+        res = TheveninECM(mode="fast", uncertainty=method,
+                          n_bootstrap=20).run(discharge_df)
+        lo, hi = res["params"]["R0_ohm_ci"]
+        assert 0 < lo < res["params"]["R0_ohm"] < hi < 2 * res["params"]["R0_ohm"]
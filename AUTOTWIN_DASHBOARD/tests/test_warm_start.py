@@ -0,0 +1,26 @@
+"""Warm-started identification (run(warm_start=...)) for every model."""
+
+import numpy as np
+import pytest
+
+from thevenin_ecm import HysteresisECM, SOCMapECM, TheveninECM
+
+
+@pytest.mark.parametrize("factory", [
+    lambda: TheveninECM(mode="fast", uncertainty=None),
+    lambda: HysteresisECM(mode="fast", uncertainty=None),
+    lambda: SOCMapECM(np.linspace(0.0, 1.0, 4), mode="fast", uncertainty=None),
+], ids=["thevenin", "hysteresis", "soc_map"])
+def test_warm_start_from_previous_cycle(factory, discharge_df, next_discharge_df):
+    prev = factory().run(discharge_df)
+    res  = factory().run(next_discharge_df, warm_start=prev["params"])
+    assert res["metrics"]["RMSE_V"] < 0.1
+
+
+def test_trust_region_keeps_zero_entries_open():
+    ecm = HysteresisECM()
+    x0  = np.array([0.08, 0.02, 900.0, 0.1, 0.0, 0.0])    # M = M0 = 0
+    lo, hi = np.array(ecm._trust_region(x0)).T
+    assert np.all(lo < hi)
+    np.testing.assert_allclose([lo[-2], hi[-2]], ecm._param_bounds()[-2])
+    np.testing.assert_allclose([lo[0], hi[0]], [0.04, 0.16])
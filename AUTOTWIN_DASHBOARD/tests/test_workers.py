@@ -0,0 +1,84 @@
+"""Every documented ``workers`` form: 1, n, -1, an executor, a map callable."""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+import pytest
+
+from multistart import multistart, resolve_workers, worker_map
+from thevenin_ecm import TheveninECM
+
+
+class CountingMap:
+    """Serial map-like callable that records how often it was used."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, func, iterable):
+        self.calls += 1
+        return list(map(func, iterable))
+
+
+def _refine_quadratic(target, x0):
+    """Toy local solver: jumps straight to the minimum of |x - target|²."""
+    return np.asarray(target, dtype=float), 0.0
+
+
+@pytest.fixture(scope="module", params=["1", "2", "-1", "executor",
+                                        "executor.map", "pool.map", "map"])
+def workers(request):
+    kind = request.param
+    if kind.lstrip("-").isdigit():
+        yield int(kind)
+    elif kind == "map":
+        yield CountingMap()
+    elif kind == "pool.map":
+        with Pool(2) as pool:
+            yield pool.map
+    else:
+        with ProcessPoolExecutor(2) as ex:
+            yield ex if kind == "executor" else ex.map
+
+
+def test_resolve_workers():
+    assert resolve_workers(3) == 3
+    assert resolve_workers(-1) >= 1
+    assert resolve_workers(map) is map
+    with pytest.raises(ValueError):
+        resolve_workers(0)
+    with pytest.raises(ValueError):
+        resolve_workers("four")
+
+
+def test_worker_map(workers):
+    with worker_map(workers) as mapper:
+        assert list(mapper(abs, [-1, 2, -3])) == [1, 2, 3]
+
+
+def test_multistart(workers):
+    refine = partial(_refine_quadratic, [0.3, 20.0])
+    x, cost, n_run = multistart(refine, [(0.0, 1.0), (1.0, 100.0)], n_starts=8,
+                                workers=workers)
+    np.testing.assert_allclose(x, [0.3, 20.0])
+    assert cost == 0.0 and 3 <= n_run <= 8
+
+
+@pytest.mark.parametrize("strategy", ["de", "multistart"])
+def test_ecm_identification(strategy, workers, discharge_df):
+    serial = TheveninECM(strategy=strategy, segments=True, uncertainty=None)
+    ref = serial.run(discharge_df)["params"]
+    res = TheveninECM(strategy=strategy, segments=True, uncertainty=None,
+                      workers=workers).run(discharge_df)
+    np.testing.assert_allclose(res["params"]["R0_ohm"], ref["R0_ohm"], rtol=1e-3)
+    if isinstance(workers, CountingMap):
+        assert workers.calls > 0
+
+
+def test_bootstrap(workers, discharge_df):
+    kw  = dict(mode="fast", uncertainty="bootstrap", n_bootstrap=20)
+    ref = TheveninECM(**kw).run(discharge_df)["uncertainty"]["samples"]
+    res = TheveninECM(workers=workers, **kw).run(discharge_df)["uncertainty"]
+    np.testing.assert_allclose(res["samples"], ref)
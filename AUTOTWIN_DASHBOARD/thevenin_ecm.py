@@ -17,19 +17,42 @@ Equations
   SOC[k]    = SOC[0] - integral(|I|dt) / Q_nominal
 
 Parameter Identification: Two-stage — global (Differential Evolution)
-followed by local (L-BFGS-B) optimisation.
+followed by local refinement: trust-region least squares with an analytic
+Jacobian (default) or the legacy L-BFGS-B on scalar RMSE. The RC
+recurrence is solved as a vectorized prefix scan (backend="vectorized");
+backend="loop" keeps the per-sample reference loop.
+
+Models
+------
+  TheveninECM      1RC model, one discharge file per run()
+  NRCTheveninECM   n RC branches in series
+  SOCMapECM        R0, R1, C1 as lookup tables over SOC
+  HysteresisECM    + one-state and instantaneous OCV hysteresis
+  MultiCycleECM    joint fit of all cycles of one battery
+  simulate_fleet   forward simulation of many cells at once
 
 Usage
 -----
     from thevenin_ecm import TheveninECM
     ecm = TheveninECM()
     results = ecm.run(df, Q_nominal_Ah=2.0)
+
+    ecm = TheveninECM(mode="fast", cache=".ecm_cache", workers=-1)
+    ecm2 = NRCTheveninECM(n_rc=2)           # 2RC fit, same result contract
 """
 
+import copy
+from functools import partial
+
 import numpy as np
 import pandas as pd
-from scipy.optimize import differential_evolution, minimize
+from scipy import sparse, stats
+from scipy.optimize import differential_evolution, least_squares, minimize
 from scipy.integrate import cumulative_trapezoid
+from scipy.signal import lfilter
+
+from ecm_result import ECMResult
+from multistart import multistart, resolve_workers, worker_map
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -38,6 +61,10 @@ from scipy.integrate import cumulative_trapezoid
 
 NASA_Q_NOMINAL = 2.0   # Rated capacity for fresh NASA 18650 cells (Ah)
 
+# Bump whenever a change alters identified params or traces, so cached
+# results (ecm_cache.py) from older versions are no longer served.
+ECM_MODEL_VERSION = "1.6"
+
 # OCV-SOC look-up table (18650 NMC, calibrated to NASA B00xx family)
 _SOC_LUT = np.linspace(0.0, 1.0, 21)
 _OCV_LUT = np.array([
@@ -45,6 +72,57 @@ _OCV_LUT = np.array([
     3.69, 3.73, 3.77, 3.82, 3.87, 3.93, 3.99, 4.05, 4.13, 4.20
 ])
 _OCV_POLY_DEGREE = 8
+_OCV_FIT_POINTS  = 201    # grid for the polynomial of a rescaled ocv_table
+
+_SIM_BACKENDS = ("vectorized", "loop")
+_LOCAL_METHODS = ("least_squares", "lbfgsb")
+_MODES = ("full", "fast")
+_STRATEGIES = ("de", "multistart")
+_TRACE_DTYPES = ("float64", "float32")
+_N_STARTS   = 16         # Sobol starts of strategy="multistart"
+
+_FAST_RMSE_TOL = 0.015   # V — fast-mode fits above this fall back to DE
+_FAST_TAU_GRID = 160     # time constants scanned by the closed-form stage
+
+_WARM_RMSE_TARGET  = 0.015   # V — warm starts below this skip the global stage
+_WARM_TRUST_FACTOR = 2.0     # warm-start search box: [x/f, x*f] ∩ _BOUNDS
+_WARM_MIN_SPAN     = 1e-3    # narrower boxes (share of the bounds) fall back to them
+
+_DECIMATE_R_REF = 0.1   # Ω — converts decimate_tol into a current tolerance
+
+# Informative-segment selection (segments=True)
+_SEG_STEP_A      = 0.05    # A — current change that counts as a step
+_SEG_PRE_S       = 20.0    # s — kept before each step
+_SEG_WINDOW_S    = 300.0   # s — kept after each step (transient / relaxation tail)
+_SEG_KNEE_SPAN_S = 60.0    # s — span of the dV/dt estimate
+_SEG_KNEE_FACTOR = 3.0     # knee where |dV/dt| exceeds this x its median
+_SEG_ANCHOR_S    = 120.0   # s — spacing of the anchor samples in between
+
+_SOC_MAP_BREAKPOINTS = np.linspace(0.0, 1.0, 6)   # SOCMapECM default grid
+_SOC_MAP_SMOOTHING   = 0.005   # weight of the neighbour-difference penalty
+
+_JOINT_PARTIAL_DV = 0.3    # V — MultiCycleECM: end voltage this far above the
+                           # median marks a cycle stopped before cutoff
+
+_HYST_BOUNDS = [
+    (0.1,  500.0),      # gamma — hysteresis rate per unit of SOC throughput
+    (0.0,  0.10),       # M  (V) — dynamic hysteresis magnitude
+    (0.0,  0.10),       # M0 (V) — instantaneous hysteresis
+]
+_HYST_X0       = [10.0, 0.01, 0.005]   # appended to the closed-form start
+_HYST_I_THRESH = 0.01                  # A — below this the current sign is held
+
+_UNCERTAINTY_METHODS = ("jacobian", "bootstrap")
+_CI_LEVEL       = 0.95     # two-sided confidence level of the reported intervals
+_N_BOOTSTRAP    = 200      # residual-bootstrap replicates
+_BOOTSTRAP_SEED = 42
+_MAX_RESID_CORR = 0.9      # caps the lag-1 residual autocorrelation (n/n_eff <= 19);
+                           # stronger correlation is model error, not noise
+_MAX_LOG_SE     = 1.0      # intervals wider than exp(±z * this) count as unidentified
+_BOOTSTRAP_CHUNK = 10      # replicates per worker task
+
+_FLEET_MAX_BYTES   = 256 * 1024 ** 2   # working-memory budget of simulate_fleet
+_FLEET_TEMPORARIES = 12                # (cells x samples) float arrays alive per chunk
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -57,6 +135,58 @@ class TheveninECM:
 
     Self-calibrates the OCV-SOC polynomial to each battery file and uses
     a two-stage global + local optimiser to identify R0, R1, C1.
+
+    The identification may run on a reduced copy of the trace
+    (resample_dt, decimate_tol or segments); the returned simulation and
+    metrics always cover every original sample.
+
+    Parameters
+    ----------
+    backend : str           "vectorized" (default) or "loop" simulation kernel
+    local : str             Stage 2 refinement: "least_squares" or "lbfgsb"
+    mode : str              "full" or "fast" (closed-form fit, DE fallback)
+    strategy : str          Global stage: "de" (Differential Evolution) or
+                            "multistart" (Sobol starts + least squares)
+    n_starts : int          Maximum starts for strategy="multistart"
+    fast_rmse_tol : float   Fast-mode acceptance threshold (V)
+    workers : int, executor or map-like
+                            Processes for DE population evaluation,
+                            multi-start and bootstrap refits: 1 = serial,
+                            -1 = all cores, n = n processes, a
+                            concurrent.futures executor or a map-like
+                            callable such as ``Pool.map``
+    warm_rmse_target : float
+                            run(warm_start=...) accepts the local fit and
+                            skips DE when its RMSE is at or below this (V)
+    cache : ECMResultCache, str or None
+                            Persistent result cache (or its directory);
+                            run() returns stored results for unchanged
+                            inputs and settings
+    resample_dt : float, "auto" or None
+                            Identify on a uniform grid with this step (s);
+                            "auto" uses the median sample interval
+    decimate_tol : float or None
+                            Drop samples that linear interpolation between
+                            the kept ones reproduces within this voltage
+                            (V) while the current stays within
+                            decimate_tol / 0.1 Ω
+    segments : bool         Identify on informative windows (current
+                            steps, relaxation tails, knees) plus sparse
+                            weighted anchors; not combinable with
+                            decimate_tol
+    ocv_table : OCVTable, str or None
+                            Fixed per-battery OCV curve (or its .npz path)
+                            used instead of the per-file polynomial; a
+                            table over normalised SOC is rescaled so the
+                            end of each file's discharge maps to 0
+    uncertainty : str or None
+                            "jacobian" (default), "bootstrap" or None;
+                            adds ``<name>_ci`` intervals to params
+    n_bootstrap : int       Replicates for uncertainty="bootstrap"
+    ci_level : float        Confidence level of the intervals
+    trace_dtype : str       Precision of the returned traces: "float64"
+                            or "float32" (half the memory; params and
+                            the cache stay at full precision)
     """
 
     _BOUNDS = [
@@ -64,18 +194,83 @@ class TheveninECM:
         (0.001, 0.50),      # R1 (Ohm)
         (50.0,  20000.0),   # C1 (F)
     ]
+    n_rc = 1                # RC branches; parameter vector is
+                            # [R0, R1, C1, R2, C2, ...]
 
-    def __init__(self):
+    def __init__(self, backend="vectorized", local="least_squares",
+                 mode="full", fast_rmse_tol=_FAST_RMSE_TOL, workers=1,
+                 strategy="de", n_starts=_N_STARTS,
+                 warm_rmse_target=_WARM_RMSE_TARGET, cache=None,
+                 resample_dt=None, decimate_tol=None, ocv_table=None,
+                 segments=False, uncertainty="jacobian", n_bootstrap=_N_BOOTSTRAP,
+                 ci_level=_CI_LEVEL, trace_dtype="float64"):
+        if backend not in _SIM_BACKENDS:
+            raise ValueError(f"Unknown simulation backend {backend!r}; "
+                             f"choose from {_SIM_BACKENDS}")
+        if local not in _LOCAL_METHODS:
+            raise ValueError(f"Unknown local method {local!r}; "
+                             f"choose from {_LOCAL_METHODS}")
+        if mode not in _MODES:
+            raise ValueError(f"Unknown mode {mode!r}; choose from {_MODES}")
+        if strategy not in _STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}; "
+                             f"choose from {_STRATEGIES}")
+        self.backend = backend
+        self.local   = local
+        self.mode    = mode
+        self.fast_rmse_tol = fast_rmse_tol
+        self.workers = resolve_workers(workers)
+        self.strategy = strategy
+        self.n_starts = int(n_starts)
+        self.warm_rmse_target = warm_rmse_target
+        if resample_dt not in (None, "auto") and (
+                isinstance(resample_dt, str) or not resample_dt > 0):
+            raise ValueError("resample_dt must be positive, 'auto' or None.")
+        if decimate_tol is not None and not decimate_tol > 0:
+            raise ValueError("decimate_tol must be positive or None.")
+        if segments and decimate_tol is not None:
+            raise ValueError("segments and decimate_tol are alternative "
+                             "reductions; use one of them.")
+        self.resample_dt  = resample_dt
+        self.decimate_tol = decimate_tol
+        self.segments     = bool(segments)
+        if uncertainty is not None and uncertainty not in _UNCERTAINTY_METHODS:
+            raise ValueError(f"Unknown uncertainty method {uncertainty!r}; "
+                             f"choose from {_UNCERTAINTY_METHODS} or None")
+        if not 0.0 < ci_level < 1.0:
+            raise ValueError("ci_level must lie in (0, 1).")
+        if uncertainty == "bootstrap" and int(n_bootstrap) < 2:
+            raise ValueError("n_bootstrap must be at least 2.")
+        self.uncertainty = uncertainty
+        self.n_bootstrap = int(n_bootstrap)
+        self.ci_level    = float(ci_level)
+        if np.dtype(trace_dtype).name not in _TRACE_DTYPES:
+            raise ValueError(f"Unknown trace_dtype {trace_dtype!r}; "
+                             f"choose from {_TRACE_DTYPES}")
+        self.trace_dtype = np.dtype(trace_dtype).name
+        if isinstance(cache, str):
+            from ecm_cache import ECMResultCache
+            cache = ECMResultCache(cache)
+        self.cache = cache
+        if isinstance(ocv_table, str):
+            from ocv_table import OCVTable
+            ocv_table = OCVTable.load(ocv_table)
+        self.ocv_table = ocv_table
         self.R0  = None
         self.R1  = None
         self.C1  = None
         self.tau = None
-        self._ocv_poly = np.polyfit(_SOC_LUT, _OCV_LUT, _OCV_POLY_DEGREE)
+        self.branches = []      # [(R_i, C_i)] sorted by time constant
+        self._ocv_poly = (np.polyfit(_SOC_LUT, _OCV_LUT, _OCV_POLY_DEGREE)
+                          if ocv_table is None else ocv_table.polyfit(_OCV_POLY_DEGREE))
+        self._ocv_soc_span = 1.0  # SOC range of this file mapped onto the table
+        self._validation = None   # full (df, soc) while fitting a reduced trace
         self._fitted = False
 
     # ── Public API ────────────────────────────────────────────────────────────
 
-    def run(self, df, Q_nominal_Ah=NASA_Q_NOMINAL, verbose=False):
+    def run(self, df, Q_nominal_Ah=NASA_Q_NOMINAL, verbose=False,
+            warm_start=None):
         """
         Full pipeline: preprocess -> SOC -> calibrate OCV ->
         identify params -> simulate -> metrics.
@@ -85,49 +280,85 @@ class TheveninECM:
         df : pd.DataFrame   NASA discharge CSV as a DataFrame
         Q_nominal_Ah : float   Cell rated capacity in Ah
         verbose : bool          Print optimiser progress
+        warm_start : dict or None
+                            ``params`` of a previous (e.g. preceding cycle)
+                            result; seeds a local fit in a narrowed box
+                            around it before any global search
 
         Returns
         -------
-        dict with keys:
+        ECMResult (ecm_result.py), read like a dict with keys:
             params, metrics, time, V_measured, V_simulated, soc, current,
-            temperature (if column exists in df)
+            Q_nominal_Ah, ocv_poly, temperature (if column exists in df),
+            uncertainty (unless uncertainty=None: method, level, names,
+            x, cov and, for the bootstrap, the replicate samples).
+            Traces are stored as ``trace_dtype``; metrics are computed
+            on first access.
         """
         df = self._preprocess(df)
         if df is None or len(df) < 10:
             raise ValueError("Too few discharge samples after preprocessing.")
 
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(df, Q_nominal_Ah, warm_start)
+            hit = self.cache.get(cache_key)
+            if hit is not None:
+                result, state = hit
+                self._ocv_poly = np.asarray(state["ocv_poly"], dtype=float)
+                self._ocv_soc_span = float(state.get("ocv_soc_span", 1.0))
+                self._set_params(np.asarray(state["x"], dtype=float))
+                if verbose:
+                    print("[ECM] Cache hit — identification skipped")
+                return ECMResult.from_dict(result).astype(self.trace_dtype)
+
         soc = self._coulomb_count(df, Q_nominal_Ah)
         self._calibrate_ocv(df, soc)
-        self._identify_parameters(df, soc, verbose)
+        df_id, soc_id = self._identification_samples(df, soc)
+        self._validation = None
+        if len(df_id) != len(df):
+            self._validation = (df, soc)
+            if verbose:
+                print(f"[ECM] Identifying on {len(df_id)} of {len(df)} samples")
+        try:
+            self._identify_parameters(df_id, soc_id, verbose, warm_start)
+        finally:
+            self._validation = None
 
         V_sim = self._simulate(
             df["Time"].values,
             df["Current_measured"].values,
-            soc, self.R0, self.R1, self.C1
+            soc, *self._param_vector()
         )
 
-        metrics = self._compute_metrics(df["Voltage_measured"].values, V_sim)
+        params  = self._params_dict()
+        uncertainty = None
+        if self.uncertainty is not None:
+            uncertainty = self._parameter_uncertainty(df, soc, V_sim, verbose)
+            params.update(uncertainty.pop("ci"))
 
-        result = {
-            "params": {
-                "R0_ohm": round(self.R0, 6),
-                "R1_ohm": round(self.R1, 6),
-                "C1_F":   round(self.C1, 4),
-                "tau_s":  round(self.tau, 4),
-            },
-            "metrics":     metrics,
-            "time":        df["Time"].values,
-            "V_measured":  df["Voltage_measured"].values,
-            "V_simulated": V_sim,
-            "soc":         soc,
-            "current":     df["Current_measured"].values,
-            "Q_nominal_Ah": Q_nominal_Ah,
-        }
+        result = ECMResult(
+            params=params,
+            time=df["Time"].values,
+            V_measured=df["Voltage_measured"].values,
+            V_simulated=V_sim,
+            soc=soc,
+            current=df["Current_measured"].values,
+            Q_nominal_Ah=Q_nominal_Ah,
+            ocv_poly=self._ocv_poly.copy(),
+            temperature=(df["Temperature_measured"].values
+                         if "Temperature_measured" in df.columns else None),
+            uncertainty=uncertainty,
+        )
 
-        if "Temperature_measured" in df.columns:
-            result["temperature"] = df["Temperature_measured"].values
+        if cache_key is not None:
+            self.cache.put(cache_key, result, {
+                "x":        self._param_vector(),
+                "ocv_poly": self._ocv_poly,
+                "ocv_soc_span": self._ocv_soc_span,
+            })
 
-        return result
+        return result.astype(self.trace_dtype)
 
     @staticmethod
     def load_csv(filepath):
@@ -148,11 +379,44 @@ class TheveninECM:
         return df
 
     def ocv(self, soc):
-        """Return OCV (V) for given SOC array using the calibrated polynomial."""
+        """
+        Return OCV (V) for given SOC array: table lookup when an
+        ``ocv_table`` is set, else the calibrated polynomial.
+        """
+        if self.ocv_table is not None:
+            return self.ocv_table(1.0 - (1.0 - soc) / self._ocv_soc_span)
         return np.polyval(self._ocv_poly, np.clip(soc, 0.0, 1.0))
 
     # ── Internals ─────────────────────────────────────────────────────────────
 
+    def _cache_key(self, df, Q_nominal_Ah, warm_start):
+        """Key over the preprocessed inputs and every result-affecting setting."""
+        arrays = {c: df[c].values for c in
+                  ("Time", "Current_measured", "Voltage_measured",
+                   "Temperature_measured") if c in df.columns}
+        return self.cache.make_key(
+            arrays, Q_nominal_Ah=float(Q_nominal_Ah),
+            warm_start=None if warm_start is None else
+                self._param_vector(warm_start).tolist(),
+            **self._cache_settings())
+
+    def _cache_settings(self):
+        """Model/optimiser settings that change run() results."""
+        return {
+            "model": type(self).__name__, "n_rc": self.n_rc,
+            "backend": self.backend, "local": self.local, "mode": self.mode,
+            "fast_rmse_tol": self.fast_rmse_tol,
+            "warm_rmse_target": self.warm_rmse_target,
+            "parallel": self.workers != 1,
+            "strategy": self.strategy,
+            "n_starts": self.n_starts if self.strategy == "multistart" else None,
+            "resample_dt": self.resample_dt, "decimate_tol": self.decimate_tol,
+            "segments": self.segments,
+            "uncertainty": self.uncertainty, "ci_level": self.ci_level,
+            "n_bootstrap": self.n_bootstrap if self.uncertainty == "bootstrap" else None,
+            "ocv_table": None if self.ocv_table is None else self.ocv_table.digest,
+        }
+
     def _preprocess(self, df):
         required = {"Voltage_measured", "Current_measured", "Time"}
         missing = required - set(df.columns)
@@ -185,82 +449,462 @@ class TheveninECM:
         Adapt OCV-SOC polynomial to THIS battery using a coarse IR-corrected
         voltage estimate: OCV_approx = V_measured - I*R0_coarse
         """
+        if self.ocv_table is not None:      # fixed per-battery curve
+            if self.ocv_table.normalized:
+                # ocv_poly (run(), ECMStepper, ecm_predict) must follow the
+                # rescaled table the fit used, over this file's SOC range
+                self._ocv_soc_span = max(1.0 - float(soc.min()), 1e-6)
+                grid = np.linspace(1.0 - self._ocv_soc_span, 1.0, _OCV_FIT_POINTS)
+                self._ocv_poly = np.polyfit(grid, self.ocv(grid), _OCV_POLY_DEGREE)
+            else:
+                self._ocv_soc_span = 1.0
+            return
         I = df["Current_measured"].values
         V = df["Voltage_measured"].values
 
-        dV = np.abs(np.diff(V[:6]))
-        dI = np.abs(np.diff(I[:6]))
-        mask = dI > 0.05
-        R0_coarse = float(np.clip(
-            np.median(dV[mask] / dI[mask]) if mask.any() else 0.10,
-            0.01, 0.30
-        ))
-
-        V_ocv_approx = V - I * R0_coarse
+        V_ocv_approx = V - I * _coarse_r0(I, V)
         with np.errstate(all="ignore"):
             self._ocv_poly = np.polyfit(soc, V_ocv_approx, _OCV_POLY_DEGREE)
 
-    def _simulate(self, time, current, soc, R0, R1, C1):
+    def _identification_samples(self, df, soc):
         """
-        Discrete-time 1RC Thevenin simulation using zero-order hold (ZOH).
-        alpha = exp(-dt / tau)
-        V_RC[k+1] = alpha*V_RC[k] + R1*(1-alpha)*I[k]
-        V_t[k]    = OCV(SOC[k]) + R0*I[k] + V_RC[k]
+        (df, soc) reduced for identification by resample_dt / decimate_tol
+        / segments; the inputs unchanged when all are off. Segment
+        selection adds a "Weight" column (mean 1) read by the costs.
         """
-        n   = len(time)
-        tau = R1 * C1
-        V_RC = np.zeros(n)
-        V_t  = np.zeros(n)
+        if self.resample_dt is None and self.decimate_tol is None and not self.segments:
+            return df, soc
+        t    = df["Time"].values
+        cols = ["Time", "Current_measured", "Voltage_measured"]
 
-        V_t[0] = self.ocv(soc[0:1])[0] + current[0] * R0
+        if self.resample_dt is not None:
+            step = (float(np.median(np.diff(t))) if self.resample_dt == "auto"
+                    else float(self.resample_dt))
+            t_u  = t[0] + step * np.arange(int(np.floor((t[-1] - t[0]) / step)) + 1)
+            df   = pd.DataFrame({c: np.interp(t_u, t, df[c].values) for c in cols})
+            soc  = np.interp(t_u, t, soc)
 
-        for k in range(1, n):
-            dt    = max(float(time[k] - time[k-1]), 1e-6)
-            alpha = np.exp(-dt / tau) if tau > 1e-9 else 0.0
-            V_RC[k] = V_RC[k-1] * alpha + current[k-1] * R1 * (1.0 - alpha)
-            V_t[k]  = self.ocv(soc[k:k+1])[0] + current[k] * R0 + V_RC[k]
+        if self.decimate_tol is not None:
+            keep = _decimation_indices(
+                df["Time"].values, df["Voltage_measured"].values,
+                df["Current_measured"].values,
+                self.decimate_tol, self.decimate_tol / _DECIMATE_R_REF)
+            df, soc = df.iloc[keep].reset_index(drop=True), soc[keep]
+
+        if self.segments:
+            keep, weight = _informative_samples(
+                df["Time"].values, df["Voltage_measured"].values,
+                df["Current_measured"].values)
+            df, soc = df.iloc[keep].reset_index(drop=True), soc[keep]
+            df["Weight"] = weight
+        return df, soc
+
+    def _simulate(self, time, current, soc, R0, *branches):
+        """
+        Discrete-time Thevenin simulation using zero-order hold (ZOH).
+        alpha = exp(-dt / tau)
+        V_RC[k+1] = alpha*V_RC[k] + R1*(1-alpha)*I[k]
+        V_t[k]    = OCV(SOC[k]) + R0*I[k] + V_RC[k]
 
-        return V_t
+        ``branches`` is R1, C1[, R2, C2, ...]; each RC branch follows the
+        recurrence above and their voltages add. Dispatches to the kernel
+        selected by ``self.backend``; both kernels return the same trace to
+        floating-point rounding.
+        """
+        return _SIM_KERNELS[self.backend](time, current, self.ocv(soc), R0, *branches)
 
-    def _identify_parameters(self, df, soc, verbose):
+    def _identify_parameters(self, df, soc, verbose, warm_start=None):
         """
         Two-stage optimisation to minimise RMSE(V_measured, V_simulated).
         Stage 1 — Differential Evolution (global, seed=42 for reproducibility)
-        Stage 2 — L-BFGS-B (local refinement from Stage 1 best)
+        Stage 2 — local refinement from Stage 1 best: least squares with
+                  analytic Jacobian (``local="least_squares"``) or L-BFGS-B
+        With strategy="multistart" both stages are replaced by analytic
+        least-squares refinements from Sobol starts (see multistart.py).
+
+        With the vectorized backend Stage 1 evaluates each generation as one
+        batched simulation (DE ``vectorized=True``, deferred updating); with
+        ``workers`` != 1 the picklable cost is mapped over worker processes.
+        In mode="fast" both stages are skipped when the closed-form fit
+        (refined by least squares) reaches ``fast_rmse_tol``. A warm start
+        is tried first and short-circuits everything when its local fit,
+        confined to the trust region around it, meets ``warm_rmse_target``.
         """
         time    = df["Time"].values
         current = df["Current_measured"].values
         V_meas  = df["Voltage_measured"].values
+        weights = df["Weight"].values if "Weight" in df.columns else None
+
+        ocv_v  = self.ocv(soc)
+        cost   = self._make_cost(time, current, ocv_v, V_meas, weights)
+        bounds = self._param_bounds()
+
+        if warm_start is not None:
+            x0 = self._param_vector(warm_start)
+            x, rmse = self._refine_least_squares(
+                time, current, ocv_v, V_meas, x0, self._trust_region(x0), weights)
+            rmse = self._acceptance_rmse(x, rmse)
+            if verbose:
+                print(f"[ECM] Warm start RMSE = {rmse*1000:.3f} mV")
+            if rmse <= self.warm_rmse_target:
+                self._set_params(x)
+                return
+            if verbose:
+                print("[ECM] Warm start missed RMSE target — full search")
+
+        if self.mode == "fast":
+            x0 = self._identify_closed_form(time, current, ocv_v, V_meas, weights)
+            if x0 is not None:
+                x, rmse = self._refine_least_squares(
+                    time, current, ocv_v, V_meas, x0, bounds, weights)
+                rmse = self._acceptance_rmse(x, rmse)
+                if verbose:
+                    print(f"[ECM] Fast mode RMSE = {rmse*1000:.3f} mV")
+                if rmse <= self.fast_rmse_tol:
+                    self._set_params(x)
+                    return
+            if verbose:
+                print("[ECM] Fast mode failed quality check — falling back to DE")
 
-        def cost(x):
-            V_sim = self._simulate(time, current, soc, *x)
-            return np.sqrt(np.mean((V_sim - V_meas) ** 2))
+        if self.strategy == "multistart":
+            if verbose:
+                print(f"[ECM] Multi-start least squares (≤ {self.n_starts} Sobol starts) …")
+            refine = partial(self._worker_copy()._refine_least_squares,
+                             time, current, ocv_v, V_meas, bounds=bounds,
+                             weights=weights)
+            x, rmse, n_run = multistart(refine, bounds, self.n_starts,
+                                        workers=self.workers)
+            if verbose:
+                print(f"[ECM] Multi-start RMSE = {rmse*1000:.3f} mV "
+                      f"({n_run} starts run)")
+            self._set_params(x)
+            return
+
+        # Single process: batch the whole population per generation.
+        # Multiple workers: scatter single candidates across processes.
+        parallel = self.workers != 1
+        batched  = self.backend == "vectorized" and not parallel
 
         if verbose:
             print("[ECM] Stage 1 — Differential Evolution …")
-        de = differential_evolution(
-            cost, self._BOUNDS,
-            seed=42, maxiter=500, tol=1e-7,
-            popsize=15, mutation=(0.5, 1.5), recombination=0.75,
-            workers=1, polish=False
-        )
+        with worker_map(self.workers) as mapper:
+            de = differential_evolution(
+                cost, bounds,
+                seed=42, maxiter=500, tol=1e-7,
+                popsize=15, mutation=(0.5, 1.5), recombination=0.75,
+                workers=mapper if parallel else 1, polish=False,
+                vectorized=batched,
+                updating="deferred" if batched or parallel else "immediate",
+            )
         if verbose:
             print(f"[ECM] Stage 1 RMSE = {de.fun*1000:.3f} mV")
-            print("[ECM] Stage 2 — L-BFGS-B refinement …")
+            print(f"[ECM] Stage 2 — {self.local} refinement …")
 
-        local = minimize(
-            cost, de.x, method="L-BFGS-B", bounds=self._BOUNDS,
-            options={"maxiter": 3000, "ftol": 1e-13, "gtol": 1e-11}
-        )
+        if self.local == "least_squares":
+            x, rmse = self._refine_least_squares(
+                time, current, ocv_v, V_meas, de.x, bounds, weights)
+        else:
+            local = minimize(
+                cost, de.x, method="L-BFGS-B", bounds=bounds,
+                options={"maxiter": 3000, "ftol": 1e-13, "gtol": 1e-11}
+            )
+            x, rmse = local.x, local.fun
         if verbose:
-            print(f"[ECM] Stage 2 RMSE = {local.fun*1000:.3f} mV")
+            print(f"[ECM] Stage 2 RMSE = {rmse*1000:.3f} mV")
+
+        self._set_params(x)
+
+    def _make_cost(self, time, current, ocv_v, V_meas, weights=None):
+        """Picklable DE objective over this model's parameter vector."""
+        return _ECMCost(time, current, ocv_v, V_meas, self.backend,
+                        weights=weights)
+
+    def _acceptance_rmse(self, x, rmse):
+        """
+        RMSE used by the warm-start / fast-mode acceptance tests. When
+        identifying on a resampled or decimated trace it is recomputed on
+        the original samples, since the thinned trace over-weights
+        transients and would reject good fits.
+        """
+        if self._validation is None:
+            return rmse
+        df, soc = self._validation
+        V_sim = self._simulate(df["Time"].values, df["Current_measured"].values,
+                               soc, *x)
+        return float(np.sqrt(np.mean((V_sim - df["Voltage_measured"].values) ** 2)))
 
-        self.R0  = float(local.x[0])
-        self.R1  = float(local.x[1])
-        self.C1  = float(local.x[2])
+    def _set_params(self, x):
+        """Store x = [R0, R1, C1, ...], ordering branches by time constant."""
+        self.R0 = float(x[0])
+        self.branches = sorted(
+            ((float(R), float(C)) for R, C in zip(x[1::2], x[2::2])),
+            key=lambda rc: rc[0] * rc[1])
+        self.R1, self.C1 = self.branches[0]
         self.tau = self.R1 * self.C1
         self._fitted = True
 
+    def _param_bounds(self):
+        """_BOUNDS expanded to [R0, (R_i, C_i) x n_rc]."""
+        return self._BOUNDS[:1] + self._BOUNDS[1:] * self.n_rc
+
+    def _vector_bounds(self):
+        """Bounds of the full fitted vector (_param_vector()) for uncertainty."""
+        return self._param_bounds()
+
+    def _param_vector(self, params=None):
+        """
+        Parameter vector [R0, R1, C1, R2, C2, ...] from a result ``params``
+        dict, or from the fitted model when params is None.
+        """
+        if params is None:
+            x = [self.R0]
+            for R, C in self.branches:
+                x += [R, C]
+        else:
+            x = [params["R0_ohm"]]
+            for i in range(1, self.n_rc + 1):
+                x += [params[f"R{i}_ohm"], params[f"C{i}_F"]]
+        return np.array(x, dtype=float)
+
+    def _params_dict(self):
+        """Rounded params for run(); branch 1 keeps the 1RC key names."""
+        params = {"R0_ohm": round(self.R0, 6)}
+        for i, (R, C) in enumerate(self.branches, start=1):
+            suffix = "" if i == 1 else str(i)
+            params[f"R{i}_ohm"]      = round(R, 6)
+            params[f"C{i}_F"]        = round(C, 4)
+            params[f"tau{suffix}_s"] = round(R * C, 4)
+        return params
+
+    def _trust_region(self, x0, factor=_WARM_TRUST_FACTOR):
+        """
+        Bounds [x0/factor, x0*factor] clipped to the parameter bounds;
+        entries at or near zero (e.g. a hysteresis magnitude of 0) whose
+        box would collapse keep their full bounds.
+        """
+        lo, hi = np.array(self._param_bounds(), dtype=float).T
+        x0 = np.clip(x0, lo, hi)
+        box_lo = np.maximum(lo, x0 / factor)
+        box_hi = np.minimum(hi, x0 * factor)
+        narrow = box_hi - box_lo < _WARM_MIN_SPAN * (hi - lo)
+        return list(zip(np.where(narrow, lo, box_lo), np.where(narrow, hi, box_hi)))
+
+    def _parameter_uncertainty(self, df, soc, V_sim, verbose=False):
+        """
+        Covariance and confidence intervals of the fitted parameters on
+        the full trace, with the OCV curve held fixed.
+
+        ECM residuals are strongly autocorrelated, so both methods use the
+        effective sample size n_eff = n(1-rho)/(1+rho), rho being the lag-1
+        residual autocorrelation (capped at _MAX_RESID_CORR). "jacobian"
+        scales s²(JᵀJ)⁻¹ by n/n_eff and takes normal-quantile intervals on
+        the log of each (positive) quantity; derived quantities (tau)
+        follow by the delta method. "bootstrap" adds
+        residual blocks of length n/n_eff, drawn with replacement, to the
+        fitted trace and refits every replicate by least squares from the
+        nominal parameters; intervals are replicate percentiles.
+
+        Intervals are clipped to the parameter bounds. Quantities whose
+        interval spans more than a factor exp(2 z _MAX_LOG_SE), touches
+        zero or is undefined are not identified by the trace: they get no
+        ``<name>_ci`` entry (table entries get [None, None]) and are listed
+        under ``unidentified``.
+
+        Returns dict: method, level, names, x, cov, n_eff, ci (the
+        ``<name>_ci`` entries for params), unidentified and, for the
+        bootstrap, samples.
+        """
+        time    = df["Time"].values
+        current = df["Current_measured"].values
+        x       = self._param_vector()
+        resid   = df["Voltage_measured"].values - V_sim
+        inflation = _residual_inflation(resid)
+        n_eff   = len(resid) / inflation
+        tail    = 0.5 * (1.0 - self.ci_level)
+        z       = stats.norm.ppf(1.0 - tail)
+        out = {"method": self.uncertainty, "level": self.ci_level,
+               "names": list(self._derived_params(x[None, :])), "x": x,
+               "n_eff": round(n_eff, 1)}
+
+        if self.uncertainty == "jacobian":
+            cov = _gauss_newton_covariance(
+                self._jacobian(time, current, soc, x), resid, len(x)) * inflation
+            p   = len(x)
+            h   = 1e-6 * np.maximum(np.abs(x), 1e-12)     # central differences
+            X   = np.vstack([x, x + np.diag(h), x - np.diag(h)])
+            unexcited = np.isnan(np.diag(cov))
+            ci  = {}
+            for name, v in self._derived_params(X).items():
+                step = 2.0 * h.reshape((p,) + (1,) * (v.ndim - 1))
+                G    = (v[1:p + 1] - v[p + 1:]) / step
+                with np.errstate(invalid="ignore"):     # NaN if unidentifiable
+                    se = np.sqrt(np.einsum("j...,jl,l...->...", G, np.nan_to_num(cov), G))
+                se   = np.where(np.einsum("j...,j->...", np.abs(G), unexcited) > 0,
+                                np.nan, se)
+                with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                    log_se   = np.where(v[0] > 0, se / v[0], np.inf)
+                    ci[name] = (v[0] * np.exp(-z * log_se), v[0] * np.exp(z * log_se))
+        else:
+            block   = int(min(np.ceil(inflation), len(resid) // 2))
+            samples = self._bootstrap(time, current, self.ocv(soc), V_sim, resid,
+                                      x, max(block, 1))
+            cov = np.cov(samples, rowvar=False)
+            ci  = {name: tuple(np.percentile(v, [100 * tail, 100 * (1 - tail)], axis=0))
+                   for name, v in self._derived_params(samples).items()}
+            out["samples"] = samples
+
+        if verbose:
+            print(f"[ECM] Uncertainty ({self.uncertainty}): n_eff = {n_eff:.0f} "
+                  f"of {len(resid)} samples")
+        out["cov"] = cov
+        out["ci"], out["unidentified"] = self._report_intervals(ci, z)
+        return out
+
+    def _report_intervals(self, ci, z):
+        """
+        ``<name>_ci`` entries (clipped to the bounds) for the identified
+        quantities and the names of the unidentified ones.
+        """
+        limits = self._derived_params(np.array(self._vector_bounds(), dtype=float).T)
+        report, unidentified = {}, []
+        for name, (lo, hi) in ci.items():
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                ok = (lo > 0) & (np.log(hi / lo) <= 2.0 * z * _MAX_LOG_SE)
+            pair = np.stack([np.clip(lo, limits[name].min(axis=0), limits[name].max(axis=0)),
+                             np.clip(hi, limits[name].min(axis=0), limits[name].max(axis=0))],
+                            axis=-1).round(6)
+            if np.ndim(ok) == 0:
+                if ok:
+                    report[f"{name}_ci"] = pair.tolist()
+                else:
+                    unidentified.append(name)
+            else:                                   # table: flag single entries
+                report[f"{name}_ci"] = np.where(ok[..., None], pair, None).tolist()
+                unidentified += [f"{name}[{i}]" for i in np.flatnonzero(~ok)]
+        return report, unidentified
+
+    def _bootstrap(self, time, current, ocv_v, V_fit, resid, x, block):
+        """
+        (n_bootstrap, p) refitted parameter vectors. Every replicate has
+        its own seed, so results do not depend on ``workers``.
+        """
+        seeds = np.random.SeedSequence(_BOOTSTRAP_SEED).spawn(self.n_bootstrap)
+        task  = partial(_bootstrap_refits, self._worker_copy(), time, current,
+                        ocv_v, V_fit, resid, x, block)
+        if self.workers == 1:
+            return task(seeds)
+        chunks = [seeds[i:i + _BOOTSTRAP_CHUNK]
+                  for i in range(0, len(seeds), _BOOTSTRAP_CHUNK)]
+        with worker_map(self.workers) as mapper:
+            return np.vstack(list(mapper(task, chunks)))
+
+    def _worker_copy(self):
+        """Shallow copy without cache, worker pool or validation trace."""
+        model = copy.copy(self)
+        model.cache, model.workers, model._validation = None, 1, None
+        return model
+
+    def _jacobian(self, time, current, soc, x):
+        """Sensitivities dV_sim/dx, shape (n, p)."""
+        return _thevenin_sensitivities(time, current, self.ocv(soc), x)[1]
+
+    def _derived_params(self, X):
+        """
+        Reported quantities for parameter vectors X (k, p): params keys
+        mapped to (k,) arrays, branches ordered by time constant per row.
+        """
+        R = X[:, 1:2 * self.n_rc + 1:2]
+        C = X[:, 2:2 * self.n_rc + 1:2]
+        order = np.argsort(R * C, axis=1)
+        R, C  = np.take_along_axis(R, order, 1), np.take_along_axis(C, order, 1)
+        out = {"R0_ohm": X[:, 0]}
+        for i in range(self.n_rc):
+            suffix = "" if i == 0 else str(i + 1)
+            out[f"R{i + 1}_ohm"]     = R[:, i]
+            out[f"C{i + 1}_F"]       = C[:, i]
+            out[f"tau{suffix}_s"]    = R[:, i] * C[:, i]
+        return out
+
+    def _identify_closed_form(self, time, current, ocv_v, V_meas, weights=None):
+        """
+        One-pass linear identification for mode="fast".
+
+        y = V_meas - OCV(SOC) is linear in (R0, R1) once tau is fixed:
+            y[k] = R0*I[k] + R1*phi_tau[k]
+        where phi_tau is the unit-R1 RC response. This is the ARX model
+        y[k] = a*y[k-1] + b0*I[k] + b1*I[k-1] with the pole a = exp(-dt/tau)
+        scanned on a log grid instead of regressed freely — under the near
+        constant NASA discharge current a free pole absorbs the OCV drift
+        and comes out unstable (a > 1). All grid taus are solved at once
+        with 2x2 normal equations; the best in-bounds candidate is returned
+        as (R0, R1, C1), or None if none is admissible.
+
+        For n_rc > 1 the extra branches start at half of R1 with time
+        constants one decade apart, left to the least-squares refinement.
+        Sample ``weights`` enter as a weighted least-squares problem.
+        """
+        (r0_lo, r0_hi), (r1_lo, r1_hi), (c1_lo, c1_hi) = self._BOUNDS
+        taus = np.logspace(np.log10(r1_lo * c1_lo), np.log10(r1_hi * c1_hi),
+                           _FAST_TAU_GRID)[:, None]
+        y   = V_meas - ocv_v
+        phi = _rc_response(time, current, 1.0, taus)
+        if weights is not None:
+            sw = np.sqrt(weights)
+            current, y, phi = current * sw, y * sw, phi * sw
+
+        s11, s12, s22 = current @ current, phi @ current, np.sum(phi * phi, axis=1)
+        b1,  b2       = current @ y, phi @ y
+        det = s11 * s22 - s12 ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            R0 = (s22 * b1 - s12 * b2) / det
+            R1 = (s11 * b2 - s12 * b1) / det
+        C1 = taus[:, 0] / R1
+
+        sse = np.sum((y - R0[:, None] * current - R1[:, None] * phi) ** 2, axis=1)
+        ok  = ((R0 >= r0_lo) & (R0 <= r0_hi) & (R1 >= r1_lo) & (R1 <= r1_hi)
+               & (C1 >= c1_lo) & (C1 <= c1_hi) & np.isfinite(sse))
+        if not ok.any():
+            return None
+        g = np.argmin(np.where(ok, sse, np.inf))
+        x = [R0[g], R1[g], C1[g]]
+        for i in range(1, self.n_rc):
+            R = float(np.clip(0.5 * R1[g], r1_lo, r1_hi))
+            x += [R, float(np.clip(taus[g, 0] * 10.0 ** i / R, c1_lo, c1_hi))]
+        return np.array(x)
+
+    @staticmethod
+    def _refine_least_squares(time, current, ocv_v, V_meas, x0, bounds,
+                              weights=None):
+        """
+        Trust-region reflective least squares on the residual vector
+        r = sqrt(w/n)*(V_sim - V_meas), so that ||r|| is the (weighted) RMSE.
+        The Jacobian w.r.t. (R0, R1, C1, ...) comes from forward sensitivity
+        recurrences solved alongside the voltage (see _rc_sensitivities);
+        each RC branch contributes its own independent pair of columns.
+
+        Returns (x, rmse).
+        """
+        scale = _residual_scale(len(time), weights)
+        cache = {}
+
+        def evaluate(x):
+            key = tuple(x)
+            if cache.get("key") != key:
+                V_sim, J = _thevenin_sensitivities(time, current, ocv_v, x)
+                cache["key"] = key
+                cache["r"]   = (V_sim - V_meas) * scale
+                cache["J"]   = J * scale[:, None]
+            return cache
+
+        lo, hi = np.array(bounds, dtype=float).T
+        sol = least_squares(
+            lambda x: evaluate(x)["r"], np.clip(x0, lo, hi),
+            jac=lambda x: evaluate(x)["J"],
+            bounds=(lo, hi), method="trf", x_scale="jac",
+            ftol=1e-12, xtol=1e-12, gtol=1e-12, max_nfev=200,
+        )
+        return sol.x, float(np.sqrt(2.0 * sol.cost))
+
     @staticmethod
     def _compute_metrics(V_meas, V_sim):
         err    = V_meas - V_sim
@@ -280,6 +924,1236 @@ class TheveninECM:
         }
 
 
+class NRCTheveninECM(TheveninECM):
+    """
+    n-RC Thevenin model: R0 in series with ``n_rc`` parallel RC branches.
+
+    Shares every stage of TheveninECM (vectorized multi-branch kernel,
+    batched DE, analytic-Jacobian least squares, fast/warm/cache modes).
+    run() returns the same dict; params gain R2_ohm, C2_F, tau2_s, ...
+    with branches ordered by increasing time constant.
+
+    Parameters
+    ----------
+    n_rc : int      Number of RC branches (1 reproduces TheveninECM)
+    **kwargs        Forwarded to TheveninECM
+    """
+
+    def __init__(self, n_rc=2, **kwargs):
+        if int(n_rc) != n_rc or n_rc < 1:
+            raise ValueError(f"n_rc must be a positive integer, got {n_rc!r}")
+        self.n_rc = int(n_rc)
+        super().__init__(**kwargs)
+
+
+class SOCMapECM(TheveninECM):
+    """
+    1RC Thevenin model whose R0, R1 and C1 vary with SOC.
+
+    Each parameter is a table over ``soc_breakpoints`` (held together as
+    one (3, m) array) and linearly interpolated at every sample inside the
+    vectorized kernel. Identification first runs the scalar TheveninECM
+    pipeline, then refines all 3*m table entries by least squares. Every
+    sample touches only two neighbouring breakpoints, so each Jacobian
+    column is one extra prefix scan — cost is linear in m.
+
+    run() keeps the TheveninECM result dict: R0_ohm / R1_ohm / C1_F / tau_s
+    hold the sample-averaged values, and params additionally carry
+    soc_breakpoints, R0_map_ohm, R1_map_ohm and C1_map_F. Confidence
+    intervals (uncertainty="jacobian" only) cover the table entries.
+
+    Parameters
+    ----------
+    soc_breakpoints : array-like   Increasing SOC grid in [0, 1]
+    smoothing : float              Penalty on relative jumps between
+                                   neighbouring breakpoints (0 = none);
+                                   keeps weakly excited entries near the
+                                   scalar fit
+    **kwargs                       Forwarded to TheveninECM
+    """
+
+    def __init__(self, soc_breakpoints=_SOC_MAP_BREAKPOINTS,
+                 smoothing=_SOC_MAP_SMOOTHING, **kwargs):
+        bp = np.asarray(soc_breakpoints, dtype=float)
+        if bp.ndim != 1 or len(bp) < 2 or np.any(np.diff(bp) <= 0):
+            raise ValueError("soc_breakpoints must be an increasing 1-D grid "
+                             "with at least two points")
+        self.soc_breakpoints = bp
+        self.smoothing = smoothing
+        self.maps = None                 # (3, m): rows R0, R1, C1
+        self._soc_mean_params = None
+        super().__init__(**kwargs)
+        if self.uncertainty == "bootstrap":
+            raise ValueError("SOCMapECM supports uncertainty='jacobian' only.")
+
+    def _identify_parameters(self, df, soc, verbose, warm_start=None):
+        super()._identify_parameters(df, soc, verbose, warm_start)
+
+        time    = df["Time"].values
+        current = df["Current_measured"].values
+        V_meas  = df["Voltage_measured"].values
+        ocv_v   = self.ocv(soc)
+        idx, frac = _soc_interp_weights(soc, self.soc_breakpoints)
+        m = len(self.soc_breakpoints)
+        scale = _residual_scale(
+            len(time), df["Weight"].values if "Weight" in df.columns else None)
+        cache = {}
+
+        # Smoothness rows: smoothing * (p[j+1] - p[j]) / p_scalar per table
+        D   = np.diff(np.eye(m), axis=0)
+        ref = np.array([self.R0, self.R1, self.C1])
+        P   = self.smoothing * np.kron(np.diag(1.0 / ref), D)
+
+        def evaluate(x):
+            key = tuple(x)
+            if cache.get("key") != key:
+                V_sim, J = _soc_map_sensitivities(
+                    time, current, ocv_v, idx, frac, x.reshape(3, m))
+                cache["key"] = key
+                cache["r"]   = np.concatenate([(V_sim - V_meas) * scale, P @ x])
+                cache["J"]   = np.vstack([J * scale[:, None], P])
+            return cache
+
+        lo, hi = np.array(self._vector_bounds(), dtype=float).T
+        sol = least_squares(
+            lambda x: evaluate(x)["r"], np.clip(self.maps.ravel(), lo, hi),
+            jac=lambda x: evaluate(x)["J"],
+            bounds=(lo, hi), method="trf", x_scale="jac",
+            ftol=1e-10, xtol=1e-10, gtol=1e-10, max_nfev=200,
+        )
+        self._set_params(sol.x)
+        if verbose:
+            rmse = np.sqrt(np.sum(evaluate(sol.x)["r"][:len(time)] ** 2))
+            print(f"[ECM] SOC-map refinement RMSE = {rmse*1000:.3f} mV "
+                  f"({m} breakpoints)")
+
+        # Report sample-averaged scalars under the usual keys.
+        R0_k, R1_k, C1_k = _interp_maps(self.maps, idx, frac)
+        self._soc_mean_params = (float(R0_k.mean()), float(R1_k.mean()),
+                                 float(C1_k.mean()))
+
+    def _set_params(self, x):
+        """x is either a scalar (R0, R1, C1) vector or the flattened maps."""
+        x = np.asarray(x, dtype=float)
+        m = len(self.soc_breakpoints)
+        if x.size == 3:
+            self.maps = np.repeat(x[:, None], m, axis=1)
+            super()._set_params(x)
+        else:
+            self.maps = x.reshape(3, m).copy()
+            super()._set_params(self.maps.mean(axis=1))
+
+    def _param_vector(self, params=None):
+        if params is not None or self.maps is None:
+            return super()._param_vector(params)
+        return self.maps.ravel().copy()
+
+    def _params_dict(self):
+        if self._soc_mean_params is not None:
+            self.R0, self.R1, self.C1 = self._soc_mean_params
+            self.tau = self.R1 * self.C1
+            self.branches = [(self.R1, self.C1)]
+        params = super()._params_dict()
+        params["soc_breakpoints"] = self.soc_breakpoints.round(4).tolist()
+        params["R0_map_ohm"] = self.maps[0].round(6).tolist()
+        params["R1_map_ohm"] = self.maps[1].round(6).tolist()
+        params["C1_map_F"]   = self.maps[2].round(4).tolist()
+        return params
+
+    def _simulate(self, time, current, soc, *x):
+        if len(x) == 3:
+            return super()._simulate(time, current, soc, *x)
+        idx, frac = _soc_interp_weights(soc, self.soc_breakpoints)
+        return _zoh_soc_map(time, current, self.ocv(soc), idx, frac,
+                            np.reshape(x, (3, -1)))
+
+    def _jacobian(self, time, current, soc, x):
+        idx, frac = _soc_interp_weights(soc, self.soc_breakpoints)
+        return _soc_map_sensitivities(time, current, self.ocv(soc), idx, frac,
+                                      np.reshape(x, (3, -1)))[1]
+
+    def _vector_bounds(self):
+        """_BOUNDS for every table entry [R0 x m, R1 x m, C1 x m]."""
+        return np.repeat(np.array(self._BOUNDS, dtype=float),
+                         len(self.soc_breakpoints), axis=0).tolist()
+
+    def _derived_params(self, X):
+        """Table entries only: R0_map_ohm, R1_map_ohm, C1_map_F as (k, m)."""
+        m = len(self.soc_breakpoints)
+        return {"R0_map_ohm": X[:, :m], "R1_map_ohm": X[:, m:2 * m],
+                "C1_map_F": X[:, 2 * m:]}
+
+    def _cache_settings(self):
+        settings = super()._cache_settings()
+        settings["soc_breakpoints"] = self.soc_breakpoints.tolist()
+        settings["smoothing"] = self.smoothing
+        return settings
+
+
+class HysteresisECM(TheveninECM):
+    """
+    n-RC Thevenin model with one-state OCV hysteresis.
+
+        h[k] = a[k]*h[k-1] + (1 - a[k])*sgn(I[k-1]),
+        a[k] = exp(-gamma*|I[k-1]|*dt[k] / Q)
+        V_t  = OCV + I*R0 + sum V_RC + M*h + M0*s
+
+    h relaxes towards +1 while charging and -1 while discharging at a
+    rate set by the charge passed; s is the sign of the most recent
+    non-zero current (instantaneous hysteresis). h is a first-order
+    recurrence like V_RC, so it runs through the same prefix scan (for a
+    whole DE population at once) and its gamma-sensitivity is one more
+    scan in the least-squares Jacobian; M and M0 enter linearly.
+
+    Unlike TheveninECM, preprocessing keeps charge and rest samples and
+    coulomb counting is signed (SOC = 1 at the fullest point of the
+    trace). On discharge-only data h saturates at -1 and M, M0 are barely
+    separable from the OCV level, so fit on traces that both charge and
+    discharge.
+
+    Parameter vector: [R0, R1, C1, ..., gamma, M, M0]; params gain
+    gamma, M_hyst_V and M0_hyst_V.
+
+    Parameters
+    ----------
+    n_rc : int      Number of RC branches
+    **kwargs        Forwarded to TheveninECM
+    """
+
+    def __init__(self, n_rc=1, **kwargs):
+        if int(n_rc) != n_rc or n_rc < 1:
+            raise ValueError(f"n_rc must be a positive integer, got {n_rc!r}")
+        self.n_rc  = int(n_rc)
+        self.gamma = None
+        self.M     = None
+        self.M0    = None
+        self._Q_As = NASA_Q_NOMINAL * 3600.0
+        super().__init__(**kwargs)
+
+    def run(self, df, Q_nominal_Ah=NASA_Q_NOMINAL, verbose=False,
+            warm_start=None):
+        self._Q_As = Q_nominal_Ah * 3600.0
+        return super().run(df, Q_nominal_Ah=Q_nominal_Ah, verbose=verbose,
+                           warm_start=warm_start)
+
+    def _preprocess(self, df):
+        required = {"Voltage_measured", "Current_measured", "Time"}
+        missing = required - set(df.columns)
+        if missing:
+            raise ValueError(f"CSV missing required columns: {missing}")
+        df = df.sort_values("Time").reset_index(drop=True)
+        df = df.dropna(subset=list(required)).reset_index(drop=True)
+        if len(df) < 10:
+            return None
+        df["dt"] = df["Time"].diff().fillna(0).clip(lower=0)
+        return df
+
+    def _coulomb_count(self, df, Q_nominal_Ah):
+        """Signed coulomb counting; SOC = 1 where the trace is fullest."""
+        charge = cumulative_trapezoid(df["Current_measured"].values,
+                                      df["Time"].values, initial=0)
+        return np.clip(1.0 + (charge - charge.max()) / (Q_nominal_Ah * 3600.0),
+                       0.0, 1.0)
+
+    def _calibrate_ocv(self, df, soc):
+        """
+        Initial OCV polynomial. With both charge and discharge samples it
+        comes from one linear fit V = OCV(SOC) + R·I + M·s (s: hysteresis
+        sign), so the IR drop and branch offset of the two directions
+        cancel instead of being absorbed into the curve; otherwise as in
+        TheveninECM. _identify_parameters then refines it.
+        """
+        I = df["Current_measured"].values
+        s = _hysteresis_sign(I)
+        if self.ocv_table is not None or not s.min() < 0.0 < s.max():
+            return super()._calibrate_ocv(df, soc)
+        A = np.column_stack([np.vander(soc, _OCV_POLY_DEGREE + 1), I, s])
+        with np.errstate(all="ignore"):
+            coef = np.linalg.lstsq(A, df["Voltage_measured"].values, rcond=None)[0]
+        self._ocv_poly = coef[:_OCV_POLY_DEGREE + 1]
+
+    def _identify_parameters(self, df, soc, verbose, warm_start=None):
+        """
+        TheveninECM._identify_parameters, then one least-squares refinement
+        in which the OCV polynomial is refitted jointly with the parameters
+        (see _refine_least_squares). A fixed initial curve otherwise biases
+        M, M0 and R0. Skipped with a fixed ``ocv_table``.
+        """
+        super()._identify_parameters(df, soc, verbose, warm_start)
+        if self.ocv_table is not None:
+            return
+        V_meas  = df["Voltage_measured"].values
+        weights = df["Weight"].values if "Weight" in df.columns else None
+        basis   = np.vander(soc, _OCV_POLY_DEGREE + 1)
+        x, rmse = self._refine_least_squares(
+            df["Time"].values, df["Current_measured"].values, np.zeros(len(soc)),
+            V_meas, self._param_vector(), self._param_bounds(), weights,
+            ocv_basis=basis)
+        scale = _residual_scale(len(soc), weights)
+        dyn   = self._simulate(df["Time"].values, df["Current_measured"].values,
+                               soc, *x) - self.ocv(soc)
+        self._ocv_poly = np.linalg.lstsq(basis * scale[:, None],
+                                         (V_meas - dyn) * scale, rcond=None)[0]
+        self._set_params(x)
+        if verbose:
+            print(f"[ECM] Joint OCV refinement RMSE = {rmse*1000:.3f} mV")
+
+    def _simulate(self, time, current, soc, *x):
+        V = super()._simulate(time, current, soc, *x[:-3])
+        return V + _hysteresis_voltage(time, current, self._Q_As, *x[-3:])
+
+    def _make_cost(self, time, current, ocv_v, V_meas, weights=None):
+        return _ECMCost(time, current, ocv_v, V_meas, self.backend,
+                        Q_As=self._Q_As, weights=weights)
+
+    def _identify_closed_form(self, time, current, ocv_v, V_meas, weights=None):
+        x = super()._identify_closed_form(time, current, ocv_v, V_meas, weights)
+        return None if x is None else np.concatenate([x, _HYST_X0])
+
+    def _refine_least_squares(self, time, current, ocv_v, V_meas, x0, bounds,
+                              weights=None, ocv_basis=None):
+        """
+        TheveninECM._refine_least_squares with three more Jacobian
+        columns: dV/dgamma = M*dh/dgamma, dV/dM = h, dV/dM0 = s.
+
+        With ``ocv_basis`` (columns spanning the OCV curve, e.g. a
+        Vandermonde matrix in SOC) the OCV is solved jointly: residual and
+        Jacobian are projected onto the complement of the basis (variable
+        projection), so ``ocv_v`` only adds a fixed offset.
+        """
+        scale = _residual_scale(len(time), weights)
+        sign  = _hysteresis_sign(current)
+        cache = {}
+        proj  = lambda r: r
+        if ocv_basis is not None:
+            Q = np.linalg.qr(ocv_basis * scale[:, None])[0]
+            proj = lambda r: r - Q @ (Q.T @ r)
+
+        def evaluate(x):
+            key = tuple(x)
+            if cache.get("key") != key:
+                V_sim, J = _thevenin_sensitivities(time, current, ocv_v, x[:-3])
+                gamma, M, M0 = x[-3:]
+                h, dh = _hysteresis_state(time, current, self._Q_As, gamma,
+                                          sensitivity=True)
+                V_sim = V_sim + M * h + M0 * sign
+                cache["key"] = key
+                cache["r"]   = proj((V_sim - V_meas) * scale)
+                cache["J"]   = proj(np.column_stack([J, M * dh, h, sign])
+                                    * scale[:, None])
+            return cache
+
+        lo, hi = np.array(bounds, dtype=float).T
+        sol = least_squares(
+            lambda x: evaluate(x)["r"], np.clip(x0, lo, hi),
+            jac=lambda x: evaluate(x)["J"],
+            bounds=(lo, hi), method="trf", x_scale="jac",
+            ftol=1e-12, xtol=1e-12, gtol=1e-12, max_nfev=200,
+        )
+        return sol.x, float(np.sqrt(2.0 * sol.cost))
+
+    def _set_params(self, x):
+        super()._set_params(x[:-3])
+        self.gamma, self.M, self.M0 = (float(v) for v in x[-3:])
+
+    def _param_bounds(self):
+        return super()._param_bounds() + _HYST_BOUNDS
+
+    def _param_vector(self, params=None):
+        if params is None:
+            extra = [self.gamma, self.M, self.M0]
+        else:
+            extra = [params["gamma"], params["M_hyst_V"], params["M0_hyst_V"]]
+        return np.concatenate([super()._param_vector(params), extra])
+
+    def _params_dict(self):
+        params = super()._params_dict()
+        params["gamma"]     = round(self.gamma, 4)
+        params["M_hyst_V"]  = round(self.M, 6)
+        params["M0_hyst_V"] = round(self.M0, 6)
+        return params
+
+    def _jacobian(self, time, current, soc, x):
+        J = super()._jacobian(time, current, soc, x[:-3])
+        h, dh = _hysteresis_state(time, current, self._Q_As, x[-3],
+                                  sensitivity=True)
+        return np.column_stack([J, x[-2] * dh, h, _hysteresis_sign(current)])
+
+    def _derived_params(self, X):
+        out = super()._derived_params(X)
+        out["gamma"], out["M_hyst_V"], out["M0_hyst_V"] = X[:, -3], X[:, -2], X[:, -1]
+        return out
+
+
+class MultiCycleECM:
+    """
+    Joint 1RC identification across all discharge cycles of one battery.
+
+    Shared parameters : C1 and an OCV(SOC) table over ``ocv_breakpoints``
+                        (linear interpolation)
+    Per-cycle         : R0_c, R1_c
+
+    All cycles are concatenated into one series; the RC recurrence is reset
+    at every cycle start, so one prefix scan simulates every cycle at once.
+    The Jacobian is a sparse block matrix — each row touches C1, two OCV
+    entries and its own cycle's R0/R1 — solved with trust-region LSMR, so
+    fitting ~150 cycles costs about as much as a dozen independent fits.
+    Per-cycle starting values come from the closed-form fast stage.
+
+    As the cell fades, the same nominal-capacity SOC maps to a different
+    OCV, so by default each cycle's SOC is normalised by the charge it
+    actually delivered (1 -> 0 over the cycle) before the shared curve is
+    applied; a cycle stopped before cutoff uses the nearest full cycle's.
+
+    With near-constant discharge currents a common shift of the OCV table
+    trades exactly against R0·I in every cycle, so the table is pinned at
+    SOC = 1 to the rest voltage recorded just before each load step
+    (median over cycles); without it R0 drifts with the solver tolerance.
+
+    Parameters
+    ----------
+    ocv_breakpoints : array-like   SOC grid of the shared OCV table
+    normalize_soc : bool           Per-cycle SOC basis (True) or Q_nominal_Ah
+    tol : float                    ftol / xtol / gtol of the joint solve
+    """
+
+    _OCV_BOUNDS = (2.0, 4.5)     # V
+
+    def __init__(self, ocv_breakpoints=_SOC_LUT, normalize_soc=True, tol=1e-6):
+        self.ocv_breakpoints = np.asarray(ocv_breakpoints, dtype=float)
+        if self.ocv_breakpoints.ndim != 1 or len(self.ocv_breakpoints) < 2 \
+                or np.any(np.diff(self.ocv_breakpoints) <= 0):
+            raise ValueError("ocv_breakpoints must be strictly increasing "
+                             "with at least two points.")
+        self.normalize_soc   = normalize_soc
+        self.tol       = float(tol)
+        self.C1        = None
+        self.ocv_table = None
+        self.R0 = None              # (N,) per fitted cycle
+        self.R1 = None
+
+    def run(self, dfs, Q_nominal_Ah=NASA_Q_NOMINAL, verbose=False):
+        """
+        Parameters
+        ----------
+        dfs : list of pd.DataFrame   One discharge CSV per cycle, in order
+        Q_nominal_Ah : float         Cell rated capacity in Ah
+        verbose : bool               Print optimiser progress
+
+        Returns
+        -------
+        dict with keys:
+            shared  — {"C1_F", "soc_breakpoints", "ocv_table_V"}
+            cycles  — list aligned with dfs: a TheveninECM.run()-style
+                      result dict per cycle, or None for a skipped cycle
+            skipped — {index in dfs: reason} for cycles left out (missing
+                      columns, too few discharge samples)
+            metrics — metrics over all cycles together
+        """
+        helper = TheveninECM()
+        frames, index, anchors, skipped = [], [], [], {}
+        for i, raw in enumerate(dfs):
+            try:
+                df = helper._preprocess(raw)
+            except ValueError as exc:
+                skipped[i] = str(exc)
+                continue
+            if df is None or len(df) < 10:
+                skipped[i] = "Too few discharge samples after preprocessing."
+                continue
+            frames.append(df)
+            index.append(i)
+            anchors.append(_full_charge_ocv(raw, df))
+        if not frames:
+            raise ValueError("No cycle has enough discharge samples.")
+        Q = (self._delivered_charge(frames) if self.normalize_soc
+             else np.full(len(frames), float(Q_nominal_Ah)))
+        cycles = [(df, helper._coulomb_count(df, q)) for df, q in zip(frames, Q)]
+
+        z0 = self._initial_guess(cycles, helper)
+        problem = _JointCycleProblem(cycles, self.ocv_breakpoints, np.median(anchors))
+
+        n_cyc = len(cycles)
+        m     = len(self.ocv_breakpoints)
+        (r0_lo, r0_hi), (r1_lo, r1_hi), (c1_lo, c1_hi) = TheveninECM._BOUNDS
+        lo = np.concatenate([[c1_lo], np.full(m, self._OCV_BOUNDS[0]),
+                             np.full(n_cyc, r0_lo), np.full(n_cyc, r1_lo)])
+        hi = np.concatenate([[c1_hi], np.full(m, self._OCV_BOUNDS[1]),
+                             np.full(n_cyc, r0_hi), np.full(n_cyc, r1_hi)])
+
+        if verbose:
+            print(f"[ECM] Joint fit — {n_cyc} cycles, {len(z0)} parameters, "
+                  f"{problem.n} samples")
+        sol = least_squares(
+            problem.residual, np.clip(z0, lo, hi), jac=problem.jacobian,
+            bounds=(lo, hi), method="trf", tr_solver="lsmr", x_scale="jac",
+            ftol=self.tol, xtol=self.tol, gtol=self.tol, max_nfev=200,
+        )
+        if verbose:
+            print(f"[ECM] Joint RMSE = {np.sqrt(2.0 * sol.cost)*1000:.3f} mV "
+                  f"({sol.nfev} evaluations)")
+
+        z = sol.x
+        self.C1        = float(z[0])
+        self.ocv_table = z[1:1 + m].copy()
+        self.R0        = z[1 + m:1 + m + n_cyc].copy()
+        self.R1        = z[1 + m + n_cyc:].copy()
+
+        V_all = problem.simulate(z)
+        results = [None] * len(dfs)
+        for c, ((df, soc), sl) in enumerate(zip(cycles, problem.slices)):
+            V_meas = df["Voltage_measured"].values
+            res = {
+                "params": {
+                    "R0_ohm": round(float(self.R0[c]), 6),
+                    "R1_ohm": round(float(self.R1[c]), 6),
+                    "C1_F":   round(self.C1, 4),
+                    "tau_s":  round(float(self.R1[c]) * self.C1, 4),
+                },
+                "metrics":     TheveninECM._compute_metrics(V_meas, V_all[sl]),
+                "time":        df["Time"].values,
+                "V_measured":  V_meas,
+                "V_simulated": V_all[sl],
+                "soc":         soc,
+                "current":     df["Current_measured"].values,
+                "Q_nominal_Ah": Q_nominal_Ah,
+            }
+            if "Temperature_measured" in df.columns:
+                res["temperature"] = df["Temperature_measured"].values
+            results[index[c]] = res
+
+        return {
+            "shared": {
+                "C1_F":            round(self.C1, 4),
+                "soc_breakpoints": self.ocv_breakpoints.round(4).tolist(),
+                "ocv_table_V":     self.ocv_table.round(6).tolist(),
+            },
+            "cycles":  results,
+            "skipped": skipped,
+            "metrics": TheveninECM._compute_metrics(problem.V_meas, V_all),
+        }
+
+    @staticmethod
+    def _delivered_charge(frames):
+        """
+        Per-cycle SOC basis [Ah]: the charge each cycle delivered. A cycle
+        stopped more than _JOINT_PARTIAL_DV above the median end voltage
+        did not reach cutoff; it takes the basis of the nearest full cycle.
+        """
+        Q = np.array([cumulative_trapezoid(np.abs(df["Current_measured"].values),
+                                           df["Time"].values)[-1] / 3600.0
+                      for df in frames])
+        V_end = np.array([df["Voltage_measured"].values[-1] for df in frames])
+        full  = np.flatnonzero(V_end <= np.median(V_end) + _JOINT_PARTIAL_DV)
+        for c in np.setdiff1d(np.arange(len(frames)), full):
+            Q[c] = Q[full[np.argmin(np.abs(full - c))]]
+        return Q
+
+    def _initial_guess(self, cycles, helper):
+        """Per-cycle closed-form fits -> (C1, OCV table, R0s, R1s)."""
+        bp = self.ocv_breakpoints
+        x_list, ocv_rows = [], []
+        for df, soc in cycles:
+            helper._calibrate_ocv(df, soc)
+            ocv_v = helper.ocv(soc)
+            x = helper._identify_closed_form(
+                df["Time"].values, df["Current_measured"].values,
+                ocv_v, df["Voltage_measured"].values)
+            if x is None:
+                x = np.array([0.08, 0.02, 1000.0])
+            x_list.append(x)
+            # OCV guess only where this cycle actually has data
+            row = np.where((bp >= soc.min()) & (bp <= soc.max()),
+                           helper.ocv(bp), np.nan)
+            ocv_rows.append(row)
+
+        X    = np.array(x_list)
+        rows = np.array(ocv_rows)
+        seen = np.isfinite(rows).any(axis=0)
+        if seen.any():
+            table = np.interp(bp, bp[seen], np.nanmedian(rows[:, seen], axis=0))
+        else:
+            table = np.interp(bp, _SOC_LUT, _OCV_LUT)
+        return np.concatenate([[np.median(X[:, 2])], table, X[:, 0], X[:, 1]])
+
+
+class _JointCycleProblem:
+    """
+    Residuals and sparse Jacobian for MultiCycleECM.
+
+    Parameter vector z = [C1, ocv_table (m), R0 (N), R1 (N)]. The residual
+    is (V_sim - V_meas)/sqrt(n) over the concatenation of all cycles.
+    """
+
+    def __init__(self, cycles, breakpoints, ocv_anchor):
+        self.slices, start = [], 0
+        for df, _ in cycles:
+            self.slices.append(slice(start, start + len(df)))
+            start += len(df)
+        self.n     = start
+        self.m     = len(breakpoints)
+        self.n_cyc = len(cycles)
+        self.scale = 1.0 / np.sqrt(self.n)
+
+        cat = lambda col: np.concatenate([df[col].values for df, _ in cycles])
+        self.time    = cat("Time")
+        self.current = cat("Current_measured")
+        self.V_meas  = cat("Voltage_measured")
+        soc = np.concatenate([s for _, s in cycles])
+        self.idx, self.frac = _soc_interp_weights(soc, breakpoints)
+
+        self.cycle_of = np.repeat(np.arange(self.n_cyc),
+                                  [sl.stop - sl.start for sl in self.slices])
+        # Step k-1 -> k crosses a cycle boundary at each cycle start
+        self.start = np.zeros(self.n, dtype=bool)
+        self.start[[sl.start for sl in self.slices]] = True
+        dt = np.concatenate([[0.0], np.diff(self.time)])
+        self.dt = np.where(self.start, 0.0, np.maximum(dt, 1e-6))
+        self.I_prev = np.where(self.start, 0.0,
+                               np.concatenate([[0.0], self.current[:-1]]))
+
+        rows = np.arange(self.n)
+        self._ocv_W = sparse.csr_matrix(
+            (np.concatenate([1.0 - self.frac, self.frac]),
+             (np.concatenate([rows, rows]),
+              np.concatenate([self.idx, self.idx + 1]))),
+            shape=(self.n, self.m))
+        # OCV(SOC = 1) pinned to ocv_anchor by one extra residual row
+        self.anchor = float(ocv_anchor)
+        a_idx, a_frac = _soc_interp_weights(np.ones(1), breakpoints)
+        self._anchor_w = np.zeros(self.m)
+        self._anchor_w[[a_idx[0], a_idx[0] + 1]] = [1.0 - a_frac[0], a_frac[0]]
+        self._key = None
+
+    def _unpack(self, z):
+        m, N = self.m, self.n_cyc
+        return z[0], z[1:1 + m], z[1 + m:1 + m + N], z[1 + m + N:]
+
+    def _evaluate(self, z):
+        key = tuple(z)
+        if self._key == key:
+            return
+        C1, table, R0, R1 = self._unpack(z)
+        R0_k = R0[self.cycle_of]
+        R1_k = R1[self.cycle_of]
+        tau  = R1_k * C1
+        alpha = np.where(self.start, 0.0, np.exp(-self.dt / tau))
+        v = _linear_recurrence(alpha, R1_k * (1.0 - alpha) * self.I_prev)
+        v_prev = np.concatenate([[0.0], v[:-1]])
+        dalpha = alpha * self.dt / tau ** 2
+        s = _linear_recurrence(alpha, dalpha * (v_prev - R1_k * self.I_prev))
+        g = _linear_recurrence(alpha, (1.0 - alpha) * self.I_prev)
+
+        ocv_v = table[self.idx] * (1.0 - self.frac) + table[self.idx + 1] * self.frac
+        self._V   = ocv_v + self.current * R0_k + v
+        self._dC1 = R1_k * s
+        self._dR1 = g + C1 * s
+        self._key = key
+
+    def simulate(self, z):
+        self._evaluate(z)
+        return self._V.copy()
+
+    def residual(self, z):
+        self._evaluate(z)
+        table = self._unpack(z)[1]
+        return np.append((self._V - self.V_meas) * self.scale,
+                         self._anchor_w @ table - self.anchor)
+
+    def jacobian(self, z):
+        self._evaluate(z)
+        rows = np.arange(self.n)
+        J_c1  = sparse.csr_matrix(self._dC1[:, None])
+        J_r   = sparse.csr_matrix(
+            (np.concatenate([self.current, self._dR1]),
+             (np.concatenate([rows, rows]),
+              np.concatenate([self.cycle_of, self.n_cyc + self.cycle_of]))),
+            shape=(self.n, 2 * self.n_cyc))
+        J_a = sparse.csr_matrix(np.concatenate(
+            [[0.0], self._anchor_w, np.zeros(2 * self.n_cyc)])[None, :])
+        return sparse.vstack([
+            sparse.hstack([J_c1, self._ocv_W, J_r]) * self.scale, J_a], format="csr")
+
+
+def _full_charge_ocv(raw, df):
+    """
+    OCV at the start of a discharge (SOC = 1): the last rest sample before
+    the load is applied, else the first loaded sample IR-corrected with
+    _coarse_r0 as in TheveninECM._calibrate_ocv.
+    """
+    raw = raw.sort_values("Time")
+    I = raw["Current_measured"].values
+    V = raw["Voltage_measured"].values
+    on = np.flatnonzero(I < -0.1)
+    if on.size and on[0] > 0 and abs(I[on[0] - 1]) < 0.1:
+        return float(V[on[0] - 1])
+    I = df["Current_measured"].values
+    V = df["Voltage_measured"].values
+    return float(V[0] - I[0] * _coarse_r0(I, V))
+
+
+def _coarse_r0(I, V):
+    """R0 estimate from the first current steps (0.10 Ω if there are none)."""
+    dV = np.abs(np.diff(V[:6]))
+    dI = np.abs(np.diff(I[:6]))
+    mask = dI > 0.05
+    return float(np.clip(
+        np.median(dV[mask] / dI[mask]) if mask.any() else 0.10,
+        0.01, 0.30
+    ))
+
+
+def make_ecm(n_rc=1, **kwargs):
+    """TheveninECM for n_rc == 1, NRCTheveninECM otherwise."""
+    if n_rc == 1:
+        return TheveninECM(**kwargs)
+    return NRCTheveninECM(n_rc=n_rc, **kwargs)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  FLEET SIMULATION
+# ─────────────────────────────────────────────────────────────────────────────
+
+def simulate_fleet(current, time, R0, branches, ocv_poly,
+                   Q_nominal_Ah=NASA_Q_NOMINAL, soc0=1.0, lengths=None,
+                   max_bytes=_FLEET_MAX_BYTES, return_soc=False):
+    """
+    Forward-simulate many cells with their own parameters and profiles.
+
+    Cells are processed in chunks sized to ``max_bytes`` of working memory;
+    within a chunk every cell is simulated at once by the vectorized ZOH
+    kernel (one prefix scan per RC branch over a (cells, samples) array).
+    Cells are sorted by profile length first, so a chunk of short ragged
+    profiles is only padded to its own longest member.
+
+    SOC follows the signed NASA convention (discharge current negative):
+    SOC = soc0 + ∫I dt / (3600·Q), clipped to [0, 1].
+
+    Parameters
+    ----------
+    current : array (n_cells, T) or list of 1-D arrays
+                                  Padded or ragged current profiles [A]
+    time : float, array (T,), array (n_cells, T) or list of 1-D arrays
+                                  Uniform step [s], shared time axis, or
+                                  per-cell time stamps
+    R0 : float or array (n_cells,)
+    branches : list of (R, C)     RC pairs; R and C float or (n_cells,)
+    ocv_poly : array (deg+1,) or (n_cells, deg+1)
+                                  OCV(SOC) polynomial, highest power first
+    Q_nominal_Ah, soc0 : float or array (n_cells,)
+    lengths : array (n_cells,)    Valid samples per padded row (default:
+                                  all, or the ragged lengths)
+    max_bytes : int               Working-memory budget per chunk
+    return_soc : bool             Also return the SOC traces
+
+    Returns
+    -------
+    V (and SOC) as (n_cells, T) arrays with NaN past each cell's length,
+    or lists of 1-D arrays when ``current`` was ragged.
+    """
+    ragged = isinstance(current, (list, tuple))
+    I, n_valid = _pad_profiles(current, lengths)
+    n, T = I.shape
+    if not branches:
+        raise ValueError("At least one RC branch is required.")
+
+    if ragged and isinstance(time, (list, tuple)):
+        t, _ = _pad_profiles(time, n_valid)
+    else:
+        t = np.asarray(time, dtype=float)
+        if t.ndim == 0:
+            t = np.arange(T) * float(t)
+        if t.shape[-1] != T:
+            raise ValueError(f"time has {t.shape[-1]} samples, current has {T}.")
+    t = np.broadcast_to(t, (n, T))
+
+    per_cell = lambda v: np.broadcast_to(np.asarray(v, dtype=float), (n,))
+    R0   = per_cell(R0)
+    brs  = [(per_cell(R), per_cell(C)) for R, C in branches]
+    Q_As = per_cell(Q_nominal_Ah) * 3600.0
+    soc0 = per_cell(soc0)
+    coef = np.asarray(ocv_poly, dtype=float)
+    coef = np.broadcast_to(coef, (n, coef.shape[-1]))
+
+    V   = np.full((n, T), np.nan)
+    SOC = np.full((n, T), np.nan) if return_soc else None
+
+    order = np.argsort(n_valid, kind="stable")
+    rows  = max(1, int(max_bytes // (_FLEET_TEMPORARIES * 8 * max(T, 1))))
+    for start in range(0, n, rows):
+        idx = order[start:start + rows]
+        Tc  = int(n_valid[idx].max())
+        if Tc == 0:
+            continue
+        Ic, tc = I[idx, :Tc], t[idx, :Tc]
+        soc = np.clip(soc0[idx, None] + cumulative_trapezoid(Ic, tc, axis=1, initial=0)
+                      / Q_As[idx, None], 0.0, 1.0)
+        Vc = coef[idx, :1]
+        for j in range(1, coef.shape[1]):
+            Vc = Vc * soc + coef[idx, j:j + 1]
+        Vc = Vc + Ic * R0[idx, None]
+        for R, C in brs:
+            Vc += _rc_response(tc, Ic, R[idx, None], C[idx, None])
+
+        mask = np.arange(Tc) < n_valid[idx, None]
+        V[idx, :Tc] = np.where(mask, Vc, np.nan)
+        if return_soc:
+            SOC[idx, :Tc] = np.where(mask, soc, np.nan)
+
+    if ragged:
+        V = [V[i, :n_valid[i]] for i in range(n)]
+        if return_soc:
+            SOC = [SOC[i, :n_valid[i]] for i in range(n)]
+    return (V, SOC) if return_soc else V
+
+
+def _pad_profiles(profiles, lengths=None):
+    """(n, T) float array zero-padded from a list or 2-D array, plus lengths."""
+    if isinstance(profiles, (list, tuple)):
+        seqs  = [np.asarray(p, dtype=float).ravel() for p in profiles]
+        n_val = np.array([len(p) for p in seqs], dtype=int)
+        out   = np.zeros((len(seqs), n_val.max() if len(seqs) else 0))
+        for i, p in enumerate(seqs):
+            out[i, :len(p)] = p
+    else:
+        out = np.atleast_2d(np.asarray(profiles, dtype=float))
+        n_val = np.full(out.shape[0], out.shape[1], dtype=int)
+    if lengths is not None:
+        n_val = np.minimum(np.broadcast_to(np.asarray(lengths, dtype=int),
+                                           n_val.shape), out.shape[1])
+    # Padding must not inject NaN into the scan
+    out = np.where(np.arange(out.shape[1]) < n_val[:, None], out, 0.0)
+    return np.nan_to_num(out), n_val
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  SIMULATION KERNELS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _linear_recurrence(a, b):
+    """
+    Solve x[k] = a[k]*x[k-1] + b[k]  (x[-1] = 0) along the last axis.
+
+    Log-depth doubling scan: each pass composes the affine maps of
+    neighbouring windows, so the whole recurrence costs ~log2(n) array
+    operations instead of n Python iterations. Only products of a[k] are
+    formed (never divisions), so it is stable for any 0 <= a[k] <= 1.
+    Leading axes broadcast, e.g. (population, n) solves many at once.
+    """
+    a = np.array(a, dtype=float)
+    x = np.array(b, dtype=float)
+    a, x = np.broadcast_arrays(a, x)
+    a, x = a.copy(), x.copy()
+    n = x.shape[-1]
+    shift = 1
+    while shift < n:
+        x[..., shift:] = x[..., shift:] + a[..., shift:] * x[..., :-shift]
+        a[..., shift:] = a[..., shift:] * a[..., :-shift]
+        shift *= 2
+    return x
+
+
+def _first_order(alpha, b):
+    """
+    x[k] = alpha[k]*x[k-1] + b[k] with b[0] carrying the initial value.
+
+    ``alpha`` is either the full (..., n-1) coefficient array or, on a
+    uniform time grid, constant along the last axis — a scalar or shape
+    (..., 1). Constant coefficients run as compiled IIR filters (one per
+    row), anything else goes through the prefix scan with a[0] = 0.
+    """
+    alpha = np.asarray(alpha, dtype=float)
+    if alpha.ndim == 0:
+        return lfilter([1.0], [1.0, -float(alpha)], b)
+    if alpha.shape[-1] == 1 and b.shape[-1] > 1:
+        b   = np.broadcast_to(b, np.broadcast_shapes(alpha.shape[:-1] + (1,), b.shape))
+        a_r = np.broadcast_to(alpha, b.shape[:-1] + (1,)).reshape(-1)
+        out = np.empty(b.shape)
+        flat_b, flat_o = b.reshape(-1, b.shape[-1]), out.reshape(-1, b.shape[-1])
+        for i, a in enumerate(a_r):
+            flat_o[i] = lfilter([1.0], [1.0, -a], flat_b[i])
+        return out
+    a = np.concatenate([np.zeros(alpha.shape[:-1] + (1,)), alpha], axis=-1)
+    return _linear_recurrence(a, b)
+
+
+def _uniform_step(time):
+    """dt as a length-1 array when the grid is uniform, else the full diff."""
+    dt = np.maximum(np.diff(time), 1e-6)
+    if dt.ndim == 1 and dt.size and np.ptp(dt) <= 1e-9 * dt[0]:
+        return dt[:1]
+    return dt
+
+
+def _rc_response(time, current, R1, C1):
+    """
+    V_RC trace of one RC branch under ZOH current (V_RC[0] = 0).
+
+    R1 / C1 may be scalars or arrays shaped to broadcast against
+    ``time`` (e.g. (P, 1) for P candidate parameter sets). On a uniform
+    time grid the decay factor is computed once per parameter set.
+    """
+    R1  = np.asarray(R1, dtype=float)
+    tau = R1 * np.asarray(C1, dtype=float)
+    dt  = _uniform_step(time)
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        alpha = np.where(tau > 1e-9, np.exp(-dt / np.where(tau > 1e-9, tau, 1.0)), 0.0)
+    b = current[..., :-1] * R1 * (1.0 - alpha)
+    b = np.concatenate([np.zeros(b.shape[:-1] + (1,)), b], axis=-1)
+    if alpha.shape[-1] == 1:                    # uniform grid: IIR per row
+        return _first_order(alpha.item() if alpha.size == 1 else alpha, b)
+    return _first_order(np.broadcast_to(alpha, b[..., 1:].shape), b)
+
+
+def _rc_sensitivities(time, current, R1, C1):
+    """
+    V_RC trace plus its exact derivatives w.r.t. R1 and C1.
+
+    With alpha[k] = exp(-dt[k]/tau) and tau = R1*C1, differentiating the
+    ZOH recurrence gives two more first-order recurrences of the same form:
+
+      s[k] = alpha[k]*s[k-1] + alpha[k]*dt[k]/tau^2 * (V_RC[k-1] - R1*I[k-1])
+      g[k] = alpha[k]*g[k-1] + (1 - alpha[k]) * I[k-1]
+
+    where s = dV_RC/dtau and g = dV_RC/dR1 at fixed tau. Then
+      dV_RC/dR1 = g + C1*s,   dV_RC/dC1 = R1*s.
+
+    Returns (v_rc, dv_dR1, dv_dC1).
+    """
+    tau = R1 * C1
+    dt  = _uniform_step(time)
+    alpha  = np.exp(-dt / tau) if tau > 1e-9 else np.zeros_like(dt)
+    dalpha = alpha * dt / tau ** 2 if tau > 1e-9 else np.zeros_like(dt)
+    a = alpha.item() if alpha.size == 1 else alpha     # uniform: IIR filter
+
+    v_rc = _first_order(
+        a, np.concatenate([[0.0], current[:-1] * R1 * (1.0 - alpha)]))
+    s = _first_order(
+        a, np.concatenate([[0.0], dalpha * (v_rc[:-1] - R1 * current[:-1])]))
+    g = _first_order(
+        a, np.concatenate([[0.0], (1.0 - alpha) * current[:-1]]))
+    return v_rc, g + C1 * s, R1 * s
+
+
+def _thevenin_sensitivities(time, current, ocv_v, x):
+    """
+    Simulated voltage and Jacobian (n, 1 + 2*n_rc) for x = [R0, R1, C1, ...];
+    each RC branch contributes its own pair of _rc_sensitivities columns.
+    """
+    V_sim = ocv_v + current * x[0]
+    cols  = [current]
+    for R, C in zip(x[1::2], x[2::2]):
+        v_rc, dR, dC = _rc_sensitivities(time, current, R, C)
+        V_sim = V_sim + v_rc
+        cols += [dR, dC]
+    return V_sim, np.column_stack(cols)
+
+
+def _residual_inflation(resid):
+    """
+    Variance inflation (1+rho)/(1-rho) of a residual trace with lag-1
+    autocorrelation rho (clipped to [0, _MAX_RESID_CORR]), i.e. n / n_eff.
+    """
+    r  = resid - resid.mean()
+    ss = r @ r
+    rho = float(np.clip((r[1:] @ r[:-1]) / ss, 0.0, _MAX_RESID_CORR)) if ss > 0 else 0.0
+    return (1.0 + rho) / (1.0 - rho)
+
+
+def _gauss_newton_covariance(J, resid, p):
+    """
+    s²(JᵀJ)⁻¹ with s² = SSE / (n - p), inverted on unit-norm columns;
+    parameters the trace does not excite at all get NaN variance.
+    """
+    s2    = (resid @ resid) / max(len(resid) - p, 1)
+    norms = np.linalg.norm(J, axis=0)
+    ok    = norms > 0
+    Js    = J[:, ok] / norms[ok]
+    try:
+        inv = np.linalg.inv(Js.T @ Js)
+    except np.linalg.LinAlgError:
+        inv = np.linalg.pinv(Js.T @ Js, hermitian=True)
+    cov = np.full((p, p), np.nan)
+    cov[np.ix_(ok, ok)] = s2 * inv / np.outer(norms[ok], norms[ok])
+    return cov
+
+
+def _decimation_indices(time, voltage, current, v_tol, i_tol):
+    """
+    Sorted indices of the samples kept by adaptive decimation.
+
+    Douglas–Peucker on the voltage trace: a span is split at its worst
+    sample until linear interpolation between the kept endpoints is within
+    ``v_tol`` everywhere. A span is also split while the current inside it
+    departs from the (held) current at its start by more than ``i_tol``,
+    so the ZOH input on the thinned grid stays faithful.
+    """
+    n = len(time)
+    keep  = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    stack = [(0, n - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo < 2:
+            continue
+        seg  = slice(lo + 1, hi)
+        frac = (time[seg] - time[lo]) / max(time[hi] - time[lo], 1e-12)
+        v_err = np.abs(voltage[seg] - (voltage[lo] + frac * (voltage[hi] - voltage[lo])))
+        i_err = np.abs(current[seg] - current[lo])
+        score = np.maximum(v_err / v_tol, i_err / i_tol)
+        k = int(np.argmax(score))
+        if score[k] > 1.0:
+            mid = lo + 1 + k
+            keep[mid] = True
+            stack += [(lo, mid), (mid, hi)]
+    return np.flatnonzero(keep)
+
+
+def _informative_samples(time, voltage, current):
+    """
+    Indices and weights of the samples kept by segment selection.
+
+    Kept at full resolution: _SEG_PRE_S before to _SEG_WINDOW_S after
+    every current step of at least _SEG_STEP_A (the start of the trace
+    counts as one, a step to rest covers the relaxation tail), and
+    knees — where |dV/dt| over _SEG_KNEE_SPAN_S exceeds _SEG_KNEE_FACTOR
+    times its median — widened by half a window. Elsewhere one anchor is
+    kept per _SEG_ANCHOR_S so the OCV drift stays pinned down. Each kept
+    sample is weighted by the span of the trace it stands for relative to
+    an original sample, normalised to mean 1, so the weighted RMSE tracks
+    the full-trace RMSE.
+    """
+    n = len(time)
+    steps = np.flatnonzero(np.abs(np.diff(current)) >= _SEG_STEP_A) + 1
+    events = [(time[0], time[0] + _SEG_WINDOW_S)]
+    events += [(time[k] - _SEG_PRE_S, time[k] + _SEG_WINDOW_S) for k in steps]
+
+    half  = 0.5 * _SEG_KNEE_SPAN_S
+    slope = np.abs(np.interp(time + half, time, voltage)
+                   - np.interp(time - half, time, voltage)) / _SEG_KNEE_SPAN_S
+    knees = np.flatnonzero(slope > _SEG_KNEE_FACTOR * np.median(slope))
+    events += [(time[k] - 0.5 * _SEG_WINDOW_S, time[k] + 0.5 * _SEG_WINDOW_S)
+               for k in knees]
+
+    lo, hi = np.array(events).T
+    mark = np.zeros(n + 1)
+    np.add.at(mark, np.searchsorted(time, lo), 1)
+    np.add.at(mark, np.searchsorted(time, hi, side="right"), -1)
+    keep = np.cumsum(mark[:n]) > 0
+
+    bins = np.floor((time - time[0]) / _SEG_ANCHOR_S)
+    bulk = np.flatnonzero(~keep)
+    if bulk.size:
+        keep[bulk[np.r_[True, np.diff(bins[bulk]) > 0]]] = True
+    keep[[0, n - 1]] = True
+    idx = np.flatnonzero(keep)
+
+    def span(t):
+        gap = np.diff(t)
+        return np.concatenate([gap, [0.0]]) + np.concatenate([[0.0], gap])
+
+    weight = span(time[idx]) / np.maximum(span(time)[idx], 1e-12)
+    return idx, weight / weight.mean()
+
+
+def _residual_scale(n, weights=None):
+    """Per-sample residual scale sqrt(w/n) of the least-squares refinements."""
+    return np.sqrt((np.ones(n) if weights is None else weights) / n)
+
+
+def _hysteresis_sign(current):
+    """Sign of the most recent |I| > _HYST_I_THRESH (0 before the first)."""
+    sign = np.where(np.abs(current) > _HYST_I_THRESH, np.sign(current), 0.0)
+    last = np.where(sign != 0.0, np.arange(sign.shape[-1]), 0)
+    return np.take_along_axis(sign, np.maximum.accumulate(last, axis=-1), axis=-1)
+
+
+def _hysteresis_state(time, current, Q_As, gamma, sensitivity=False):
+    """
+    Dynamic hysteresis state h (h[0] = 0), optionally with dh/dgamma.
+
+    ``gamma`` may be a scalar or (P, 1) for a population. The sensitivity
+    d[k] = a[k]*d[k-1] - c[k]*a[k]*(h[k-1] - sgn(I[k-1])), with
+    c[k] = |I[k-1]|*dt[k]/Q, is a recurrence of the same form.
+    """
+    dt  = np.maximum(np.diff(time), 1e-6)
+    c   = np.abs(current[:-1]) * dt / Q_As
+    sgn = np.sign(current[:-1])
+    a   = np.exp(-np.asarray(gamma, dtype=float) * c)
+    pad = np.zeros(a.shape[:-1] + (1,))
+    h   = _first_order(a, np.concatenate([pad, (1.0 - a) * sgn], axis=-1))
+    if not sensitivity:
+        return h
+    db = np.concatenate([pad, -c * a * (h[..., :-1] - sgn)], axis=-1)
+    return h, _first_order(a, db)
+
+
+def _hysteresis_voltage(time, current, Q_As, gamma, M, M0):
+    """M*h + M0*s for one parameter set or a (P, 1)-shaped population."""
+    h = _hysteresis_state(time, current, Q_As, gamma)
+    return np.asarray(M) * h + np.asarray(M0) * _hysteresis_sign(current)
+
+
+def _zoh_vectorized(time, current, ocv_v, R0, *branches):
+    """
+    Vectorized terminal voltage given a precomputed OCV trace.
+    ``branches`` = R1, C1[, R2, C2, ...]; the branch responses are summed.
+    """
+    V_t = ocv_v + current * np.asarray(R0, dtype=float)
+    for R, C in zip(branches[0::2], branches[1::2]):
+        V_t = V_t + _rc_response(time, current, R, C)
+    return V_t
+
+
+def _zoh_loop(time, current, ocv_v, R0, *branches):
+    """Reference per-sample ZOH loop (slow; used to cross-check)."""
+    n   = len(time)
+    V_t = ocv_v + current * R0
+
+    for R1, C1 in zip(branches[0::2], branches[1::2]):
+        tau  = R1 * C1
+        V_RC = np.zeros(n)
+        for k in range(1, n):
+            dt    = max(float(time[k] - time[k-1]), 1e-6)
+            alpha = np.exp(-dt / tau) if tau > 1e-9 else 0.0
+            V_RC[k] = V_RC[k-1] * alpha + current[k-1] * R1 * (1.0 - alpha)
+        V_t = V_t + V_RC
+
+    return V_t
+
+
+_SIM_KERNELS = {"vectorized": _zoh_vectorized, "loop": _zoh_loop}
+
+
+def _soc_interp_weights(soc, breakpoints):
+    """
+    Linear-interpolation weights of soc on the breakpoint grid: sample k
+    mixes breakpoints idx[k] and idx[k]+1 with weights (1-frac[k], frac[k]).
+    """
+    soc = np.clip(soc, breakpoints[0], breakpoints[-1])
+    idx = np.clip(np.searchsorted(breakpoints, soc, side="right") - 1,
+                  0, len(breakpoints) - 2)
+    frac = (soc - breakpoints[idx]) / (breakpoints[idx + 1] - breakpoints[idx])
+    return idx, frac
+
+
+def _interp_maps(maps, idx, frac):
+    """Per-sample parameter traces (rows of maps) at the interpolated SOC."""
+    return maps[:, idx] * (1.0 - frac) + maps[:, idx + 1] * frac
+
+
+def _zoh_soc_map(time, current, ocv_v, idx, frac, maps):
+    """1RC ZOH voltage with R0/R1/C1 taken from SOC tables at every step."""
+    return _soc_map_sensitivities(time, current, ocv_v, idx, frac, maps,
+                                  jacobian=False)[0]
+
+
+def _soc_map_sensitivities(time, current, ocv_v, idx, frac, maps, jacobian=True):
+    """
+    Voltage and Jacobian for SOC-tabulated parameters.
+
+    The RC step from k-1 to k uses rho = R1(SOC[k-1]) and c = C1(SOC[k-1]):
+      x[k] = alpha[k]*x[k-1] + rho*(1 - alpha[k])*I[k-1],  tau = rho*c
+    A table entry theta_j enters only through rho or c of the steps whose
+    SOC lies next to breakpoint j, so dx/dtheta_j obeys the same
+    recurrence driven by  w[k-1, j] * forcing[k]  with
+      forcing_R1 = (dalpha/dtau)*c*(x[k-1] - rho*I[k-1]) + (1-alpha)*I[k-1]
+      forcing_C1 = (dalpha/dtau)*rho*(x[k-1] - rho*I[k-1])
+    All m columns of a table are solved as one (m, n) scan.
+
+    Returns (V_sim, J) with J of shape (n, 3*m) ordered [R0 | R1 | C1].
+    """
+    m = maps.shape[1]
+    R0_k, R1_k, C1_k = _interp_maps(maps, idx, frac)
+    rho, c = R1_k[:-1], C1_k[:-1]
+    tau = rho * c
+    dt  = np.maximum(np.diff(time), 1e-6)
+    alpha = np.exp(-dt / tau)
+    a = np.concatenate([[0.0], alpha])
+
+    x = _linear_recurrence(
+        a, np.concatenate([[0.0], rho * (1.0 - alpha) * current[:-1]]))
+    V_sim = ocv_v + current * R0_k + x
+    if not jacobian:
+        return V_sim, None
+
+    # Interpolation weights as a dense (m, n) matrix (two non-zeros/column)
+    W = np.zeros((m, len(time)))
+    cols = np.arange(len(time))
+    W[idx, cols]     += 1.0 - frac
+    W[idx + 1, cols] += frac
+
+    dalpha = alpha * dt / tau ** 2
+    drive  = x[:-1] - rho * current[:-1]
+    f_R1 = dalpha * c * drive + (1.0 - alpha) * current[:-1]
+    f_C1 = dalpha * rho * drive
+    pad  = np.zeros((m, 1))
+    S_R1 = _linear_recurrence(a, np.concatenate([pad, W[:, :-1] * f_R1], axis=1))
+    S_C1 = _linear_recurrence(a, np.concatenate([pad, W[:, :-1] * f_C1], axis=1))
+
+    J = np.concatenate([(W * current).T, S_R1.T, S_C1.T], axis=1)
+    return V_sim, J
+
+
+class _ECMCost:
+    """
+    Picklable RMSE objective for Differential Evolution.
+
+    Holds the (fixed) input arrays and the precomputed OCV trace, so it can
+    be shipped to worker processes. Accepts a single candidate x of shape
+    (p,) or, for DE's vectorized mode, a population of shape (p, S), with
+    p = 1 + 2*n_rc, plus trailing (gamma, M, M0) when ``Q_As`` is given
+    (HysteresisECM). With ``weights`` (mean 1) the squared errors are
+    weighted per sample.
+    """
+
+    def __init__(self, time, current, ocv_v, V_meas, backend="vectorized",
+                 Q_As=None, weights=None):
+        self.time    = time
+        self.current = current
+        self.ocv_v   = ocv_v
+        self.V_meas  = V_meas
+        self.backend = backend
+        self.Q_As    = Q_As
+        self.weights = 1.0 if weights is None else weights
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        if x.ndim == 1:
+            x, hyst = (x[:-3], x[-3:]) if self.Q_As is not None else (x, None)
+            V_sim = _SIM_KERNELS[self.backend](
+                self.time, self.current, self.ocv_v, *x)
+            if hyst is not None:
+                V_sim = V_sim + _hysteresis_voltage(
+                    self.time, self.current, self.Q_As, *hyst)
+            return float(np.sqrt(np.mean(self.weights * (V_sim - self.V_meas) ** 2)))
+        rows = [row[:, None] for row in x]
+        if self.Q_As is not None:
+            rows, hyst = rows[:-3], rows[-3:]
+        V_sim = _zoh_vectorized(self.time, self.current, self.ocv_v, *rows)
+        if self.Q_As is not None:
+            V_sim = V_sim + _hysteresis_voltage(
+                self.time, self.current, self.Q_As, *hyst)
+        return np.sqrt(np.mean(self.weights * (V_sim - self.V_meas) ** 2, axis=-1))
+
+
+def _bootstrap_refits(model, time, current, ocv_v, V_fit, resid, x0, block, seeds):
+    """
+    Picklable bootstrap task: one least-squares refit of ``model`` per seed
+    to V_fit plus moving-block resampled residuals, started from x0.
+    """
+    n, bounds = len(resid), model._param_bounds()
+    out = []
+    for seed in seeds:
+        rng    = np.random.default_rng(seed)
+        starts = rng.integers(0, n - block + 1, size=-(-n // block))
+        idx    = (starts[:, None] + np.arange(block)).ravel()[:n]
+        x, _   = model._refine_least_squares(time, current, ocv_v,
+                                             V_fit + resid[idx], x0, bounds)
+        out.append(x)
+    return np.array(out)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 #  CLI ENTRY POINT
 # ─────────────────────────────────────────────────────────────────────────────
@@ -287,10 +2161,37 @@ class TheveninECM:
 if __name__ == "__main__":
     import argparse, os, sys
 
-    parser = argparse.ArgumentParser(description="AUTOTWIN — Thevenin 1RC ECM")
+    parser = argparse.ArgumentParser(description="AUTOTWIN — Thevenin ECM")
     parser.add_argument("--file",   required=True, help="Path to discharge CSV")
     parser.add_argument("--qnom",   type=float, default=NASA_Q_NOMINAL)
     parser.add_argument("--outdir", default=".", help="Output directory")
+    parser.add_argument("--backend", default="vectorized", choices=_SIM_BACKENDS,
+                        help="Simulation kernel (default: vectorized)")
+    parser.add_argument("--mode",    default="full", choices=_MODES,
+                        help="'fast' = closed-form fit, DE only as fallback")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="DE worker processes (-1 = all cores)")
+    parser.add_argument("--strategy", default="de", choices=_STRATEGIES,
+                        help="Global stage: Differential Evolution or Sobol "
+                             "multi-start least squares (default: de)")
+    parser.add_argument("--cache",  default=None,
+                        help="Result cache directory (default: no cache)")
+    parser.add_argument("--order",  type=int, default=1,
+                        help="Number of RC branches (default: 1)")
+    parser.add_argument("--resample", default=None, metavar="DT",
+                        help="Identify on a uniform grid of DT seconds "
+                             "('auto' = median step)")
+    parser.add_argument("--decimate", type=float, default=None, metavar="MV",
+                        help="Thin flat regions for identification within MV "
+                             "millivolts")
+    parser.add_argument("--segments", action="store_true",
+                        help="Identify on current steps, relaxation tails and "
+                             "knees only")
+    parser.add_argument("--uncertainty", default="jacobian",
+                        choices=_UNCERTAINTY_METHODS + ("none",),
+                        help="Parameter confidence intervals (default: jacobian)")
+    parser.add_argument("--n-boot", type=int, default=_N_BOOTSTRAP,
+                        help="Bootstrap replicates (default: %(default)s)")
     args = parser.parse_args()
 
     if not os.path.isfile(args.file):
@@ -298,9 +2199,16 @@ if __name__ == "__main__":
         sys.exit(1)
 
     os.makedirs(args.outdir, exist_ok=True)
-    print(f"\n{'='*55}\n  AUTOTWIN — Thevenin 1RC ECM\n  File: {args.file}\n{'='*55}")
+    print(f"\n{'='*55}\n  AUTOTWIN — Thevenin {args.order}RC ECM\n  File: {args.file}\n{'='*55}")
 
-    ecm = TheveninECM()
+    ecm = make_ecm(args.order, backend=args.backend, mode=args.mode,
+                   workers=args.workers, strategy=args.strategy, cache=args.cache,
+                   resample_dt=(args.resample if args.resample in (None, "auto")
+                                else float(args.resample)),
+                   decimate_tol=None if args.decimate is None else args.decimate / 1000,
+                   segments=args.segments,
+                   uncertainty=None if args.uncertainty == "none" else args.uncertainty,
+                   n_bootstrap=args.n_boot)
     raw = TheveninECM.load_csv(args.file)
     res = ecm.run(raw, Q_nominal_Ah=args.qnom, verbose=True)
 